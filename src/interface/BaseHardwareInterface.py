@@ -36,6 +36,7 @@ class BaseHardwareInterface(object):
         self.pass_record_callback = None # Function added in server.py
         self.new_enter_or_exit_at_callback = None # Function added in server.py
         self.node_crossing_callback = None # Function added in server.py
+        self.update_start_time = None # monotonic time at start of node-data read in 'update()'
         self.nodes = []
         self.marshal_type = None
         self.ready_failure_msg = None
@@ -107,16 +108,11 @@ class BaseHardwareInterface(object):
     def process_history(self, node, readtime, pn_history):
         # prune history data if race is not running (keep last 60s)
         if self.race_status is BaseHardwareInterface.RACE_STATUS_READY:
-            if len(node.history_times):
-                while node.history_times[0] < (monotonic() - 60):
-                    node.history_values.pop(0)
-                    node.history_times.pop(0)
-                    if not len(node.history_times): #prevent while from destroying itself
-                        break
+            node.rssi_history.prune_before(monotonic() - 60)
 
         if pn_history and self.race_status != BaseHardwareInterface.RACE_STATUS_DONE:
             # get and process history data (except when race is over)
-            pn_history.addTo(readtime, node.history_values, node.history_times, self)
+            pn_history.addTo(readtime, node.rssi_history, self)
 
     def process_crossings(self, cross_list):
         if len(cross_list) > 0:
@@ -125,11 +121,14 @@ class BaseHardwareInterface(object):
 
     def process_updates(self, upd_list):
         if len(upd_list) > 0:
+            # (start of node-data read, start of lap processing) for pass-record timing traces
+            update_times = (self.update_start_time, monotonic())
             if len(upd_list) == 1:  # list contains single item
                 item = upd_list[0]
                 node = item[0]
                 if node.node_lap_id != -1 and callable(self.pass_record_callback):    # (node, lap_time_absolute)
-                    self.pass_record_callback(node, item[2], BaseHardwareInterface.LAP_SOURCE_REALTIME, peak=node.pass_peak_rssi)  #pylint: disable=not-callable
+                    self.pass_record_callback(node, item[2], BaseHardwareInterface.LAP_SOURCE_REALTIME, peak=node.pass_peak_rssi,  #pylint: disable=not-callable
+                                              update_times=update_times)
                 node.node_lap_id = item[1]  # new_lap_id
 
             else:  # list contains multiple items; sort so processed in order by lap time
@@ -137,7 +136,8 @@ class BaseHardwareInterface(object):
                 for item in upd_list:
                     node = item[0]
                     if node.node_lap_id != -1 and callable(self.pass_record_callback):    # (node, lap_time_absolute)
-                        self.pass_record_callback(node, item[2], BaseHardwareInterface.LAP_SOURCE_REALTIME, peak=node.pass_peak_rssi)  #pylint: disable=not-callable
+                        self.pass_record_callback(node, item[2], BaseHardwareInterface.LAP_SOURCE_REALTIME, peak=node.pass_peak_rssi,  #pylint: disable=not-callable
+                                                  update_times=update_times)
                     node.node_lap_id = item[1]  # new_lap_id
 
     #
@@ -253,43 +253,43 @@ class PeakNadirHistory:
         self.nadirFirstTime = 0
         self.nadirLastTime = 0
 
-    def addTo(self, readtime, history_values, history_times, interface):
+    def addTo(self, readtime, history, interface):
         if self.peakRssi > 0:
             if self.nadirRssi > 0:
                 # both
                 if self.peakLastTime > self.nadirFirstTime:
                     # process peak first
                     if self.peakFirstTime > self.peakLastTime:
-                        self._addEntry(self.peakRssi, readtime - (self.peakFirstTime / 1000.0), history_values, history_times)
-                        self._addEntry(self.peakRssi, readtime - (self.peakLastTime / 1000.0), history_values, history_times)
+                        self._addEntry(self.peakRssi, readtime - (self.peakFirstTime / 1000.0), history)
+                        self._addEntry(self.peakRssi, readtime - (self.peakLastTime / 1000.0), history)
                     elif self.peakFirstTime == self.peakLastTime:
-                        self._addEntry(self.peakRssi, readtime - (self.peakLastTime / 1000.0), history_values, history_times)
+                        self._addEntry(self.peakRssi, readtime - (self.peakLastTime / 1000.0), history)
                     else:
                         interface.log('Ignoring corrupted peak history times ({0} < {1}) on node {2}'.format(self.peakFirstTime, self.peakLastTime, self.nodeIndex+1))
 
                     if self.nadirFirstTime > self.nadirLastTime:
-                        self._addEntry(self.nadirRssi, readtime - (self.nadirFirstTime / 1000.0), history_values, history_times)
-                        self._addEntry(self.nadirRssi, readtime - (self.nadirLastTime / 1000.0), history_values, history_times)
+                        self._addEntry(self.nadirRssi, readtime - (self.nadirFirstTime / 1000.0), history)
+                        self._addEntry(self.nadirRssi, readtime - (self.nadirLastTime / 1000.0), history)
                     elif self.nadirFirstTime == self.nadirLastTime:
-                        self._addEntry(self.nadirRssi, readtime - (self.nadirLastTime / 1000.0), history_values, history_times)
+                        self._addEntry(self.nadirRssi, readtime - (self.nadirLastTime / 1000.0), history)
                     else:
                         interface.log('Ignoring corrupted nadir history times ({0} < {1}) on node {2}'.format(self.nadirFirstTime, self.nadirLastTime, self.nodeIndex+1))
 
                 else:
                     # process nadir first
                     if self.nadirFirstTime > self.nadirLastTime:
-                        self._addEntry(self.nadirRssi, readtime - (self.nadirFirstTime / 1000.0), history_values, history_times)
-                        self._addEntry(self.nadirRssi, readtime - (self.nadirLastTime / 1000.0), history_values, history_times)
+                        self._addEntry(self.nadirRssi, readtime - (self.nadirFirstTime / 1000.0), history)
+                        self._addEntry(self.nadirRssi, readtime - (self.nadirLastTime / 1000.0), history)
                     elif self.nadirFirstTime == self.nadirLastTime:
-                        self._addEntry(self.nadirRssi, readtime - (self.nadirLastTime / 1000.0), history_values, history_times)
+                        self._addEntry(self.nadirRssi, readtime - (self.nadirLastTime / 1000.0), history)
                     else:
                         interface.log('Ignoring corrupted nadir history times ({0} < {1}) on node {2}'.format(self.nadirFirstTime, self.nadirLastTime, self.nodeIndex+1))
 
                     if self.peakFirstTime > self.peakLastTime:
-                        self._addEntry(self.peakRssi, readtime - (self.peakFirstTime / 1000.0), history_values, history_times)
-                        self._addEntry(self.peakRssi, readtime - (self.peakLastTime / 1000.0), history_values, history_times)
+                        self._addEntry(self.peakRssi, readtime - (self.peakFirstTime / 1000.0), history)
+                        self._addEntry(self.peakRssi, readtime - (self.peakLastTime / 1000.0), history)
                     elif self.peakFirstTime == self.peakLastTime:
-                        self._addEntry(self.peakRssi, readtime - (self.peakLastTime / 1000.0), history_values, history_times)
+                        self._addEntry(self.peakRssi, readtime - (self.peakLastTime / 1000.0), history)
                     else:
                         interface.log('Ignoring corrupted peak history times ({0} < {1}) on node {2}'.format(self.peakFirstTime, self.peakLastTime, self.nodeIndex+1))
 
@@ -297,10 +297,10 @@ class PeakNadirHistory:
                 # peak, no nadir
                 # process peak only
                 if self.peakFirstTime > self.peakLastTime:
-                    self._addEntry(self.peakRssi, readtime - (self.peakFirstTime / 1000.0), history_values, history_times)
-                    self._addEntry(self.peakRssi, readtime - (self.peakLastTime / 1000.0), history_values, history_times)
+                    self._addEntry(self.peakRssi, readtime - (self.peakFirstTime / 1000.0), history)
+                    self._addEntry(self.peakRssi, readtime - (self.peakLastTime / 1000.0), history)
                 elif self.peakFirstTime == self.peakLastTime:
-                    self._addEntry(self.peakRssi, readtime - (self.peakLastTime / 1000.0), history_values, history_times)
+                    self._addEntry(self.peakRssi, readtime - (self.peakLastTime / 1000.0), history)
                 else:
                     interface.log('Ignoring corrupted peak history times ({0} < {1}) on node {2}'.format(self.peakFirstTime, self.peakLastTime, self.nodeIndex+1))
 
@@ -308,18 +308,12 @@ class PeakNadirHistory:
             # no peak, nadir
             # process nadir only
             if self.nadirFirstTime > self.nadirLastTime:
-                self._addEntry(self.nadirRssi, readtime - (self.nadirFirstTime / 1000.0), history_values, history_times)
-                self._addEntry(self.nadirRssi, readtime - (self.nadirLastTime / 1000.0), history_values, history_times)
+                self._addEntry(self.nadirRssi, readtime - (self.nadirFirstTime / 1000.0), history)
+                self._addEntry(self.nadirRssi, readtime - (self.nadirLastTime / 1000.0), history)
             elif self.nadirFirstTime == self.nadirLastTime:
-                self._addEntry(self.nadirRssi, readtime - (self.nadirLastTime / 1000.0), history_values, history_times)
+                self._addEntry(self.nadirRssi, readtime - (self.nadirLastTime / 1000.0), history)
             else:
                 interface.log('Ignoring corrupted nadir history times ({0} < {1}) on node {2}'.format(self.nadirFirstTime, self.nadirLastTime, self.nodeIndex+1))
 
-    def _addEntry(self, entry_value, entry_time, history_values, history_times):
-        hist_len = len(history_values)
-        # if previous two entries have same value then just extend time on last entry
-        if hist_len >= 2 and history_values[hist_len-1] == entry_value and history_values[hist_len-2] == entry_value:
-            history_times[hist_len-1] = entry_time
-        else:
-            history_values.append(entry_value)
-            history_times.append(entry_time)
+    def _addEntry(self, entry_value, entry_time, history):
+        history.add(entry_value, entry_time)
@@ -35,6 +35,7 @@ class MockInterface(BaseHardwareInterface):
         self.nodes = [] # Array to hold each node object
         self.data = []
         self.mocknodedata = {}
+        self.lap_probability = 0.05 # chance of starting a crossing on each generated read (MOCK_NODE_SIGNAL=2)
         # i2c_addrs = [8, 10, 12, 14, 16, 18, 20, 22] # Software limited to 8 nodes
         for index in range(int(kwargs['num_nodes'])):
             self.mocknodedata[index] = {
@@ -85,116 +86,35 @@ class MockInterface(BaseHardwareInterface):
         upd_list = []  # list of nodes with new laps (node, new_lap_id, lap_timestamp)
         cross_list = []  # list of nodes with crossing-flag changes
         startThreshLowerNode = None
+        self.update_start_time = monotonic()
+        node_stats = self.read_all_node_stats()
 
-        for index, node in enumerate(self.nodes):
+        for node in self.nodes:
             if node.frequency:
-                readtime = monotonic()
-
-                match self.config.get_item('GENERAL', 'MOCK_NODE_SIGNAL'):
-                    case 2:
-                        if self.mocknodedata[index]['is_crossing']:
-                            new_rssi = random.randrange(60,150)
-                            pass_peak_rssi = max(self.mocknodedata[index]['pass_peak_rssi'], new_rssi)
-                            node_data = {
-                                'lap_id': self.mocknodedata[index]['lap_number'],
-                                'ms_val': 0,
-                                'rssi_val': new_rssi,
-                                'node.node_peak_rssi': 100,
-                                'node.pass_peak_rssi': pass_peak_rssi,
-                                'node.loop_time': 1,
-                                'cross_flag': 1,
-                                'node.pass_nadir_rssi': self.mocknodedata[index]['pass_nadir_rssi'],
-                                'node.node_nadir_rssi': 20,
-                                'pn_history.peakRssi': new_rssi,
-                                'pn_history.peakFirstTime': 0,
-                                'pn_history.peakLastTime': 0,
-                                'pn_history.nadirRssi': new_rssi,
-                                'pn_history.nadirFirstTime': 0,
-                                'pn_history.nadirLastTime': 0
-                            }
-                            if random.random() < 0.5:
-                                self.mocknodedata[index]['is_crossing'] = False
-                                self.mocknodedata[index]['pass_nadir_rssi'] = 100
-                        else:
-                            new_rssi = random.randrange(20,40)
-                            pass_nadir_rssi = min(self.mocknodedata[index]['pass_nadir_rssi'], new_rssi)
-                            node_data = {
-                                'lap_id': self.mocknodedata[index]['lap_number'],
-                                'ms_val': 0,
-                                'rssi_val': new_rssi,
-                                'node.node_peak_rssi': 100,
-                                'node.pass_peak_rssi': self.mocknodedata[index]['pass_peak_rssi'],
-                                'node.loop_time': 1,
-                                'cross_flag': 0,
-                                'node.pass_nadir_rssi': pass_nadir_rssi,
-                                'node.node_nadir_rssi': 20,
-                                'pn_history.peakRssi': new_rssi,
-                                'pn_history.peakFirstTime': 0,
-                                'pn_history.peakLastTime': 0,
-                                'pn_history.nadirRssi': new_rssi,
-                                'pn_history.nadirFirstTime': 0,
-                                'pn_history.nadirLastTime': 0
-                            }
-                            if random.random() < 0.05:
-                                self.mocknodedata[index]['lap_number'] += 1
-                                self.mocknodedata[index]['is_crossing'] = True
-                                self.mocknodedata[index]['pass_peak_rssi'] = 0
-
-                        if node_data:
-                            lap_id = node_data['lap_id']
-                            ms_val = node_data['ms_val']
-                            rssi_val = node_data['rssi_val']
-                            node.node_peak_rssi = node_data['node.node_peak_rssi']
-                            node.pass_peak_rssi = node_data['node.pass_peak_rssi']
-                            node.loop_time = node_data['node.loop_time']
-                            cross_flag = node_data['cross_flag']
-                            node.pass_nadir_rssi = node_data['node.pass_nadir_rssi']
-                            node.node_nadir_rssi = node_data['node.node_nadir_rssi']
-                            pn_history = PeakNadirHistory(node.index)
-                            pn_history.peakRssi = node_data['pn_history.peakRssi']
-                            pn_history.peakFirstTime = node_data['pn_history.peakFirstTime']
-                            pn_history.peakLastTime = node_data['pn_history.peakLastTime']
-                            pn_history.nadirRssi = node_data['pn_history.nadirRssi']
-                            pn_history.nadirFirstTime = node_data['pn_history.nadirFirstTime']
-                            pn_history.nadirLastTime = node_data['pn_history.nadirLastTime']
-                            if node.is_valid_rssi(rssi_val):
-                                node.current_rssi = rssi_val
-                                self.process_lap_stats(node, readtime, lap_id, ms_val, cross_flag, pn_history, cross_list, upd_list)
-                            else:
-                                self.log('RSSI reading ({0}) out of range on Node {1}; rejected'.format(rssi_val, node.index+1))
-
-                    case 1:
-                        node_data = self.data[index]
-                        if node_data:
-                            data_line = node_data.readline()
-                            if data_line == '':
-                                node_data.seek(0)
-                                data_line = node_data.readline()
-                            data_columns = data_line.split(',')
-                            lap_id = int(data_columns[1])
-                            ms_val = int(data_columns[2])
-                            rssi_val = int(data_columns[3])
-                            node.node_peak_rssi = int(data_columns[4])
-                            node.pass_peak_rssi = int(data_columns[5])
-                            node.loop_time = int(data_columns[6])
-                            cross_flag = True if data_columns[7]=='T' else False
-                            node.pass_nadir_rssi = int(data_columns[8])
-                            node.node_nadir_rssi = int(data_columns[9])
-                            pn_history = PeakNadirHistory(node.index)
-                            pn_history.peakRssi = int(data_columns[10])
-                            pn_history.peakFirstTime = int(data_columns[11])
-                            pn_history.peakLastTime = int(data_columns[12])
-                            pn_history.nadirRssi = int(data_columns[13])
-                            pn_history.nadirFirstTime = int(data_columns[14])
-                            pn_history.nadirLastTime = int(data_columns[15])
-                            if node.is_valid_rssi(rssi_val):
-                                node.current_rssi = rssi_val
-                                self.process_lap_stats(node, readtime, lap_id, ms_val, cross_flag, pn_history, cross_list, upd_list)
-                            else:
-                                self.log('RSSI reading ({0}) out of range on Node {1}; rejected'.format(rssi_val, node.index+1))
-
-                    case _:
-                        pass
+                node_data, readtime = node_stats.get(node.index, (None, 0))
+
+                if node_data:
+                    lap_id = node_data['lap_id']
+                    ms_val = node_data['ms_val']
+                    rssi_val = node_data['rssi_val']
+                    node.node_peak_rssi = node_data['node.node_peak_rssi']
+                    node.pass_peak_rssi = node_data['node.pass_peak_rssi']
+                    node.loop_time = node_data['node.loop_time']
+                    cross_flag = node_data['cross_flag']
+                    node.pass_nadir_rssi = node_data['node.pass_nadir_rssi']
+                    node.node_nadir_rssi = node_data['node.node_nadir_rssi']
+                    pn_history = PeakNadirHistory(node.index)
+                    pn_history.peakRssi = node_data['pn_history.peakRssi']
+                    pn_history.peakFirstTime = node_data['pn_history.peakFirstTime']
+                    pn_history.peakLastTime = node_data['pn_history.peakLastTime']
+                    pn_history.nadirRssi = node_data['pn_history.nadirRssi']
+                    pn_history.nadirFirstTime = node_data['pn_history.nadirFirstTime']
+                    pn_history.nadirLastTime = node_data['pn_history.nadirLastTime']
+                    if node.is_valid_rssi(rssi_val):
+                        node.current_rssi = rssi_val
+                        self.process_lap_stats(node, readtime, lap_id, ms_val, cross_flag, pn_history, cross_list, upd_list)
+                    else:
+                        self.log('RSSI reading ({0}) out of range on Node {1}; rejected'.format(rssi_val, node.index+1))
 
                 # check if node is set to temporary lower EnterAt/ExitAt values
                 if node.start_thresh_lower_flag:
@@ -221,6 +141,104 @@ class MockInterface(BaseHardwareInterface):
             startThreshLowerNode.start_thresh_lower_time = 0
 
 
+    def read_all_node_stats(self):
+        '''Generates lap stats for all active nodes in one batch; returns dict of (node_data, readtime) by node index'''
+        readtime = monotonic()
+        signal_mode = self.config.get_item('GENERAL', 'MOCK_NODE_SIGNAL')
+        node_stats = {}
+        for node in self.nodes:
+            if node.frequency:
+                match signal_mode:
+                    case 2:
+                        node_data = self.generate_node_data(node.index)
+                    case 1:
+                        node_data = self.read_mock_data_line(node.index)
+                    case _:
+                        node_data = None
+                node_stats[node.index] = (node_data, readtime)
+        return node_stats
+
+    def generate_node_data(self, index):
+        if self.mocknodedata[index]['is_crossing']:
+            new_rssi = random.randrange(60,150)
+            pass_peak_rssi = max(self.mocknodedata[index]['pass_peak_rssi'], new_rssi)
+            node_data = {
+                'lap_id': self.mocknodedata[index]['lap_number'],
+                'ms_val': 0,
+                'rssi_val': new_rssi,
+                'node.node_peak_rssi': 100,
+                'node.pass_peak_rssi': pass_peak_rssi,
+                'node.loop_time': 1,
+                'cross_flag': 1,
+                'node.pass_nadir_rssi': self.mocknodedata[index]['pass_nadir_rssi'],
+                'node.node_nadir_rssi': 20,
+                'pn_history.peakRssi': new_rssi,
+                'pn_history.peakFirstTime': 0,
+                'pn_history.peakLastTime': 0,
+                'pn_history.nadirRssi': new_rssi,
+                'pn_history.nadirFirstTime': 0,
+                'pn_history.nadirLastTime': 0
+            }
+            if random.random() < 0.5:
+                self.mocknodedata[index]['is_crossing'] = False
+                self.mocknodedata[index]['pass_nadir_rssi'] = 100
+        else:
+            new_rssi = random.randrange(20,40)
+            pass_nadir_rssi = min(self.mocknodedata[index]['pass_nadir_rssi'], new_rssi)
+            node_data = {
+                'lap_id': self.mocknodedata[index]['lap_number'],
+                'ms_val': 0,
+                'rssi_val': new_rssi,
+                'node.node_peak_rssi': 100,
+                'node.pass_peak_rssi': self.mocknodedata[index]['pass_peak_rssi'],
+                'node.loop_time': 1,
+                'cross_flag': 0,
+                'node.pass_nadir_rssi': pass_nadir_rssi,
+                'node.node_nadir_rssi': 20,
+                'pn_history.peakRssi': new_rssi,
+                'pn_history.peakFirstTime': 0,
+                'pn_history.peakLastTime': 0,
+                'pn_history.nadirRssi': new_rssi,
+                'pn_history.nadirFirstTime': 0,
+                'pn_history.nadirLastTime': 0
+            }
+            if random.random() < self.lap_probability:
+                self.trigger_lap(index)
+        return node_data
+
+    def trigger_lap(self, index):
+        '''Starts a crossing (and new lap) in the generated node data (MOCK_NODE_SIGNAL=2)'''
+        self.mocknodedata[index]['lap_number'] += 1
+        self.mocknodedata[index]['is_crossing'] = True
+        self.mocknodedata[index]['pass_peak_rssi'] = 0
+
+    def read_mock_data_line(self, index):
+        data_file = self.data[index]
+        if not data_file:
+            return None
+        data_line = data_file.readline()
+        if data_line == '':
+            data_file.seek(0)
+            data_line = data_file.readline()
+        data_columns = data_line.split(',')
+        return {
+            'lap_id': int(data_columns[1]),
+            'ms_val': int(data_columns[2]),
+            'rssi_val': int(data_columns[3]),
+            'node.node_peak_rssi': int(data_columns[4]),
+            'node.pass_peak_rssi': int(data_columns[5]),
+            'node.loop_time': int(data_columns[6]),
+            'cross_flag': True if data_columns[7]=='T' else False,
+            'node.pass_nadir_rssi': int(data_columns[8]),
+            'node.node_nadir_rssi': int(data_columns[9]),
+            'pn_history.peakRssi': int(data_columns[10]),
+            'pn_history.peakFirstTime': int(data_columns[11]),
+            'pn_history.peakLastTime': int(data_columns[12]),
+            'pn_history.nadirRssi': int(data_columns[13]),
+            'pn_history.nadirFirstTime': int(data_columns[14]),
+            'pn_history.nadirLastTime': int(data_columns[15])
+        }
+
     #
     # External functions for setting data
     #
@@ -1,5 +1,7 @@
 '''Node class for the RotorHazard interface.'''
 
+from RssiHistory import RssiHistory
+
 class Node:
     '''Node class represents the arduino/rx pair.'''
     def __init__(self):
@@ -53,8 +55,7 @@ class Node:
 
         self.under_min_lap_count = 0
 
-        self.history_values = []
-        self.history_times = []
+        self.rssi_history = RssiHistory()
 
         self.scan_enabled = False
         self.scan_interval = 0 # scanning frequency interval
@@ -70,6 +71,22 @@ class Node:
         self.read_block_count = 0
         self.read_error_count = 0
 
+    @property
+    def history_values(self):
+        return self.rssi_history.values
+
+    @history_values.setter
+    def history_values(self, values):
+        self.rssi_history.values = values
+
+    @property
+    def history_times(self):
+        return self.rssi_history.times
+
+    @history_times.setter
+    def history_times(self, times):
+        self.rssi_history.times = times
+
     def init(self):
         if self.api_level >= 10:
             self.api_valid_flag = True  # set flag for newer API functions supported
@@ -112,6 +129,14 @@ class Node:
             'pass_nadir_rssi': self.pass_nadir_rssi
         }
 
+    def get_io_group(self):
+        '''Returns key shared by nodes on the same bus/port (nodes in different groups may be read concurrently)'''
+        return None
+
+    def get_batch_io_lock(self):
+        '''Returns lock to hold while reading a batch of nodes in the same I/O group, or None'''
+        return None
+
     def is_valid_rssi(self, value):
         return value > 0 and value < self.max_rssi_value
 
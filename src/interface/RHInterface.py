@@ -224,29 +224,11 @@ class RHInterface(BaseHardwareInterface):
         upd_list = []  # list of nodes with new laps (node, new_lap_id, lap_timestamp)
         cross_list = []  # list of nodes with crossing-flag changes
         startThreshLowerNode = None
+        self.update_start_time = monotonic()
+        node_stats = self.read_all_node_stats()
         for node in self.nodes:
             if node.frequency:
-                if node.api_valid_flag or node.api_level >= 5:
-                    if node.api_level >= 32:
-                        data = node.read_block(self, READ_LAP_PASS_STATS, 8)
-                        if data != None:
-                            data.extend(node.read_block(self, READ_LAP_EXTREMUMS, 8))
-                    elif node.api_level >= 21:
-                        data = node.read_block(self, READ_LAP_STATS, 16)
-                    elif node.api_level >= 18:
-                        data = node.read_block(self, READ_LAP_STATS, 19)
-                    elif node.api_level >= 17:
-                        data = node.read_block(self, READ_LAP_STATS, 28)
-                    elif node.api_level >= 13:
-                        data = node.read_block(self, READ_LAP_STATS, 20)
-                    else:
-                        data = node.read_block(self, READ_LAP_STATS, 18)
-                    server_roundtrip = node.io_response - node.io_request
-                    server_oneway = server_roundtrip / 2
-                    readtime = node.io_response - server_oneway
-                else:
-                    data = node.read_block(self, READ_LAP_STATS, 17)
-                    readtime = 0
+                data, readtime = node_stats.get(node.index, (None, 0))
 
                 if data != None and len(data) > 0:
                     lap_id = data[0]
@@ -403,6 +385,61 @@ class RHInterface(BaseHardwareInterface):
             startThreshLowerNode.start_thresh_lower_time = 0
 
 
+    def read_all_node_stats(self):
+        '''Reads lap stats for all active nodes; returns dict of (data, readtime) by node index'''
+        io_groups = {}
+        for node in self.nodes:
+            if node.frequency:
+                io_groups.setdefault(node.get_io_group(), []).append(node)
+
+        node_stats = {}
+        if len(io_groups) > 1:
+            # separate buses/ports are read concurrently; each bus still handles one transfer at a time
+            gevent.joinall([gevent.spawn(self.read_node_stats_batch, nodes, node_stats) \
+                            for nodes in io_groups.values()], raise_error=True)
+        else:
+            for nodes in io_groups.values():
+                self.read_node_stats_batch(nodes, node_stats)
+        return node_stats
+
+    def read_node_stats_batch(self, nodes, node_stats):
+        io_lock = nodes[0].get_batch_io_lock()
+        if io_lock:
+            with io_lock:
+                for node in nodes:
+                    node_stats[node.index] = self.read_node_stats(node)
+        else:
+            for node in nodes:
+                node_stats[node.index] = self.read_node_stats(node)
+
+    def read_node_stats(self, node):
+        if node.api_valid_flag or node.api_level >= 5:
+            if node.api_level >= 32:
+                data = node.read_block(self, READ_LAP_PASS_STATS, 8)
+                # timing values are relative to the pass-stats read, not the extremums read
+                readtime = self.get_node_readtime(node)
+                if data != None:
+                    data.extend(node.read_block(self, READ_LAP_EXTREMUMS, 8))
+                return data, readtime
+            elif node.api_level >= 21:
+                data = node.read_block(self, READ_LAP_STATS, 16)
+            elif node.api_level >= 18:
+                data = node.read_block(self, READ_LAP_STATS, 19)
+            elif node.api_level >= 17:
+                data = node.read_block(self, READ_LAP_STATS, 28)
+            elif node.api_level >= 13:
+                data = node.read_block(self, READ_LAP_STATS, 20)
+            else:
+                data = node.read_block(self, READ_LAP_STATS, 18)
+            return data, self.get_node_readtime(node)
+        else:
+            return node.read_block(self, READ_LAP_STATS, 17), 0
+
+    def get_node_readtime(self, node):
+        server_roundtrip = node.io_response - node.io_request
+        server_oneway = server_roundtrip / 2
+        return node.io_response - server_oneway
+
     #
     # Internal helper functions for setting single values
     #
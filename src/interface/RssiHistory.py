@@ -0,0 +1,74 @@
+'''RSSI history buffer for a node.'''
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+COMPACT_MIN_ENTRIES = 256  # pruned entries are only discarded once at least this many accumulate
+
+
+class RssiHistory:
+    '''
+    Peak/nadir RSSI history for one node, as parallel value and time buffers.
+
+    Times are stored in a float array; values are kept in a list so integer
+    RSSI readings serialize unchanged. Pruning old entries only moves the start
+    offset, and pruned entries are discarded in bulk once they make up half of
+    the buffer, so both adding and pruning are amortized O(1). Entry times are
+    expected to be in increasing order (as produced by PeakNadirHistory).
+    '''
+    def __init__(self):
+        self._values = []
+        self._times = array('d')
+        self._start = 0  # index of first (unpruned) entry
+
+    def __len__(self):
+        return len(self._times) - self._start
+
+    def clear(self):
+        self._values = []
+        self._times = array('d')
+        self._start = 0
+
+    def add(self, entry_value, entry_time):
+        hist_len = len(self._values)
+        # if previous two entries have same value then just extend time on last entry
+        if hist_len - self._start >= 2 and self._values[hist_len-1] == entry_value and self._values[hist_len-2] == entry_value:
+            self._times[hist_len-1] = entry_time
+        else:
+            self._values.append(entry_value)
+            self._times.append(entry_time)
+
+    def prune_before(self, cutoff_time):
+        '''Drops entries older than 'cutoff_time' '''
+        self._start = bisect_left(self._times, cutoff_time, self._start)
+        if self._start >= COMPACT_MIN_ENTRIES and self._start * 2 >= len(self._times):
+            self._compact()
+
+    def _compact(self):
+        del self._values[:self._start]
+        del self._times[:self._start]
+        self._start = 0
+
+    @property
+    def values(self):
+        return self._values[self._start:]
+
+    @values.setter
+    def values(self, values):
+        self._compact()
+        self._values = list(values)
+
+    @property
+    def times(self):
+        return self._times[self._start:].tolist()
+
+    @times.setter
+    def times(self, times):
+        self._compact()
+        self._times = array('d', times)
+
+    def get_window(self, start_time, end_time):
+        '''Returns (values, times) lists for entries with start_time <= time <= end_time'''
+        first = bisect_left(self._times, start_time, self._start)
+        last = bisect_right(self._times, end_time, first)
+        return self._values[first:last], self._times[first:last].tolist()
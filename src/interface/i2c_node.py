@@ -18,6 +18,9 @@ class I2CNode(Node):
         self.i2c_addr = addr
         self.i2c_helper = i2c_helper
 
+    def get_io_group(self):
+        return self.i2c_helper
+
     def read_block(self, interface, command, size, max_retries=MAX_RETRY_COUNT):
         '''
         Read i2c data given command, and data size.
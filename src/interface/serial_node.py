@@ -20,7 +20,15 @@ DEF_S32BPILL_SERIAL_PORTS = ["ttyAMA0", "serial0"]
 
 logger = logging.getLogger(__name__)
 
-node_io_rlock_obj = gevent.lock.RLock()  # semaphore lock for node I/O access
+port_io_rlock_objs = {}  # serial port object -> semaphore lock for node I/O access on that port
+
+def get_port_io_rlock(node_serial_obj):
+    '''Returns lock for node I/O on the given serial port (shared by all nodes on the port)'''
+    io_rlock = port_io_rlock_objs.get(node_serial_obj)
+    if io_rlock is None:
+        io_rlock = gevent.lock.RLock()
+        port_io_rlock_objs[node_serial_obj] = io_rlock
+    return io_rlock
 
 
 class SerialNode(Node):
@@ -28,7 +36,15 @@ class SerialNode(Node):
         Node.__init__(self)
         self.index = index
         self.serial = node_serial_obj
+        self.io_rlock = get_port_io_rlock(node_serial_obj)
         
+    def get_io_group(self):
+        return self.serial
+
+    def get_batch_io_lock(self):
+        # hold port for whole batch so multi-node index switches are not interleaved with other I/O
+        return self.io_rlock
+
     def node_log(self, interface, message):
         if interface:
             interface.log(message)
@@ -43,7 +59,7 @@ class SerialNode(Node):
         '''
         Read serial data given command, and data size.
         '''
-        with node_io_rlock_obj:  # only allow one greenlet at a time
+        with self.io_rlock:  # only allow one greenlet at a time per port
             self.inc_read_block_count(interface)
             success = False
             retry_count = 0
@@ -104,7 +120,7 @@ class SerialNode(Node):
         '''
         Write serial data given command, and data.
         '''
-        with node_io_rlock_obj:  # only allow one greenlet at a time
+        with self.io_rlock:  # only allow one greenlet at a time per port
             if interface:
                 interface.inc_intf_write_block_count()
             success = False
@@ -406,7 +406,7 @@ class SecondaryNode:
 
                     if pilot_id != RHUtils.PILOT_ID_NONE:
 
-                        pilot_obj = self._racecontext.rhdata.get_pilot(pilot_id)
+                        pilot_obj = self._racecontext.rhdata.get_pilot_view(pilot_id)
                         callsign = pilot_obj.callsign if pilot_obj else None
                         split_ts_epoch_ms = data['timestamp']  # split timestamp (epoch ms since 1970-01-01)
 
@@ -420,7 +420,7 @@ class SecondaryNode:
                             # convert split timestamp (epoch ms since 1970-01-01) to equivalent local 'monotonic' time value
                             split_ts = split_ts_epoch_ms - self._racecontext.race.start_time_epoch_ms
 
-                            act_laps_list = self._racecontext.race.get_active_laps(late_lap_flag=True)[node_index]
+                            act_laps_list = self._racecontext.race.get_seat_active_laps(node_index, late_lap_flag=True)
                             lap_count = max(0, len(act_laps_list) - 1)
                             split_id = self.id
 
@@ -78,8 +78,11 @@ class Config:
         self.config['GENERAL']['SHUTDOWN_BUTTON_GPIOPIN'] = 18
         self.config['GENERAL']['SHUTDOWN_BUTTON_DELAYMS'] = 2500
         self.config['GENERAL']['DB_AUTOBKP_NUM_KEEP'] = 30
+        self.config['GENERAL']['DB_STORAGE_PROFILE'] = 'balanced'  # 'balanced', 'durable' or 'rollback'
+        self.config['GENERAL']['DB_PRAGMAS'] = {}  # overrides for profile PRAGMAs, e.g. {"mmap_size": 0}
         self.config['GENERAL']['SYNC_LEADTIME_SECS'] = 0.9  # lead time for race stage/start signals
         self.config['GENERAL']['LOG_SENSORS_DATA_RATE'] = 300  # rate at which to log sensor data
+        self.config['GENERAL']['PASS_TRACE_SIZE'] = 0  # number of passes kept in pass-record timing trace (0 = disabled)
         self.config['GENERAL']['SERIAL_PORTS'] = []
         self.config['GENERAL']['MOCK_NODES'] = 0
         self.config['GENERAL']['MOCK_NODE_SIGNAL'] = 0
@@ -188,6 +191,8 @@ class Config:
                 'SHUTDOWN_BUTTON_GPIOPIN',
                 'SHUTDOWN_BUTTON_DELAYMS',
                 'DB_AUTOBKP_NUM_KEEP',
+                'DB_STORAGE_PROFILE',
+                'DB_PRAGMAS',
                 'SERIAL_PORTS',
                 'MOCK_NODES'
             ],
@@ -19,6 +19,38 @@ DB = sqlalchemy
 DB_POOL_SIZE=10
 DB_MAX_OVERFLOW=100
 
+# SQLite storage profiles; PRAGMAs applied to each new connection, in order
+DB_STORAGE_PROFILES = {
+    # WAL with commits synced at checkpoint; a crash can lose only writes since the last checkpoint
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -16000,
+        'mmap_size': 67108864,
+        'temp_store': 'MEMORY',
+    },
+    # WAL with every commit synced
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -10000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+    },
+    # SQLite default rollback journal
+    'rollback': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -2000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+    },
+}
+DB_DEFAULT_STORAGE_PROFILE = 'balanced'
+DB_TUNABLE_PRAGMAS = ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store')
+DB_STORAGE_PROFILE = DB_DEFAULT_STORAGE_PROFILE
+DB_PRAGMA_OVERRIDES = {}
+
 #pylint: disable=no-member
 
 # Language placeholder (Overwritten after module init)
@@ -294,6 +326,8 @@ class SavedRaceMeta(Base):
     __tablename__ = 'saved_race_meta'
     __table_args__ = (
         DB.UniqueConstraint('round_id', 'heat_id'),
+        DB.Index('ix_saved_race_meta_heat_id', 'heat_id'),
+        DB.Index('ix_saved_race_meta_class_id', 'class_id'),
     )
     id = DB.Column(DB.Integer, primary_key=True)
     round_id = DB.Column(DB.Integer, nullable=False)
@@ -332,6 +366,7 @@ class SavedPilotRace(Base):
     __tablename__ = 'saved_pilot_race'
     __table_args__ = (
         DB.UniqueConstraint('race_id', 'node_index'),
+        DB.Index('ix_saved_pilot_race_tuning', 'node_index', 'frequency', 'pilot_id'), # calibration lookups
     )
     id = DB.Column(DB.Integer, primary_key=True)
     race_id = DB.Column(DB.Integer, DB.ForeignKey("saved_race_meta.id"), nullable=False)
@@ -339,6 +374,7 @@ class SavedPilotRace(Base):
     pilot_id = DB.Column(DB.Integer, DB.ForeignKey("pilot.id"), nullable=True)
     history_values = DB.Column(DB.String, nullable=True)
     history_times = DB.Column(DB.String, nullable=True)
+    history_data = DB.Column(DB.LargeBinary, nullable=True) # packed RSSI history (util.RssiHistoryPack)
     penalty_time = DB.Column(DB.Integer, nullable=False)
     penalty_desc = DB.Column(DB.String, nullable=True)
     enter_at = DB.Column(DB.Integer, nullable=False)
@@ -351,6 +387,10 @@ class SavedPilotRace(Base):
 
 class SavedRaceLap(Base):
     __tablename__ = 'saved_race_lap'
+    __table_args__ = (
+        DB.Index('ix_saved_race_lap_pilotrace_id', 'pilotrace_id', 'lap_time_stamp'),
+        DB.Index('ix_saved_race_lap_race_id', 'race_id'),
+    )
     id = DB.Column(DB.Integer, primary_key=True)
     race_id = DB.Column(DB.Integer, DB.ForeignKey("saved_race_meta.id"), nullable=False)
     pilotrace_id = DB.Column(DB.Integer, DB.ForeignKey("saved_pilot_race.id"), nullable=False)
@@ -434,6 +474,22 @@ class RaceFormatAttribute(Base):
     def __repr__(self):
         return '<RaceFormatAttribute %r %s>' % (self.id, self.name)
 
+class ResultsCacheSection(Base):
+    __tablename__ = 'results_cache'
+    __table_args__ = (
+        DB.UniqueConstraint('cache_type', 'cache_id', 'section'),
+    )
+    id = DB.Column(DB.Integer, primary_key=True)
+    cache_type = DB.Column(DB.String(16), nullable=False)
+    cache_id = DB.Column(DB.Integer, nullable=False)
+    section = DB.Column(DB.String(80), nullable=False) # top-level results key (leaderboard or 'meta')
+    position = DB.Column(DB.Integer, nullable=False) # order of key in results
+    version = DB.Column(DB.Integer, nullable=False) # storage format version
+    data = DB.Column(DB.LargeBinary, nullable=True)
+
+    def __repr__(self):
+        return '<ResultsCacheSection %r %r %r>' % (self.cache_type, self.cache_id, self.section)
+
 class GlobalSettings(Base):
     __tablename__ = 'global_settings'
     id = DB.Column(DB.Integer, primary_key=True)
@@ -443,11 +499,38 @@ class GlobalSettings(Base):
     def __repr__(self):
         return '<GlobalSetting %r>' % self.id
 
+def get_storage_pragmas(profile=None, overrides=None):
+    '''Returns (name, value) PRAGMAs for a storage profile, with any overrides applied'''
+    profile = profile or DB_STORAGE_PROFILE
+    if profile not in DB_STORAGE_PROFILES:
+        logger.warning("Unknown database storage profile '{}', using '{}'".format(profile, DB_DEFAULT_STORAGE_PROFILE))
+        profile = DB_DEFAULT_STORAGE_PROFILE
+    pragmas = dict(DB_STORAGE_PROFILES[profile])
+    for name, value in (DB_PRAGMA_OVERRIDES if overrides is None else overrides).items():
+        if name not in DB_TUNABLE_PRAGMAS:
+            logger.warning("Ignoring unsupported database PRAGMA '{}'".format(name))
+        elif isinstance(value, bool) or not (isinstance(value, int) or (isinstance(value, str) and value.isalpha())):
+            logger.warning("Ignoring invalid value for database PRAGMA '{}': {}".format(name, value))
+        else:
+            pragmas[name] = value
+    return list(pragmas.items())
+
+def set_storage_profile(profile=None, overrides=None):
+    '''Selects the storage profile for new connections; reconnects if the database is open'''
+    global DB_STORAGE_PROFILE
+    global DB_PRAGMA_OVERRIDES
+    DB_STORAGE_PROFILE = profile or DB_DEFAULT_STORAGE_PROFILE
+    DB_PRAGMA_OVERRIDES = dict(overrides) if isinstance(overrides, dict) else {}
+    if DB_engine:
+        initialize()
+
 def initialize(db_uri=None):
     close_database()
     global DB_URI
     if db_uri:
         DB_URI = db_uri
+    storage_pragmas = get_storage_pragmas()
+    logger.debug('Database storage PRAGMAs: {}'.format(storage_pragmas))
     global DB_engine
     DB_engine = create_engine(DB_URI, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, 
                             connect_args={
@@ -461,9 +544,8 @@ def initialize(db_uri=None):
     def set_pragmas(dbapi_connection, connection_record):
         cursor = dbapi_connection.cursor()
         cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.execute("PRAGMA journal_mode=WAL")
-        cursor.execute("PRAGMA cache_size=-10000")
-        cursor.execute("PRAGMA synchronous=FULL")
+        for name, value in storage_pragmas:
+            cursor.execute("PRAGMA {}={}".format(name, value))
         cursor.execute("PRAGMA busy_timeout=5000")
         cursor.close()
     
@@ -478,6 +560,35 @@ def initialize(db_uri=None):
 def create_db_all():
     Base.metadata.create_all(bind=DB_engine)
 
+def create_db_indexes():
+    '''Creates any declared indexes missing from existing tables; returns names of created indexes'''
+    created = []
+    with DB_engine.begin() as conn:
+        inspector = sqlalchemy.inspect(conn)
+        existing_tables = inspector.get_table_names()
+        for table in Base.metadata.sorted_tables:
+            if table.name in existing_tables:
+                existing_indexes = [index['name'] for index in inspector.get_indexes(table.name)]
+                for index in table.indexes:
+                    if index.name not in existing_indexes:
+                        index.create(bind=conn)
+                        created.append(index.name)
+    return created
+
+def checkpoint_database(mode='PASSIVE'):
+    '''Copies committed WAL content into the database file; returns (busy, wal_pages, checkpointed_pages)'''
+    with DB_engine.connect() as conn:
+        if conn.exec_driver_sql("PRAGMA journal_mode").scalar().lower() != 'wal':
+            return None
+        return tuple(conn.exec_driver_sql("PRAGMA wal_checkpoint({})".format(mode)).one())
+
+def check_database_integrity(quick=True):
+    '''Runs SQLite integrity check; returns list of reported problems (empty if database is intact)'''
+    with DB_engine.connect() as conn:
+        rows = conn.exec_driver_sql("PRAGMA quick_check" if quick else "PRAGMA integrity_check").all()
+    problems = [row[0] for row in rows]
+    return [] if problems == ['ok'] else problems
+
 def close_database():
     global DB_session
     if DB_session:
@@ -139,7 +139,7 @@ class HeatGeneratorManager():
                             else:
                                 # randomly seed
                                 if filled_pool == False:
-                                    class_result = self._racecontext.rhdata.get_results_raceClass(input_class)
+                                    class_result = self._racecontext.rhdata.get_results_raceClass(input_class, sections=['by_race_time'])
                                     for lb_line in class_result['by_race_time']:
                                         pilot_pool.append(lb_line['pilot_id'])
 
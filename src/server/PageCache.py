@@ -3,8 +3,14 @@ Page Cache
 
 Stores cached results objects assembled via the Results module and database
 lap lists. If valid, served directly to results without rebuilding.
-buildToken is a monotonic timestamp so in-progress builds can be interrupted
-if new data becomes available during the build process.
+Builds are serialized; requests arriving during a build wait for it and then
+share a single rebuild. If the cache is invalidated while a build is running,
+the build's output is stored but not marked valid, so the next request
+rebuilds with the new data.
+
+Each heat, class and top-level payload entry is a section with the version
+at which it last changed, so clients holding an earlier version can be sent
+only the changed sections (see get_delta).
 
 '''
 
@@ -13,6 +19,7 @@ from time import monotonic
 from eventmanager import Evt
 import RHUtils
 import gevent
+from util.BuildCoordinator import BuildCoordinator
 
 logger = logging.getLogger(__name__)
 
@@ -26,9 +33,12 @@ class PageCache:
         self._racecontext = RaceContext
         self._Events = Events
         self._cache = {} # Cache of complete results page
-        self._buildToken = False # Time of result generation or false if no results are being calculated
         self._valid = False # Whether cache is valid
-        self._inUpdateCacheFlag = False
+        self._invalidations = 0 # Count of cache invalidations, used to detect changes during a build
+        self._builds = BuildCoordinator('page cache', timeout=self._CACHE_TIMEOUT)
+        self._version = 0 # Incremented whenever cache contents change
+        self._section_versions = {} # Section key -> version when last changed
+        self._removed_sections = {} # Section key -> version when removed
 
     def get_cache(self):
         if self.get_valid(): # Output existing calculated results
@@ -39,8 +49,61 @@ class PageCache:
                 self.update_cache()
             return self._cache
 
-    def get_buildToken(self):
-        return self._buildToken
+    def get_version(self):
+        return self._version
+
+    def get_delta(self, since_version):
+        '''Returns sections changed after since_version, or None if full data is needed'''
+        if not since_version or since_version > self._version:
+            return None
+
+        delta = {
+            'version': self._version,
+            'base_version': since_version,
+            'removed': []
+        }
+        for (key, item_id), version in self._section_versions.items():
+            if version > since_version:
+                if item_id is None:
+                    delta[key] = self._cache[key]
+                else:
+                    delta.setdefault(key, {})[item_id] = self._cache[key][item_id]
+
+        for (key, item_id), version in self._removed_sections.items():
+            if version > since_version:
+                delta['removed'].append([key, item_id])
+
+        return delta
+
+    @staticmethod
+    def _split_sections(payload):
+        sections = {}
+        for key, value in payload.items():
+            if key in ['heats', 'classes']:
+                for item_id, item in value.items():
+                    sections[(key, item_id)] = item
+            elif key != 'version':
+                sections[(key, None)] = value
+        return sections
+
+    def _update_versions(self, payload):
+        new_sections = self._split_sections(payload)
+        old_sections = self._split_sections(self._cache)
+
+        changed = [key for key, value in new_sections.items() if key not in old_sections or old_sections[key] != value]
+        removed = [key for key in old_sections if key not in new_sections]
+
+        if changed or removed:
+            self._version += 1
+            for key in changed:
+                self._section_versions[key] = self._version
+                self._removed_sections.pop(key, None)
+            for key in removed:
+                self._section_versions.pop(key, None)
+                self._removed_sections[key] = self._version
+            logger.debug('Page cache version {}: {} sections changed, {} removed'.format(self._version, len(changed), len(removed)))
+
+        payload['version'] = self._version
 
     def get_valid(self):
         return self._valid
@@ -48,48 +111,19 @@ class PageCache:
     def set_cache(self, cache):
         self._cache = cache
 
-    def set_buildToken(self, buildToken):
-        self._buildToken = buildToken
-
     def set_valid(self, valid):
+        if not valid:
+            self._invalidations += 1
         self._valid = valid
 
-    def check_buildToken(self, timing):
-        if self.get_buildToken():
-            gevent.sleep(0.001)
-            if self.get_buildToken() is True:
-                while True: # Pause this thread until calculations are completed
-                    gevent.sleep(0.25)
-                    if self.get_buildToken() is False:
-                        break
-                    elif monotonic() > self.get_buildToken() + self._CACHE_TIMEOUT:
-                        logger.warning('T%d: Timed out waiting for other cache build thread', timing['start'])
-                        self.set_buildToken(False)
-                        break
-
     def update_cache(self):
         dbg_trace_str = ""
         if logger.getEffectiveLevel() <= logging.DEBUG:  # if DEBUG msgs actually being logged
             dbg_trace_str = RHUtils.getFnTracebackMsgStr("update_cache")
             logger.debug("Entered 'update_cache()', called from: {}".format(dbg_trace_str))
             dbg_trace_str = " (called from: {})".format(dbg_trace_str)
-        if self._inUpdateCacheFlag:
-            logger.info("Waiting for previous invocation of 'update_cache()' to finish{}".format(dbg_trace_str))
-            wait_count = 0
-            while True:
-                gevent.sleep(0.05)
-                if not self._inUpdateCacheFlag:
-                    logger.info("Previous invocation of 'update_cache()' finished; continuing{}".format(dbg_trace_str))
-                    break
-                wait_count += 1
-                if wait_count > 6000:
-                    logger.error("Timeout waiting for previous invocation of 'update_cache()' to finish{}".format(dbg_trace_str))
-                    break
-        self._inUpdateCacheFlag = True
-        try:
-            uc_result = self._do_update_cache()
-        finally:
-            self._inUpdateCacheFlag = False
+        # concurrent requests share one build
+        uc_result = self._builds.run('results', self._do_update_cache)
         if logger.getEffectiveLevel() <= logging.DEBUG:  # if DEBUG msgs actually being logged
             logger.debug("Exiting 'update_cache()'{}".format(dbg_trace_str))
         return uc_result
@@ -104,14 +138,12 @@ class PageCache:
         error_flag = False
         results = None
 
-        self.check_buildToken(timing) # Don't restart calculation if another calculation thread exists
-
         if self.get_valid(): # Output existing calculated results
             logger.info('T%d: Returning valid cache', timing['start'])
 
         else:
             timing['build_start'] = monotonic()
-            self.set_buildToken(monotonic())
+            invalidations = self._invalidations
 
             heats = {}
             all_heats = self._racecontext.rhdata.get_heats()
@@ -219,13 +251,16 @@ class PageCache:
                 'consecutives_count': self._racecontext.rhdata.get_optionInt('consecutivesCount', 3)
             }
 
+            self._update_versions(payload)
             self.set_cache(payload)
-            self.set_buildToken(False)
 
             if error_flag:
                 logger.warning('T%d: Cache results build failed; leaving page cache invalid', timing['start'])
                 # *** emit_priority_message(__("Results did not load completely. Please try again."), False)
                 self._Events.trigger(Evt.CACHE_FAIL)
+            elif invalidations != self._invalidations:
+                logger.info('T%d: Results changed during build; leaving page cache invalid', timing['start'])
+                self._Events.trigger(Evt.CACHE_READY)
             else:
                 self.set_valid(True)
                 self._Events.trigger(Evt.CACHE_READY)
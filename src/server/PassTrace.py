@@ -0,0 +1,144 @@
+'''
+Pass Trace
+
+Opt-in timing trace of pass records through the pass-record pipeline, from
+the interface read of node data to the win-condition check. Each stage of a
+traced pass is stamped with the monotonic time it was reached, and the last
+GENERAL.PASS_TRACE_SIZE passes that recorded a lap are kept in a ring buffer
+(a size of 0 disables tracing).
+
+Stage durations are measured from the previous stamped stage, so delays can be
+attributed to interface I/O, the pass-record queue, lap handling and results
+building, or the emits and callouts that follow.
+
+'''
+
+import logging
+from collections import deque
+from time import monotonic
+from eventmanager import Evt
+
+logger = logging.getLogger(__name__)
+
+class PassStage:
+    READ = 'read'                # interface started reading node data
+    PROCESS = 'process'          # interface started processing new laps
+    CALLBACK = 'callback'        # pass record queued by server callback
+    ADD_LAP = 'add_lap'          # pass record processing started
+    RECORDED = 'recorded'        # lap added and lap-recorded event triggered (results built)
+    LEADERBOARD = 'leaderboard'  # current laps and leaderboard emitted
+    CALLOUT = 'callout'          # lap callout emitted
+    WIN_CHECK = 'win_check'      # win condition checked
+
+PASS_TRACE_STAGES = (PassStage.READ, PassStage.PROCESS, PassStage.CALLBACK, PassStage.ADD_LAP,
+                     PassStage.RECORDED, PassStage.LEADERBOARD, PassStage.CALLOUT, PassStage.WIN_CHECK)
+
+PASS_TRACE_PERCENTILES = (50, 90, 99)
+
+def percentile(sorted_values, pct):
+    '''Nearest-rank percentile of the given sorted values'''
+    if not sorted_values:
+        return None
+    rank = max(int(-(-pct * len(sorted_values) // 100)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(values):
+    values = sorted(values)
+    summary = {'count': len(values)}
+    for pct in PASS_TRACE_PERCENTILES:
+        summary['p{}'.format(pct)] = percentile(values, pct)
+    summary['max'] = values[-1] if values else None
+    return summary
+
+class PassTrace:
+    def __init__(self, RaceContext, Events):
+        self._racecontext = RaceContext
+        self._Events = Events
+        self._passes = deque(maxlen=1)
+        self.enabled = False
+
+        self.configure(self._racecontext.serverconfig.get_item_int('GENERAL', 'PASS_TRACE_SIZE'))
+        self._Events.on(Evt.CONFIG_SET, 'pass_trace', self._on_config_set, {}, 50)
+
+    def _on_config_set(self, args):
+        if args.get('section') == 'GENERAL' and args.get('key') == 'PASS_TRACE_SIZE':
+            self.configure(self._racecontext.serverconfig.get_item_int('GENERAL', 'PASS_TRACE_SIZE'))
+
+    def configure(self, size):
+        '''Sets number of traced passes kept; 0 disables tracing'''
+        size = max(size or 0, 0)
+        self.enabled = size > 0
+        if size != self._passes.maxlen and self.enabled:
+            self._passes = deque(self._passes, maxlen=size)
+        logger.debug('Pass trace {}'.format('enabled, size={}'.format(size) if self.enabled else 'disabled'))
+
+    @property
+    def size(self):
+        return self._passes.maxlen if self.enabled else 0
+
+    def begin(self, node_index, update_times=None):
+        '''Returns new trace for a pass record (or None if tracing disabled)'''
+        if not self.enabled:
+            return None
+        stamps = {}
+        if update_times:
+            read_time, process_time = update_times
+            if read_time is not None:
+                stamps[PassStage.READ] = read_time
+            stamps[PassStage.PROCESS] = process_time
+        stamps[PassStage.CALLBACK] = monotonic()
+        return {
+            'node_index': node_index,
+            'stamps': stamps,
+        }
+
+    def stamp(self, trace, stage):
+        if trace is not None:
+            trace['stamps'][stage] = monotonic()
+
+    def record(self, trace, lap_number=None):
+        '''Adds trace to ring buffer (stages stamped later are still included)'''
+        if trace is not None and self.enabled:
+            trace['lap_number'] = lap_number
+            self._passes.append(trace)
+
+    def clear(self):
+        self._passes.clear()
+
+    def get_passes(self):
+        '''Returns traced passes (oldest first) with stage durations in milliseconds'''
+        passes = []
+        for trace in list(self._passes):
+            stamps = trace['stamps']
+            stages = {}
+            prev_time = None
+            for stage in PASS_TRACE_STAGES:
+                stage_time = stamps.get(stage)
+                if stage_time is not None:
+                    if prev_time is not None:
+                        stages[stage] = round((stage_time - prev_time) * 1000, 3)
+                    prev_time = stage_time
+            times = stamps.values()
+            passes.append({
+                'node_index': trace['node_index'],
+                'lap_number': trace.get('lap_number'),
+                'stages': stages,
+                'total': round((max(times) - min(times)) * 1000, 3),
+            })
+        return passes
+
+    def get_stats(self):
+        '''Returns percentiles of stage and total durations (milliseconds) over traced passes'''
+        passes = self.get_passes()
+        stage_values = {stage: [] for stage in PASS_TRACE_STAGES}
+        for traced in passes:
+            for stage, duration in traced['stages'].items():
+                stage_values[stage].append(duration)
+
+        return {
+            'enabled': self.enabled,
+            'size': self.size,
+            'count': len(passes),
+            'stages': {stage: summarize(values) for stage, values in stage_values.items() if values},
+            'total': summarize([traced['total'] for traced in passes]),
+        }
@@ -6,7 +6,6 @@ API_VERSION_MAJOR = 1
 API_VERSION_MINOR = 4
 
 import dataclasses
-import json
 import inspect
 import copy
 import logging
@@ -330,8 +329,8 @@ class DatabaseAPI():
         return self._racecontext.rhdata.get_heats_by_class(raceclass_id)
 
     @callWithDatabaseWrapper
-    def heat_results(self, heat_or_id):
-        return self._racecontext.rhdata.get_results_heat(heat_or_id)
+    def heat_results(self, heat_or_id, sections=None):
+        return self._racecontext.rhdata.get_results_heat(heat_or_id, sections=sections)
 
     @callWithDatabaseWrapper
     def heat_max_round(self, heat_id):
@@ -513,8 +512,8 @@ class DatabaseAPI():
             return self._racecontext.rhdata.alter_raceClass(data)
 
     @callWithDatabaseWrapper
-    def raceclass_results(self, raceclass_or_id):
-        return self._racecontext.rhdata.get_results_raceClass(raceclass_or_id)
+    def raceclass_results(self, raceclass_or_id, sections=None):
+        return self._racecontext.rhdata.get_results_raceClass(raceclass_or_id, sections=sections)
 
     @callWithDatabaseWrapper
     def raceclass_ranking(self, raceclass_or_id):
@@ -638,6 +637,10 @@ class DatabaseAPI():
     def frequencyset_by_id(self, set_id):
         return self._racecontext.rhdata.get_profile(set_id)
 
+    @callWithDatabaseWrapper
+    def frequencyset_view(self, set_or_id):
+        return self._racecontext.rhdata.get_profile_view(set_or_id)
+
     @callWithDatabaseWrapper
     def frequencyset_add(self, name=None, description=None, frequencies=None, enter_ats=None, exit_ats=None):
         data = {}
@@ -685,7 +688,7 @@ class DatabaseAPI():
 
             if set_id == self._racecontext.race.profile.id:
                 self._racecontext.race.profile = result
-                freqs = json.loads(result.frequencies)
+                freqs = self._racecontext.rhdata.get_profile_view(result).frequencies
                 for idx, value in enumerate(freqs['f']):
                     if idx < self._racecontext.race.num_nodes:
                         self._racecontext.interface.set_frequency(idx, value, freqs['b'][idx], freqs['c'][idx])
@@ -771,8 +774,8 @@ class DatabaseAPI():
                 self._racecontext.rhdata.alter_savedRaceMeta(race_id, data)
 
     @callWithDatabaseWrapper
-    def race_results(self, race_or_id):
-        return self._racecontext.rhdata.get_results_savedRaceMeta(race_or_id)
+    def race_results(self, race_or_id, sections=None):
+        return self._racecontext.rhdata.get_results_savedRaceMeta(race_or_id, sections=sections)
 
     @callWithDatabaseWrapper
     def races_clear(self):
@@ -793,6 +796,10 @@ class DatabaseAPI():
     def pilotruns_by_race(self, race_id):
         return self._racecontext.rhdata.get_savedPilotRaces_by_savedRaceMeta(race_id)
 
+    @callWithDatabaseWrapper
+    def pilotrun_history(self, run_or_id):
+        return self._racecontext.rhdata.get_savedPilotRace_history(run_or_id)
+
     def pilotrun_add(self, race_id, node_index, pilot_id, history_values, history_times, enter_at, exit_at, frequency, laps, marshal_type=None):
         data = {}
 
@@ -897,8 +904,8 @@ class DatabaseAPI():
     # Event
 
     @callWithDatabaseWrapper
-    def event_results(self):
-        return self._racecontext.rhdata.get_results_event()
+    def event_results(self, sections=None):
+        return self._racecontext.rhdata.get_results_event(sections=sections)
 
 
 #
@@ -1275,7 +1282,7 @@ class HardwareInterfaceAPI():
 
     @property
     def seats(self):
-        return self._racecontext.interface.nodes
+        return list(self._racecontext.interface.nodes)
 
     def add(self, interface):
         return self._racecontext.interface.add_interface(interface, InterfaceType.RHAPI)
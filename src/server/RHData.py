@@ -7,6 +7,8 @@ import logging
 logger = logging.getLogger(__name__)
 
 import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 from sqlalchemy import create_engine, MetaData, Table, inspect
 from sqlalchemy.exc import NoSuchTableError
 from datetime import datetime
@@ -16,10 +18,19 @@ import shutil
 import json
 import glob
 import numbers
+from array import array
+import itertools
+from dataclasses import dataclass
+from types import MappingProxyType
+import gevent
 import RHUtils
+from RHUtils import catchLogExceptionsWrapper
 import Database
 import Results
+from ResultsCache import ResultsCacheGraph, CacheNode, RESULTS_FORMAT_VERSION, RESULTS_WHOLE_SECTION, \
+    pack_results_section, unpack_results_section
 from time import monotonic
+from util.RssiHistoryPack import pack_history, unpack_history
 from eventmanager import Evt
 from filtermanager import Flt
 from RHRace import RaceStatus, WinCondition, RacingMode, StagingTones
@@ -30,6 +41,33 @@ APP.app_context().push()
 
 Position_place_strings = None
 
+OPTIONS_WRITE_DELAY = 0.5 # seconds that option writes are held to be combined into one transaction
+
+@dataclass(frozen=True)
+class ProfileView:
+    '''Parsed, read-only copy of a frequency set (Profiles) record'''
+    id: int
+    frequencies: MappingProxyType # 'b', 'c' and 'f' tuples, by seat
+    enter_ats: tuple
+    exit_ats: tuple
+
+    @classmethod
+    def from_profile(cls, profile):
+        freqs = json.loads(profile.frequencies) if profile.frequencies else {}
+        return cls(
+            id=profile.id,
+            frequencies=MappingProxyType({key: tuple(freqs.get(key, [])) for key in ('b', 'c', 'f')}),
+            enter_ats=tuple(json.loads(profile.enter_ats)['v']) if profile.enter_ats else (),
+            exit_ats=tuple(json.loads(profile.exit_ats)['v']) if profile.exit_ats else ()
+        )
+
+@dataclass(frozen=True)
+class PilotView:
+    '''Read-only copy of the pilot fields used when recording passes'''
+    id: int
+    callsign: str
+    team: str
+
 class RHData():
     _OptionsCache = {} # Local Python cache for global settings
     TEAM_NAMES_LIST = [str(chr(i)) for i in range(65, 91)]  # list of 'A' to 'Z' strings
@@ -41,6 +79,15 @@ class RHData():
         self._DB_FILE_NAME = DB_FILE_NAME
         self._DB_BKP_DIR_NAME = DB_BKP_DIR_NAME
         self._filters = RaceContext.filters
+        self._results_cache = ResultsCacheGraph(self._get_results_dependents)
+        self._profile_views = {} # profile id -> (source strings, ProfileView)
+        self._heat_seats = {} # heat id -> read-only map of node index -> pilot id
+        self._pilot_views = {} # pilot id -> PilotView (None if pilot does not exist)
+        event.listen(Session, 'after_flush', self._on_db_flush)
+        self._pending_options = {} # option name -> value not yet written to database
+        self._options_flush_greenlet = None
+        self._Events.on(Evt.SHUTDOWN, 'rhdata_options', self._on_shutdown, {}, 50)
+        self._Events.on(Evt.LAPS_SAVE, 'rhdata_checkpoint', self._on_laps_save)
 
     def __(self, *args, **kwargs):
         return self._racecontext.language.__(*args, **kwargs)
@@ -48,6 +95,11 @@ class RHData():
     # Integrity Checking
     def check_integrity(self):
         try:
+            self.flush_options()
+            problems = Database.check_database_integrity()
+            if problems:
+                logger.warning('Database integrity check failed; recovering database; err: ' + '; '.join(problems[:10]))
+                return False
             if self.get_optionInt('server_api') < self._SERVER_API:
                 logger.info('Old server API version; recovering database')
                 return False
@@ -66,33 +118,47 @@ class RHData():
                 logger.warning('Database API version ({}) is newer than server version ({})'.\
                                format(self.get_optionInt('server_api'), self._SERVER_API))
 
-            found_binary_result = False
-            for heat in Database.Heat.query.all():
-                if not isinstance(heat.results, str) and not isinstance(heat.results, dict):
-                    found_binary_result = True
-                    break
-            if not found_binary_result:
-                for race_class in Database.RaceClass.query.all():
-                    if not isinstance(race_class.results, str) and not isinstance(heat.results, dict):
-                        found_binary_result = True
-                        break
-            if not found_binary_result:
-                for race in Database.SavedRaceMeta.query.all():
-                    if not isinstance(race.results, str) and not isinstance(heat.results, dict):
-                        found_binary_result = True
-                        break
-
-            if found_binary_result:
-                logger.warning('Results are not a string or dict; wiping all saved results')
+            # results are stored in the results_cache table; drop any left in legacy columns
+            if Database.Heat.query.filter(Database.Heat.results.isnot(None)).first() or \
+                Database.RaceClass.query.filter(Database.RaceClass.results.isnot(None)).first() or \
+                Database.RaceClass.query.filter(Database.RaceClass.ranking.isnot(None)).first() or \
+                Database.SavedRaceMeta.query.filter(Database.SavedRaceMeta.results.isnot(None)).first() or \
+                Database.GlobalSettings.query.filter_by(option_name="eventResults") \
+                    .filter(Database.GlobalSettings.option_value.isnot(None)).first():
+                logger.info('Found results in legacy cache storage; wiping all saved results')
                 self.clear_results_all()
 
+            self.create_missing_indexes()
             return True
         except Exception as ex:
             logger.error('Error checking database integrity; err: ' + str(ex))
             return False
 
+    def checkpoint_database(self):
+        '''Copies committed writes from the WAL into the database file'''
+        try:
+            result = Database.checkpoint_database()
+            if result:
+                logger.debug('Database checkpoint: busy={}, wal_pages={}, checkpointed={}'.format(*result))
+        except Exception as ex:
+            logger.warning('Unable to checkpoint database: ' + str(ex))
+
+    def _on_laps_save(self, _args):
+        # saved races are durable once checkpointed, without syncing every commit
+        self.checkpoint_database()
+
+    def create_missing_indexes(self):
+        '''Adds indexes declared in Database models but missing from the database'''
+        try:
+            created = Database.create_db_indexes()
+            if created:
+                logger.info('Added database indexes: {}'.format(', '.join(created)))
+        except Exception as ex:
+            logger.warning('Unable to add database indexes: ' + str(ex))
+
     # Caching
     def primeCache(self):
+        self.flush_options()
         settings = Database.GlobalSettings.query.all()
         self._OptionsCache = {} # empty cache
         for setting in settings:
@@ -149,6 +215,7 @@ class RHData():
 
     def close(self):
         try:
+            self.flush_options()
             Database.DB_session.close()
             return True
         except Exception as ex:
@@ -524,6 +591,11 @@ class RHData():
                     if raceLap['pilot_id'] == 0:
                         raceLap['pilot_id'] = None
 
+            # Pack RSSI history stored as JSON
+            if migrate_db_api < 50 and racePilot_query_data:
+                for racePilot in racePilot_query_data:
+                    racePilot.update(self.migrate_savedPilotRace_history(racePilot))
+
             recover_status['stage_0'] = True
         except Exception as ex:
             logger.warning('Error reading data from previous database (stage 0):  ' + str(ex))
@@ -533,6 +605,7 @@ class RHData():
             self.backup_db_file(False)  # rename and move DB file
 
         self.db_init(nofill=True, migrateDbApi=migrate_db_api)
+        self.create_missing_indexes()  # tables kept from an existing database may predate newer indexes
 
         # stage 1: recover pilots, format, class, heats + heatnodes, profile, options
         if recover_status['stage_0'] == True:
@@ -792,6 +865,7 @@ class RHData():
                         self.restore_table(Database.SavedPilotRace, racePilot_query_data, defaults={
                             'history_values': None,
                             'history_times': None,
+                            'history_data': None,
                             'penalty_time': None,
                             'penalty_desc': None,
                             'enter_at': None,
@@ -973,24 +1047,18 @@ class RHData():
         if 'callsign' in data or 'team_name' in data:
             heatnodes = Database.HeatNode.query.filter_by(pilot_id=pilot_id).all()
             if heatnodes:
+                cache_keys = []
                 for heatnode in heatnodes:
-                    heat = self.get_heat(heatnode.heat_id)
-                    self.clear_results_heat(heat)
-
-                    if heat.class_id != RHUtils.CLASS_ID_NONE:
-                        self.clear_results_raceClass(heat.class_id)
+                    cache_keys.append((CacheNode.HEAT, heatnode.heat_id))
 
                     for race in Database.SavedRaceMeta.query.filter_by(heat_id=heatnode.heat_id).all():
                         race_list.append(race)
+                        cache_keys.append((CacheNode.RACE, race.id))
+
+                self.invalidate_results(*cache_keys)
 
             if len(race_list):
                 self._racecontext.pagecache.set_valid(False)
-                self.clear_results_event()
-
-                for race in race_list:
-                    self.clear_results_savedRaceMeta(race)
-
-                self.commit()
 
         return pilot, race_list
 
@@ -1062,6 +1130,7 @@ class RHData():
         Database.DB_session.query(Database.PilotAttribute).delete()
         Database.DB_session.query(Database.Pilot).delete()
         self.commit()
+        self.clear_seat_caches()
 
     def reset_pilots(self):
         self.clear_pilots()
@@ -1338,42 +1407,27 @@ class RHData():
 
         # update source names:
         if 'name' in data:
-            if heat.results:
-                self._racecontext.pagecache.set_valid(False)
-                new_result = Results.refresh_source_displayname(self._racecontext, heat.results, heat.id)
-                heat.results = None
-                Database.DB_session.flush()
-                heat.results = new_result
+            self._refresh_results_source_names((CacheNode.HEAT, heat.id), heat.id)
 
         if 'name' in data and not 'class' in data:
             if heat.class_id != RHUtils.CLASS_ID_NONE:
-                race_class = Database.RaceClass.query.get(heat.class_id)
-                if race_class.results:
-                    self._racecontext.pagecache.set_valid(False)
-                    new_result = Results.refresh_source_displayname(self._racecontext, race_class.results, heat.id)
-                    race_class.results = None
-                    Database.DB_session.flush()
-                    race_class.results = new_result
+                self._refresh_results_source_names((CacheNode.CLASS, heat.class_id), heat.id)
 
         if 'name' in data and not ('pilot' in data or 'class' in data):
-            try:
-                event_results = json.loads(self.get_option("eventResults"))
-                self._racecontext.pagecache.set_valid(False)
-                event_results = Results.refresh_source_displayname(self._racecontext, event_results, heat.id)
-                self.set_option("eventResults", json.dumps(event_results))
-            except:
-                pass
+            self._refresh_results_source_names((CacheNode.EVENT, None), heat.id)
 
         # alter existing saved races:
         race_list = Database.SavedRaceMeta.query.filter_by(heat_id=heat_id).all()
 
+        cache_keys = []
         if 'class' in data:
             if len(race_list):
                 for race_meta in race_list:
                     race_meta.class_id = data['class']
 
                 if old_class_id and old_class_id is not RHUtils.CLASS_ID_NONE:
-                    self.clear_results_raceClass(old_class_id)
+                    cache_keys.append((CacheNode.CLASS, old_class_id))
+                cache_keys.append((CacheNode.HEAT, heat.id))
 
         if 'pilot' in data:
             if len(race_list):
@@ -1385,17 +1439,12 @@ class RHData():
                         if race_lap.node_index == slot.node_index:
                             race_lap.pilot_id = data['pilot']
 
-                    self.clear_results_savedRaceMeta(race_meta)
-
-                self.clear_results_heat(heat)
+                    cache_keys.append((CacheNode.RACE, race_meta.id))
 
-        if 'pilot' in data or 'class' in data:
-            if len(race_list):
-                if heat.class_id is not RHUtils.CLASS_ID_NONE:
-                    self.clear_results_raceClass(heat.class_id)
-
-                self.clear_results_event()
-                self._racecontext.pagecache.set_valid(False)
+        if len(cache_keys):
+            # invalidates dependent heat, class and event results
+            self.invalidate_results(*cache_keys)
+            self._racecontext.pagecache.set_valid(False)
 
         if 'heat_attr' in data and 'value' in data:
             data['heat_attr'] = self._filters.run_filters(Flt.HEAT_ALTER_ATTRIBUTE, data['heat_attr'], {
@@ -1483,7 +1532,8 @@ class RHData():
                             heat_attributes = Database.HeatAttribute.query.filter_by(id=heat.id).all()
 
                             if not self.savedRaceMetas_has_heat(heat.id):
-                                logger.info("Adjusting single remaining heat ({0}) to ID 1".format(heat.id))
+                                remaining_heat_id = heat.id
+                                logger.info("Adjusting single remaining heat ({0}) to ID 1".format(remaining_heat_id))
                                 heat.id = 1
                                 for heatnode in heatnodes:
                                     heatnode.heat_id = heat.id
@@ -1491,9 +1541,12 @@ class RHData():
                                 for attribute in heat_attributes:
                                     attribute.id = heat.id
 
-                                # self.commit()  # 'set_option()' below will do call to 'commit()'
-                                self._racecontext.race.current_heat = 1
-                                self.set_option('currentHeat', self._racecontext.race.current_heat)
+                                if self.commit():
+                                    self._racecontext.race.current_heat = 1
+                                    self.set_option('currentHeat', self._racecontext.race.current_heat)
+                                else:
+                                    self.rollback()
+                                    logger.warning("Unable to adjust single remaining heat ({0}) to ID 1".format(remaining_heat_id))
                             else:
                                 logger.warning("Not changing single remaining heat ID ({0}): is in use".format(heat.id))
                     except Exception as ex:
@@ -1661,7 +1714,7 @@ class RHData():
 
         self.commit()
 
-    def get_results_heat(self, heat_or_id):
+    def get_results_heat(self, heat_or_id, sections=None, no_rebuild_flag=False):
         heat = self.resolve_heat_from_heat_or_id(heat_or_id)
 
         if not heat:
@@ -1671,31 +1724,29 @@ class RHData():
             # no races exist, skip calculating
             return None
 
-        cache_invalid = False
-        if heat._cache_status:
-            try:
-                cacheStatus = json.loads(heat._cache_status)
-                token = cacheStatus['data_ver']
-                if cacheStatus['data_ver'] == cacheStatus['build_ver']:
+        cacheStatus = self._results_cache.status((CacheNode.HEAT, heat.id), heat._cache_status)
+        if cacheStatus:
+            token = cacheStatus['data_ver']
+            if self._results_cache.is_valid(cacheStatus):
+                results = self._load_results((CacheNode.HEAT, heat.id), sections)
+                if results is not self._RESULTS_MISSING:
                     # cache hit
-                    return heat.results
-                # else: cache miss
-            except ValueError:
-                cache_invalid = True
+                    return results
+            # else: cache miss
         else:
-            cache_invalid = True
-
-        if cache_invalid:
             logger.error('Heat {} cache has invalid status'.format(heat.id))
             token = monotonic()
             self.clear_results_heat(heat, token)
 
+        if no_rebuild_flag:
+            return None
+
         # cache rebuild
         logger.debug('Building Heat {} results'.format(heat.id))
         build = Results.build_leaderboard_heat(self._racecontext, heat)
 
         self.set_results_heat(heat, token, build)
-        return build
+        return self._select_results_sections(build, sections)
 
     def set_results_heat(self, heat_or_id, token, results):
         heat = self.resolve_heat_from_heat_or_id(heat_or_id)
@@ -1703,32 +1754,28 @@ class RHData():
         if not heat:
             return False
 
-        cacheStatus = json.loads(heat._cache_status)
-        if cacheStatus['data_ver'] == token:
-            cacheStatus['build_ver'] = token
-            heat.results = results
-            heat._cache_status = json.dumps(cacheStatus)
+        cacheStatus = self._results_cache.mark_built((CacheNode.HEAT, heat.id), heat._cache_status, token)
+        if cacheStatus:
+            self._store_results((CacheNode.HEAT, heat.id), results)
+            heat._cache_status = cacheStatus
 
             self.commit()
             return heat
         else:
-            logger.info('Ignoring cache write; token mismatch {} / {}'.format(cacheStatus['data_ver'], token))
             return False
 
-    def clear_results_heat(self, heat_or_id, token=None):
+    def clear_results_heat(self, heat_or_id, token=None, cascade=False):
         heat = self.resolve_heat_from_heat_or_id(heat_or_id)
 
         if not heat:
             return False
 
-        if token is None:
-            token = monotonic()
+        if cascade:
+            self.invalidate_results((CacheNode.HEAT, heat.id), token=token)
+            return heat
 
-        heat._cache_status = json.dumps({
-            'data_ver': token,
-            'build_ver': None
-        })
-        heat.results = None
+        heat._cache_status = self._results_cache.mark_dirty((CacheNode.HEAT, heat.id), token)
+        self._delete_results((CacheNode.HEAT, heat.id))
 
         self.commit()
         return heat
@@ -1745,13 +1792,16 @@ class RHData():
             Database.Heat._cache_status: initStatus,
             Database.Heat.results: None
             })
+        self._delete_results_by_type(CacheNode.HEAT)
         self.commit()
 
     def clear_heats(self):
         Database.DB_session.query(Database.HeatAttribute).delete()
         Database.DB_session.query(Database.HeatNode).delete()
         Database.DB_session.query(Database.Heat).delete()
+        self._delete_results_by_type(CacheNode.HEAT)
         self.commit()
+        self.clear_seat_caches()
 
     def reset_heats(self, nofill=False):
         self.clear_heats()
@@ -1822,11 +1872,37 @@ class RHData():
         return True
 
     def get_pilot_from_heatNode(self, heat_id, node_index):
-        heatNode = Database.HeatNode.query.filter_by(heat_id=heat_id, node_index=node_index).one_or_none()
-        if heatNode:
-            return heatNode.pilot_id
-        else:
+        return self.get_heat_seats(heat_id).get(node_index)
+
+    def get_heat_seats(self, heat_id):
+        '''Returns read-only map of node index -> pilot id for heat; cached until heat slots change'''
+        seats = self._heat_seats.get(heat_id)
+        if seats is None:
+            seats = MappingProxyType({heatNode.node_index: heatNode.pilot_id \
+                for heatNode in Database.HeatNode.query.filter_by(heat_id=heat_id) if heatNode.node_index is not None})
+            self._heat_seats[heat_id] = seats
+        return seats
+
+    def get_pilot_view(self, pilot_id):
+        '''Returns cached PilotView for pilot, or None if pilot does not exist'''
+        if pilot_id is None:
             return None
+        if pilot_id not in self._pilot_views:
+            pilot = Database.Pilot.query.get(pilot_id)
+            self._pilot_views[pilot_id] = PilotView(pilot.id, pilot.callsign, pilot.team) if pilot else None
+        return self._pilot_views[pilot_id]
+
+    def clear_seat_caches(self):
+        self._heat_seats = {}
+        self._pilot_views = {}
+
+    def _on_db_flush(self, session, _flush_context):
+        # pre-flush state is still available here; drop seat caches if heat slots or pilots were written
+        if self._heat_seats or self._pilot_views:
+            for obj in itertools.chain(session.new, session.dirty, session.deleted):
+                if isinstance(obj, (Database.HeatNode, Database.Pilot)):
+                    self.clear_seat_caches()
+                    return
 
     def alter_heatNodes_fast(self, slot_list):
         # Alters heatNodes quickly, in batch
@@ -2084,18 +2160,25 @@ class RHData():
            'rank_settings' in data:
             if len(race_list):
                 self._racecontext.pagecache.set_valid(False)
-                self.clear_results_event()
-                self.clear_results_raceClass(race_class)
+
+                if 'class_format' in data or 'win_condition' in data:
+                    self.clear_results_raceClass(race_class, cascade=True)
+                else:
+                    # only class ranking depends on rank settings
+                    self.clear_ranking_raceClass(race_class)
 
             if 'class_format' in data:
                 if int(data['class_format'] or 0):
+                    cache_keys = []
                     for race_meta in race_list:
                         race_meta.format_id = data['class_format']
-                        self.clear_results_savedRaceMeta(race_meta)
+                        cache_keys.append((CacheNode.RACE, race_meta.id))
 
                     heats = Database.Heat.query.filter_by(class_id=race_class_id).all()
                     for heat in heats:
-                        self.clear_results_heat(heat)
+                        cache_keys.append((CacheNode.HEAT, heat.id))
+
+                    self.invalidate_results(*cache_keys)
 
         if 'class_attr' in data and 'value' in data:
             data['class_attr'] = self._filters.run_filters(Flt.CLASS_ALTER_ATTRIBUTE, data['class_attr'], {
@@ -2154,7 +2237,7 @@ class RHData():
 
             return True
 
-    def get_results_raceClass(self, raceClass_or_id):
+    def get_results_raceClass(self, raceClass_or_id, sections=None, no_rebuild_flag=False):
         race_class = self.resolve_raceClass_from_raceClass_or_id(raceClass_or_id)
 
         if not race_class:
@@ -2164,30 +2247,28 @@ class RHData():
             # no races exist, skip calculating
             return None
 
-        cache_invalid = False
-        if race_class._cache_status:
-            try:
-                cacheStatus = json.loads(race_class._cache_status)
-                token = cacheStatus['data_ver']
-                if cacheStatus['data_ver'] == cacheStatus['build_ver']:
+        cacheStatus = self._results_cache.status((CacheNode.CLASS, race_class.id), race_class._cache_status)
+        if cacheStatus:
+            token = cacheStatus['data_ver']
+            if self._results_cache.is_valid(cacheStatus):
+                results = self._load_results((CacheNode.CLASS, race_class.id), sections)
+                if results is not self._RESULTS_MISSING:
                     # cache hit
-                    return race_class.results
-                # else: cache miss
-            except ValueError:
-                cache_invalid = True
+                    return results
+            # else: cache miss
         else:
-            cache_invalid = True
-
-        if cache_invalid:
             logger.error('Class {} cache has invalid status'.format(race_class.id))
             token = monotonic()
             self.clear_results_raceClass(race_class, token)
 
+        if no_rebuild_flag:
+            return None
+
         # cache rebuild
         logger.info('Building Class {} (id: {}) results'.format(race_class.display_name, race_class.id))
         build = Results.build_leaderboard_class(self._racecontext, race_class)
         self.set_results_raceClass(race_class, token, build)
-        return build
+        return self._select_results_sections(build, sections)
 
     def get_ranking_raceClass(self, raceClass_or_id):
         race_class = self.resolve_raceClass_from_raceClass_or_id(raceClass_or_id)
@@ -2199,21 +2280,16 @@ class RHData():
             # no races exist, skip calculating
             return None
 
-        cache_invalid = False
-        if race_class._rank_status:
-            try:
-                rankStatus = json.loads(race_class._rank_status)
-                token = rankStatus['data_ver']
-                if rankStatus['data_ver'] == rankStatus['build_ver']:
+        rankStatus = self._results_cache.status((CacheNode.RANKING, race_class.id), race_class._rank_status)
+        if rankStatus:
+            token = rankStatus['data_ver']
+            if self._results_cache.is_valid(rankStatus):
+                results = self._load_results((CacheNode.RANKING, race_class.id))
+                if results is not self._RESULTS_MISSING:
                     # cache hit
-                    return race_class.ranking
-                # else: cache miss
-            except ValueError:
-                cache_invalid = True
+                    return results
+            # else: cache miss
         else:
-            cache_invalid = True
-
-        if cache_invalid:
             logger.error('Class {} ranking has invalid status'.format(race_class.id))
             token = monotonic()
             self.clear_ranking_raceClass(race_class.id, token)
@@ -2230,20 +2306,14 @@ class RHData():
         if not race_class:
             return False
 
-        if race_class._cache_status:
-            cacheStatus = json.loads(race_class._cache_status)
-            if cacheStatus['data_ver'] == token:
-                cacheStatus['build_ver'] = token
-                race_class.results = results
-                race_class._cache_status = json.dumps(cacheStatus)
+        cacheStatus = self._results_cache.mark_built((CacheNode.CLASS, race_class.id), race_class._cache_status, token)
+        if cacheStatus:
+            self._store_results((CacheNode.CLASS, race_class.id), results)
+            race_class._cache_status = cacheStatus
 
-                self.commit()
-                return race_class
-            else:
-                logger.info('Ignoring cache write; token mismatch {} / {}'.format(cacheStatus['data_ver'], token))
-                return False
+            self.commit()
+            return race_class
         else:
-            logger.error('Ignoring cache write for class {}: status is invalid'.format(race_class.id))
             return False
 
     def set_ranking_raceClass(self, raceClass_or_id, token, results):
@@ -2252,39 +2322,33 @@ class RHData():
         if not race_class:
             return False
 
-        if race_class._rank_status:
-            rankStatus = json.loads(race_class._rank_status)
-            if rankStatus['data_ver'] == token:
-                rankStatus['build_ver'] = token
-                race_class.ranking = results
-                race_class._rank_status = json.dumps(rankStatus)
+        rankStatus = self._results_cache.mark_built((CacheNode.RANKING, race_class.id), race_class._rank_status, token)
+        if rankStatus:
+            self._store_results((CacheNode.RANKING, race_class.id), results)
+            race_class._rank_status = rankStatus
 
-                self.commit()
-                return race_class
-            else:
-                logger.info('Ignoring ranking write; token mismatch {} / {}'.format(rankStatus['data_ver'], token))
-                return False
+            self.commit()
+            return race_class
         else:
-            logger.error('Ignoring ranking write for class {}: status is invalid'.format(race_class.id))
             return False
 
-    def clear_results_raceClass(self, raceClass_or_id, token=None):
+    def clear_results_raceClass(self, raceClass_or_id, token=None, cascade=False):
         race_class = self.resolve_raceClass_from_raceClass_or_id(raceClass_or_id)
 
         if not race_class:
             return False
 
+        if cascade:
+            self.invalidate_results((CacheNode.CLASS, race_class.id), token=token)
+            return race_class
+
         if token is None:
             token = monotonic()
 
-        initStatus = {
-            'data_ver': token,
-            'build_ver': None
-        }
-        jsonStatus = json.dumps(initStatus)
-        race_class._cache_status = jsonStatus
-        race_class._rank_status = jsonStatus
-        race_class.result = None
+        race_class._cache_status = self._results_cache.mark_dirty((CacheNode.CLASS, race_class.id), token)
+        race_class._rank_status = self._results_cache.mark_dirty((CacheNode.RANKING, race_class.id), token)
+        self._delete_results((CacheNode.CLASS, race_class.id))
+        self._delete_results((CacheNode.RANKING, race_class.id))
 
         self.commit()
         return race_class
@@ -2295,14 +2359,8 @@ class RHData():
         if not race_class:
             return False
 
-        if token is None:
-            token = monotonic()
-
-        initStatus = json.dumps({
-            'data_ver': token,
-            'build_ver': None
-        })
-        race_class._rank_status = initStatus
+        race_class._rank_status = self._results_cache.mark_dirty((CacheNode.RANKING, race_class.id), token)
+        self._delete_results((CacheNode.RANKING, race_class.id))
 
         self.commit()
         return race_class
@@ -2319,13 +2377,18 @@ class RHData():
         Database.RaceClass.query.update({
             Database.RaceClass._cache_status: jsonStatus,
             Database.RaceClass._rank_status: jsonStatus,
-            Database.RaceClass.results: None
+            Database.RaceClass.results: None,
+            Database.RaceClass.ranking: None
             })
+        self._delete_results_by_type(CacheNode.CLASS)
+        self._delete_results_by_type(CacheNode.RANKING)
         self.commit()
 
     def clear_raceClasses(self):
         Database.DB_session.query(Database.RaceClassAttribute).delete()
         Database.DB_session.query(Database.RaceClass).delete()
+        self._delete_results_by_type(CacheNode.CLASS)
+        self._delete_results_by_type(CacheNode.RANKING)
         self.commit()
         return True
 
@@ -2418,6 +2481,22 @@ class RHData():
     def get_first_profile(self):
         return Database.Profiles.query.first()
 
+    def get_profile_view(self, profile_or_id):
+        '''Returns parsed frequency set data; reparsed only when the stored values change'''
+        profile = self.resolve_profile_from_profile_or_id(profile_or_id)
+
+        if not profile:
+            return None
+
+        source = (profile.frequencies, profile.enter_ats, profile.exit_ats)
+        cached = self._profile_views.get(profile.id)
+        if cached and cached[0] == source:
+            return cached[1]
+
+        view = ProfileView.from_profile(profile)
+        self._profile_views[profile.id] = (source, view)
+        return view
+
     def add_profile(self, init=None):
         new_profile = Database.Profiles(
             name='',
@@ -2517,6 +2596,7 @@ class RHData():
                 freqs["f"].append(RHUtils.FREQUENCY_ID_NONE)
             profile.frequencies = json.dumps(freqs)
 
+        self._profile_views.pop(profile.id, None)
         return profile
 
     def delete_profile(self, profile_or_id):
@@ -2525,6 +2605,7 @@ class RHData():
             deleted_profile_id = profile.id
             Database.DB_session.delete(profile)
             self.commit()
+            self._profile_views.pop(deleted_profile_id, None)
 
             self._Events.trigger(Evt.PROFILE_DELETE, {
                 'profile_id': deleted_profile_id,
@@ -2538,6 +2619,7 @@ class RHData():
     def clear_profiles(self):
         Database.DB_session.query(Database.Profiles).delete()
         self.commit()
+        self._profile_views = {}
         return True
 
     def reset_profiles(self):
@@ -2760,22 +2842,21 @@ class RHData():
 
             if len(race_list):
                 self._racecontext.pagecache.set_valid(False)
-                self.clear_results_event()
 
-                for race in race_list:
-                    self.clear_results_savedRaceMeta(race)
+                # invalidates dependent heat, class and event results
+                cache_keys = [(CacheNode.RACE, race.id) for race in race_list]
 
                 classes = Database.RaceClass.query.filter_by(format_id=race_format.id).all()
 
                 for race_class in classes:
-                    self.clear_results_raceClass(race_class)
+                    cache_keys.append((CacheNode.CLASS, race_class.id))
 
                     heats = Database.Heat.query.filter_by(class_id=race_class.id).all()
 
                     for heat in heats:
-                        self.clear_results_heat(heat)
+                        cache_keys.append((CacheNode.HEAT, heat.id))
 
-                self.commit()
+                self.invalidate_results(*cache_keys)
 
         self._Events.trigger(Evt.RACE_FORMAT_ALTER, {
             'race_format': race_format.id,
@@ -3097,6 +3178,12 @@ class RHData():
     def get_savedRaceMetas_by_raceClass(self, class_id):
         return Database.SavedRaceMeta.query.filter_by(class_id=class_id).order_by(Database.SavedRaceMeta.round_id).all()
 
+    def get_last_savedRaceMeta_by_heat(self, heat_id):
+        return Database.SavedRaceMeta.query.filter_by(heat_id=heat_id).order_by(Database.SavedRaceMeta.id.desc()).first()
+
+    def get_last_savedRaceMeta_by_raceClass(self, class_id):
+        return Database.SavedRaceMeta.query.filter_by(class_id=class_id).order_by(Database.SavedRaceMeta.id.desc()).first()
+
     def savedRaceMetas_has_raceFormat(self, race_format_id):
         return bool(Database.SavedRaceMeta.query.filter_by(format_id=race_format_id).count())
 
@@ -3248,19 +3335,18 @@ class RHData():
         # cache cleaning
         self._racecontext.pagecache.set_valid(False)
 
-        self.clear_results_heat(new_heat)
-        self.clear_results_heat(old_heat)
+        cache_keys = [(CacheNode.HEAT, new_heat.id), (CacheNode.HEAT, old_heat.id)]
 
         if old_format_id != new_format_id:
-            self.clear_results_savedRaceMeta(race_meta)
+            cache_keys.append((CacheNode.RACE, race_meta.id))
 
         if old_heat.class_id != new_heat.class_id:
             if new_class:
-                self.clear_results_raceClass(new_class)
+                cache_keys.append((CacheNode.CLASS, new_class.id))
             if old_class:
-                self.clear_results_raceClass(old_class)
+                cache_keys.append((CacheNode.CLASS, old_class.id))
 
-        self.commit()
+        self.invalidate_results(*cache_keys)
 
         self._Events.trigger(Evt.RACE_ALTER, {
             'race_id': race_meta.id,
@@ -3270,27 +3356,22 @@ class RHData():
 
         return race_meta, new_heat
 
-    def get_results_savedRaceMeta(self, savedRaceMeta_or_id, no_rebuild_flag=False):
+    def get_results_savedRaceMeta(self, savedRaceMeta_or_id, no_rebuild_flag=False, sections=None):
         race = self.resolve_savedRaceMeta_from_savedRaceMeta_or_id(savedRaceMeta_or_id)
 
         if not race:
             return False
 
-        cache_invalid = False
-        if race._cache_status:
-            try:
-                cacheStatus = json.loads(race._cache_status)
-                token = cacheStatus['data_ver']
-                if cacheStatus['data_ver'] == cacheStatus['build_ver']:
+        cacheStatus = self._results_cache.status((CacheNode.RACE, race.id), race._cache_status)
+        if cacheStatus:
+            token = cacheStatus['data_ver']
+            if self._results_cache.is_valid(cacheStatus):
+                results = self._load_results((CacheNode.RACE, race.id), sections)
+                if results is not self._RESULTS_MISSING:
                     # cache hit
-                    return race.results
-                # else: cache miss
-            except ValueError:
-                cache_invalid = True
+                    return results
+            # else: cache miss
         else:
-            cache_invalid = True
-
-        if cache_invalid:
             logger.error('Race {} cache has invalid status'.format(race.id))
             token = monotonic()
             self.clear_results_savedRaceMeta(race, token)
@@ -3317,7 +3398,7 @@ class RHData():
                 build['meta']['primary_points'] = True
 
         self.set_results_savedRaceMeta(race, token, build)
-        return build
+        return self._select_results_sections(build, sections)
 
     def set_results_savedRaceMeta(self, savedRaceMeta_or_id, token, results):
         race = self.resolve_savedRaceMeta_from_savedRaceMeta_or_id(savedRaceMeta_or_id)
@@ -3325,36 +3406,28 @@ class RHData():
         if not race:
             return False
 
-        if race._cache_status:
-            cacheStatus = json.loads(race._cache_status)
-            if cacheStatus['data_ver'] == token:
-                cacheStatus['build_ver'] = token
-                race.results = results
-                race._cache_status = json.dumps(cacheStatus)
+        cacheStatus = self._results_cache.mark_built((CacheNode.RACE, race.id), race._cache_status, token)
+        if cacheStatus:
+            self._store_results((CacheNode.RACE, race.id), results)
+            race._cache_status = cacheStatus
 
-                self.commit()
-                return race
-            else:
-                logger.info('Ignoring cache write; token mismatch {} / {}'.format(cacheStatus['data_ver'], token))
-                return False
+            self.commit()
+            return race
         else:
-            logger.error('Ignoring cache write for race {}: status is invalid'.format(race.id))
             return False
 
-    def clear_results_savedRaceMeta(self, savedRaceMeta_or_id, token=None):
+    def clear_results_savedRaceMeta(self, savedRaceMeta_or_id, token=None, cascade=False):
         race = self.resolve_savedRaceMeta_from_savedRaceMeta_or_id(savedRaceMeta_or_id)
 
         if not race:
             return False
 
-        if token is None:
-            token = monotonic()
+        if cascade:
+            self.invalidate_results((CacheNode.RACE, race.id), token=token)
+            return race
 
-        race._cache_status = json.dumps({
-            'data_ver': token,
-            'build_ver': None
-        })
-        race.results = None
+        race._cache_status = self._results_cache.mark_dirty((CacheNode.RACE, race.id), token)
+        self._delete_results((CacheNode.RACE, race.id))
 
         self.commit()
         return race
@@ -3371,6 +3444,7 @@ class RHData():
             Database.SavedRaceMeta._cache_status: initStatus,
             Database.SavedRaceMeta.results: None
             })
+        self._delete_results_by_type(CacheNode.RACE)
         self.commit()
 
     def get_max_round(self, heat_id):
@@ -3409,6 +3483,12 @@ class RHData():
         return [attr.id for attr in attrs]
 
     # Pilot-Races
+    def resolve_savedPilotRace_from_savedPilotRace_or_id(self, savedPilotRace_or_id):
+        if isinstance(savedPilotRace_or_id, Database.SavedPilotRace):
+            return savedPilotRace_or_id
+        else:
+            return Database.SavedPilotRace.query.get(savedPilotRace_or_id)
+
     def get_savedPilotRace(self, pilotrace_id):
         return Database.SavedPilotRace.query.get(pilotrace_id)
 
@@ -3418,6 +3498,55 @@ class RHData():
     def get_savedPilotRaces_by_savedRaceMeta(self, race_id):
         return Database.SavedPilotRace.query.filter_by(race_id=race_id).all()
 
+    def get_savedPilotRace_by_savedRaceMeta_node(self, race_id, node_index):
+        return Database.SavedPilotRace.query.filter_by(race_id=race_id, node_index=node_index).first()
+
+    def get_last_savedPilotRace_by_node(self, node_index, frequency, pilot_id=None):
+        '''Returns most recent pilot race on node and frequency; any pilot if pilot_id is None'''
+        query = Database.SavedPilotRace.query.filter_by(node_index=node_index, frequency=frequency)
+        if pilot_id is not None:
+            query = query.filter_by(pilot_id=pilot_id)
+        return query.order_by(Database.SavedPilotRace.id.desc()).first()
+
+    def encode_savedPilotRace_history(self, values, times):
+        '''Returns SavedPilotRace column values storing RSSI history; packed if possible'''
+        packed = pack_history(values, times)
+        if packed is not None:
+            return {
+                'history_values': None,
+                'history_times': None,
+                'history_data': packed
+            }
+        # values that cannot be packed are stored as JSON
+        return {
+            'history_values': json.dumps(list(values)),
+            'history_times': json.dumps(list(times)),
+            'history_data': None
+        }
+
+    def migrate_savedPilotRace_history(self, racePilot):
+        '''Returns column values to convert legacy JSON RSSI history to packed form'''
+        try:
+            if racePilot.get('history_values') and racePilot.get('history_times'):
+                return self.encode_savedPilotRace_history(
+                    json.loads(racePilot['history_values']), json.loads(racePilot['history_times']))
+        except (TypeError, ValueError) as ex:
+            logger.warning('Unable to convert RSSI history for saved pilot race {}: {}'.format(racePilot.get('id'), ex))
+        return {}
+
+    def get_savedPilotRace_history(self, pilotrace_or_id):
+        '''Returns (values, times) of saved RSSI history as arrays'''
+        pilotrace = self.resolve_savedPilotRace_from_savedPilotRace_or_id(pilotrace_or_id)
+        if pilotrace is None:
+            return None
+        if pilotrace.history_data is not None:
+            return unpack_history(pilotrace.history_data)
+        values = json.loads(pilotrace.history_values) if pilotrace.history_values else []
+        times = json.loads(pilotrace.history_times) if pilotrace.history_times else []
+        if all(isinstance(value, int) for value in values):
+            return array('i', values), array('d', times)
+        return array('d', values), array('d', times)
+
     def alter_savedPilotRace(self, data):
         pilotrace = Database.SavedPilotRace.query.get(data['pilotrace_id'])
 
@@ -3474,8 +3603,9 @@ class RHData():
                 race_id=node_data['race_id'],
                 node_index=node_index,
                 pilot_id=node_data['pilot_id'],
-                history_values=node_data['history_values'],
-                history_times=node_data['history_times'],
+                history_values=node_data.get('history_values'),
+                history_times=node_data.get('history_times'),
+                history_data=node_data.get('history_data'),
                 penalty_time=0,
                 enter_at=node_data['enter_at'],
                 exit_at=node_data['exit_at'],
@@ -3510,6 +3640,7 @@ class RHData():
         Database.DB_session.query(Database.SavedRaceLap).delete()
         Database.DB_session.query(Database.SavedPilotRace).delete()
         Database.DB_session.query(Database.SavedRaceMeta).delete()
+        Database.DB_session.query(Database.ResultsCacheSection).delete()
         for heat in self.get_heats():
             heat.active = True
         self.commit()
@@ -3580,6 +3711,7 @@ class RHData():
 
     # Options
     def get_options(self):
+        self.flush_options()
         return Database.GlobalSettings.query.all()
 
     def option_exists(self, option):
@@ -3610,12 +3742,46 @@ class RHData():
 
         self._OptionsCache[option] = str(value)
 
-        settings = Database.GlobalSettings.query.filter_by(option_name=option).one_or_none()
-        if settings:
-            settings.option_value = value
-        else:
-            Database.DB_session.add(Database.GlobalSettings(option_name=option, option_value=value))
-        self.commit()
+        # write-behind: options are read from the cache, so database writes are batched
+        self._pending_options[option] = value
+        self._schedule_options_flush()
+
+    def _schedule_options_flush(self):
+        if self._options_flush_greenlet is None:
+            self._options_flush_greenlet = gevent.spawn_later(OPTIONS_WRITE_DELAY, self._flush_options_later)
+
+    @catchLogExceptionsWrapper
+    def _flush_options_later(self):
+        self._options_flush_greenlet = None
+        with self.get_db_session_handle():  # make sure DB session/connection is cleaned up
+            self.flush_options()
+
+    def _on_shutdown(self, _args):
+        self.flush_options()
+
+    def flush_options(self):
+        '''Writes pending option values to the database in a single transaction'''
+        if not self._pending_options:
+            return True
+        pending = self._pending_options
+        self._pending_options = {}
+
+        settings = {setting.option_name: setting for setting in \
+            Database.GlobalSettings.query.filter(Database.GlobalSettings.option_name.in_(list(pending)))}
+        for option, value in pending.items():
+            if option in settings:
+                settings[option].option_value = value
+            else:
+                Database.DB_session.add(Database.GlobalSettings(option_name=option, option_value=value))
+        if self.commit():
+            return True
+
+        # keep unwritten values (unless set again since) and retry later
+        self.rollback()
+        for option, value in pending.items():
+            self._pending_options.setdefault(option, value)
+        self._schedule_options_flush()
+        return False
 
     def get_optionInt(self, option, default_value=0):
         try:
@@ -3648,10 +3814,12 @@ class RHData():
         })
 
     def delete_option(self, option):
+        self._pending_options.pop(option, None)
         Database.GlobalSettings.query.filter_by(option_name=option).delete()
         self.commit()
 
     def clear_options(self):
+        self._pending_options = {}
         Database.DB_session.query(Database.GlobalSettings).delete()
         self.commit()
         return True
@@ -3677,60 +3845,50 @@ class RHData():
     def generate_new_event_name(self):
         return "{} {}".format(datetime.now().strftime('%Y-%m-%d'), self.__("FPV Race"))
 
-    # Event Results (Options)
-    def get_results_event(self):
+    # Event Results
+    def get_results_event(self, sections=None, no_rebuild_flag=False):
         if len(self.get_savedRaceMetas()) < 1:
             # no races exist, skip calculating
             return None
 
-        cache_invalid = False
-        eventStatus = self.get_option("eventResults_cacheStatus")
-        if eventStatus:
-            try:
-                cacheStatus = json.loads(eventStatus)
-                token = cacheStatus['data_ver']
-                if cacheStatus['data_ver'] == cacheStatus['build_ver']:
+        cacheStatus = self._results_cache.status((CacheNode.EVENT, None), self.get_option("eventResults_cacheStatus"))
+        if cacheStatus:
+            token = cacheStatus['data_ver']
+            if self._results_cache.is_valid(cacheStatus):
+                results = self._load_results((CacheNode.EVENT, None), sections)
+                if results is not self._RESULTS_MISSING:
                     # cache hit
-                    return json.loads(self.get_option("eventResults"))
-                # else: cache miss
-            except ValueError:
-                cache_invalid = True
+                    return results
+            # else: cache miss
         else:
-            cache_invalid = True
-
-        if cache_invalid:
             logger.error('Event cache has invalid status')
             token = monotonic()
             self.clear_results_event(token)
 
+        if no_rebuild_flag:
+            return None
+
         # cache rebuild
         logger.debug('Building Event results')
         build = Results.build_leaderboard_event(self._racecontext)
         self.set_results_event(token, build)
-        return build
+        return self._select_results_sections(build, sections)
 
     def set_results_event(self, token, results):
-        eventStatus = self.get_option("eventResults_cacheStatus")
-        cacheStatus = json.loads(eventStatus)
-        if cacheStatus['data_ver'] == token:
-            cacheStatus['build_ver'] = token
-            self.set_option("eventResults", json.dumps(results))
-            self.set_option("eventResults_cacheStatus", json.dumps(cacheStatus))
+        cacheStatus = self._results_cache.mark_built((CacheNode.EVENT, None), self.get_option("eventResults_cacheStatus"), token)
+        if cacheStatus:
+            self._store_results((CacheNode.EVENT, None), results)
+            self.set_option("eventResults_cacheStatus", cacheStatus)
 
         self.commit()
         return True
 
     def clear_results_event(self, token=None):
-        if token is None:
-            token = monotonic()
-
-        eventStatus = json.dumps({
-            'data_ver': token,
-            'build_ver': None
-        })
+        eventStatus = self._results_cache.mark_dirty((CacheNode.EVENT, None), token)
 
         self.set_option("eventResults_cacheStatus", eventStatus)
-        self.set_option("eventResults", None)
+        self._delete_results((CacheNode.EVENT, None))
+        self.commit()
         return True
 
     def clear_results_all(self):
@@ -3739,9 +3897,126 @@ class RHData():
         self.clear_results_heats()
         self.clear_results_raceClasses()
         self.clear_results_event()
+        self.set_option("eventResults", None)
+        self._results_cache.forget()
 
         logger.debug('All Result caches invalidated')
 
+    def invalidate_results(self, *keys, token=None):
+        ''' Invalidate result caches and all results built from them '''
+        if token is None:
+            token = monotonic()
+
+        dirty_keys = []
+        for key in keys:
+            for dirty_key in self._results_cache.invalidation_set(key):
+                if dirty_key not in dirty_keys:
+                    dirty_keys.append(dirty_key)
+
+        for node_type, node_id in dirty_keys:
+            if node_type == CacheNode.RACE:
+                race = Database.SavedRaceMeta.query.get(node_id)
+                if race:
+                    race._cache_status = self._results_cache.mark_dirty((node_type, node_id), token)
+            elif node_type == CacheNode.HEAT:
+                heat = Database.Heat.query.get(node_id)
+                if heat:
+                    heat._cache_status = self._results_cache.mark_dirty((node_type, node_id), token)
+            elif node_type == CacheNode.CLASS:
+                race_class = Database.RaceClass.query.get(node_id)
+                if race_class:
+                    race_class._cache_status = self._results_cache.mark_dirty((node_type, node_id), token)
+            elif node_type == CacheNode.RANKING:
+                race_class = Database.RaceClass.query.get(node_id)
+                if race_class:
+                    race_class._rank_status = self._results_cache.mark_dirty((node_type, node_id), token)
+            elif node_type == CacheNode.EVENT:
+                self.set_option("eventResults_cacheStatus", self._results_cache.mark_dirty((node_type, node_id), token))
+            self._delete_results((node_type, node_id))
+
+        self.commit()
+        logger.debug('Result caches invalidated: {}'.format(dirty_keys))
+        return dirty_keys
+
+    def _get_results_dependents(self, key):
+        # results built directly from the given result cache
+        node_type, node_id = key
+        if node_type == CacheNode.RACE:
+            race = Database.SavedRaceMeta.query.get(node_id)
+            if race:
+                return [(CacheNode.HEAT, race.heat_id)]
+        elif node_type == CacheNode.HEAT:
+            heat = Database.Heat.query.get(node_id)
+            if heat and heat.class_id != RHUtils.CLASS_ID_NONE:
+                return [(CacheNode.CLASS, heat.class_id)]
+            return [(CacheNode.EVENT, None)]
+        elif node_type == CacheNode.CLASS:
+            return [(CacheNode.RANKING, node_id), (CacheNode.EVENT, None)]
+        return []
+
+    # Results cache storage
+    _RESULTS_MISSING = object() # no usable stored results
+
+    def _results_cache_query(self, key):
+        node_type, node_id = key
+        return Database.ResultsCacheSection.query.filter_by(cache_type=node_type, cache_id=node_id or 0)
+
+    def _load_results(self, key, sections=None):
+        query = self._results_cache_query(key)
+        if sections is not None:
+            query = query.filter(Database.ResultsCacheSection.section.in_(list(sections) + [RESULTS_WHOLE_SECTION]))
+
+        rows = query.order_by(Database.ResultsCacheSection.position).all()
+        if not len(rows):
+            return self._RESULTS_MISSING
+
+        results = {}
+        for row in rows:
+            if row.version != RESULTS_FORMAT_VERSION:
+                logger.info('Ignoring stored results for {} {}: format version {}'.format(*key, row.version))
+                return self._RESULTS_MISSING
+            if row.section == RESULTS_WHOLE_SECTION:
+                return unpack_results_section(row.data)
+            results[row.section] = unpack_results_section(row.data)
+        return results
+
+    def _store_results(self, key, results):
+        node_type, node_id = key
+        self._delete_results(key)
+
+        if isinstance(results, dict) and results:
+            sections = results.items()
+        else:
+            # whole-value row (also marks an empty result as cached)
+            sections = [(RESULTS_WHOLE_SECTION, results)]
+
+        for position, (section, value) in enumerate(sections):
+            Database.DB_session.add(Database.ResultsCacheSection(
+                cache_type=node_type,
+                cache_id=node_id or 0,
+                section=section,
+                position=position,
+                version=RESULTS_FORMAT_VERSION,
+                data=pack_results_section(value)
+            ))
+
+    def _refresh_results_source_names(self, key, heat_id):
+        results = self._load_results(key)
+        if results is not self._RESULTS_MISSING and results:
+            self._racecontext.pagecache.set_valid(False)
+            self._store_results(key, Results.refresh_source_displayname(self._racecontext, results, heat_id))
+
+    def _delete_results(self, key):
+        self._results_cache_query(key).delete()
+
+    def _delete_results_by_type(self, node_type):
+        Database.ResultsCacheSection.query.filter_by(cache_type=node_type).delete()
+
+    def _select_results_sections(self, results, sections):
+        if sections is None or not isinstance(results, dict):
+            return results
+        return {key: value for key, value in results.items() if key in sections}
+
 
 def getFastestSpeedStr(rhapi, spoken_flag, sel_pilot_id=None):
     fastest_str = ""
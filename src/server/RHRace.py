@@ -14,6 +14,8 @@ from time import monotonic
 from eventmanager import Evt
 from filtermanager import Flt
 from util.InvokeFuncQueue import InvokeFuncQueue
+from util.LapStats import SeatActiveLaps, SeatLapStats
+from PassTrace import PassStage
 from RHUtils import catchLogExceptionsWrapper
 from led_event_manager import ColorVal
 from Database import RoundType
@@ -75,6 +77,8 @@ class RHRace():
         self.coop_best_time = 0.0  # best time achieved in co-op racing mode (seconds)
         self.coop_num_laps = 0     # best # of laps in co-op racing mode
         self.node_laps = {} # current race lap objects, by node
+        self.seat_lap_stats = {} # incremental lap statistics, by node
+        self.seat_active_laps = {} # cached active lap views, by node
         self.node_has_finished = {}     # True if pilot for node has finished race
         self.node_finished_effect = {}  # True if effect for pilot-finished for node has been triggered
         self.node_fin_effect_wait_count = 0  # number of finished effects waiting for all crossings completed
@@ -479,8 +483,7 @@ class RHRace():
                 self.start_time_formatted = RHTimeFns.datetimeToFormattedStr(self.start_time) # record standard-formatted time
 
                 for node in self._racecontext.interface.nodes:
-                    node.history_values = [] # clear race history
-                    node.history_times = []
+                    node.rssi_history.clear() # clear race history
                     node.under_min_lap_count = 0
                     # clear any lingering crossing (if rssi>enterAt then first crossing starts now)
                     if node.crossing_flag and node.frequency > 0 and (
@@ -660,16 +663,14 @@ class RHRace():
 
                 heat = self._racecontext.rhdata.get_heat(self.current_heat)
 
-                # Clear caches
-                heat_result = self._racecontext.rhdata.get_results_heat(self.current_heat)
+                # Clear caches; only results already built are updated here, the rest are left to the prebuilder
+                heat_result = self._racecontext.rhdata.get_results_heat(self.current_heat, no_rebuild_flag=True)
                 if heat.class_id:
-                    class_result = self._racecontext.rhdata.get_results_raceClass(heat.class_id)
-                event_result = self._racecontext.rhdata.get_results_event()
+                    class_result = self._racecontext.rhdata.get_results_raceClass(heat.class_id, no_rebuild_flag=True)
+                event_result = self._racecontext.rhdata.get_results_event(no_rebuild_flag=True)
 
                 token = monotonic()
-                self._racecontext.rhdata.clear_results_heat(self.current_heat, token)
-                self._racecontext.rhdata.clear_results_raceClass(heat.class_id, token)
-                self._racecontext.rhdata.clear_results_event(token)
+                self._racecontext.rhdata.clear_results_heat(self.current_heat, token, cascade=True)
 
                 # Get the last saved round for the current heat
                 max_round = self._racecontext.rhdata.get_max_round(self.current_heat)
@@ -678,7 +679,7 @@ class RHRace():
                     max_round = 0
                 # Loop through laps to copy to saved races
                 profile = self.profile
-                profile_freqs = json.loads(profile.frequencies)
+                profile_freqs = self._racecontext.rhdata.get_profile_view(profile).frequencies
 
                 new_race_data = {
                     'round_id': max_round+1,
@@ -701,8 +702,9 @@ class RHRace():
                         race_data[node_index] = {
                             'race_id': new_race.id,
                             'pilot_id': pilot_id,
-                            'history_values': json.dumps(self._racecontext.interface.nodes[node_index].history_values),
-                            'history_times': json.dumps(self._racecontext.interface.nodes[node_index].history_times),
+                            **self._racecontext.rhdata.encode_savedPilotRace_history(
+                                self._racecontext.interface.nodes[node_index].history_values,
+                                self._racecontext.interface.nodes[node_index].history_times),
                             'enter_at': self._racecontext.interface.nodes[node_index].enter_at_level,
                             'exit_at': self._racecontext.interface.nodes[node_index].exit_at_level,
                             'frequency': self._racecontext.interface.nodes[node_index].frequency,
@@ -735,21 +737,17 @@ class RHRace():
                 if heat_result:
                     self._racecontext.rhdata.set_results_heat(heat, token,
                         Results.build_incremental(self._racecontext, result, heat_result))
-                else:
-                    self._racecontext.rhdata.get_results_heat(self.current_heat)
 
-                if heat.class_id:
-                    if class_result:
-                        self._racecontext.rhdata.set_results_raceClass(heat.class_id, token,
-                            Results.build_incremental(self._racecontext, result, class_result))
-                    else:
-                        self._racecontext.rhdata.get_results_raceClass(heat.class_id)
+                if heat.class_id and class_result:
+                    self._racecontext.rhdata.set_results_raceClass(heat.class_id, token,
+                        Results.build_incremental(self._racecontext, result, class_result))
 
                 if event_result:
                     self._racecontext.rhdata.set_results_event(token,
                         Results.build_incremental(self._racecontext, result, event_result))
-                else:
-                    self._racecontext.rhdata.get_results_event()
+
+                # queue remaining cache builds while this heat is still the current heat
+                self._racecontext.results_prebuilder.schedule(race_id=new_race.id, heat_id=heat.id, class_id=heat.class_id)
 
                 self.discard_laps(saved=True) # Also clear the current laps
 
@@ -774,15 +772,8 @@ class RHRace():
                 if next_heat is not heat.id:
                     self.set_heat(next_heat)
 
-                # spawn thread for updating results caches
-                gevent.spawn(self.rebuild_page_cache)
-
                 self._racecontext.rhui.emit_race_saved(new_race, race_data)
 
-    def rebuild_page_cache(self):
-        self._racecontext.pagecache.set_valid(False)
-        self._racecontext.rhui.emit_result_data()
-
     @catchLogExceptionsWrapper
     def build_atomic_result_caches(self, params):
         with self._racecontext.rhdata.get_db_session_handle():  # make sure DB session/connection is cleaned up
@@ -844,13 +835,15 @@ class RHRace():
 
         with self._racecontext.rhdata.get_db_session_handle():  # make sure DB session/connection is cleaned up
 
+            trace = kwargs.get('trace')
+            self._racecontext.pass_trace.stamp(trace, PassStage.ADD_LAP)
             logger.debug('Pass record: Node={}, abs_ts={:.3f}, source={} ("{}")' \
                          .format(node.index+1, lap_timestamp_absolute, source, self._racecontext.interface.get_lap_source_str(source)))
             node.pass_crossing_flag = False  # clear the "synchronized" version of the crossing flag
             node.debug_pass_count += 1
             self._racecontext.rhui.emit_node_data() # For updated triggers and peaks
 
-            profile_freqs = json.loads(self.profile.frequencies)
+            profile_freqs = self._racecontext.rhdata.get_profile_view(self.profile).frequencies
             if profile_freqs["f"][node.index] != RHUtils.FREQUENCY_ID_NONE :
                 # always count laps if race is running, otherwise test if lap should have counted before race end
                 if self.race_status is RaceStatus.RACING \
@@ -872,11 +865,11 @@ class RHRace():
                             lap_time_stamp = (lap_timestamp_absolute - self.start_time_monotonic)
                             lap_time_stamp *= 1000 # store as milliseconds
 
-                            lap_number = len(self.get_active_laps()[node.index])
+                            lap_number = len(self.get_seat_active_laps(node.index))
 
                             if lap_number: # This is a normal completed lap
                                 # Find the time stamp of the last lap completed (including "late" laps for timing)
-                                last_lap_time_stamp = self.get_active_laps(True)[node.index][-1].lap_time_stamp
+                                last_lap_time_stamp = self.get_seat_active_laps(node.index, True)[-1].lap_time_stamp
 
                                 # New lap time is the difference between the current time stamp and the last
                                 lap_time = lap_time_stamp - last_lap_time_stamp
@@ -897,7 +890,7 @@ class RHRace():
 
                             lap_time_fmtstr = RHUtils.format_time_to_str(lap_time, self._racecontext.serverconfig.get_item('UI', 'timeFormat'))
                             lap_ts_fmtstr = RHUtils.format_time_to_str(lap_time_stamp, self._racecontext.serverconfig.get_item('UI', 'timeFormat'))
-                            pilot_obj = self._racecontext.rhdata.get_pilot(pilot_id)
+                            pilot_obj = self._racecontext.rhdata.get_pilot_view(pilot_id)
                             if pilot_obj:
                                 pilot_namestr = pilot_obj.callsign
                             else:
@@ -1037,9 +1030,12 @@ class RHRace():
                                     'gap_info': Results.get_gap_info(self._racecontext, node.index),
                                     'pilot_done_flag': pilot_done_flag,
                                     })
+                                self._racecontext.pass_trace.stamp(trace, PassStage.RECORDED)
+                                self._racecontext.pass_trace.record(trace, lap_number)
 
                                 self._racecontext.rhui.emit_current_laps() # update all laps on the race page
                                 self._racecontext.rhui.emit_current_leaderboard() # generate and update leaderboard
+                                self._racecontext.pass_trace.stamp(trace, PassStage.LEADERBOARD)
 
                                 if lap_number == 0:
                                     self._racecontext.rhui.emit_first_pass_registered(node.index) # play first-pass sound
@@ -1113,10 +1109,13 @@ class RHRace():
                                                 'node_index': leader_node_idx
                                             })
 
+                                    self._racecontext.pass_trace.stamp(trace, PassStage.CALLOUT)
+
                                     # check for and announce possible winner and trigger possible pilot-done events
                                     #  (but wait until pass-record processings are finished)
                                     self.pass_invoke_func_queue_obj.put(self.finish_add_lap_processing, \
-                                                    pilot_done_flag, pilot_id, pilot_obj, node, emit_leaderboard_on_win=True)
+                                                    pilot_done_flag, pilot_id, pilot_obj, node, emit_leaderboard_on_win=True, \
+                                                    trace=trace)
 
                             else:
                                 # record lap as 'invalid'
@@ -1143,11 +1142,12 @@ class RHRace():
 
     # check for and announce possible winner and trigger possible pilot-done events
     @catchLogExceptionsWrapper
-    def finish_add_lap_processing(self, pilot_done_flag, done_pilot_id, done_pilot_obj, done_node_obj, **kwargs):
+    def finish_add_lap_processing(self, pilot_done_flag, done_pilot_id, done_pilot_obj, done_node_obj, trace=None, **kwargs):
         prev_node_finished_flag = self.get_node_finished_flag(done_node_obj.index)
         if pilot_done_flag and not prev_node_finished_flag:
             self.set_node_finished_flag(done_node_obj.index)
         self.check_win_condition(**kwargs)  # check for and announce possible winner
+        self._racecontext.pass_trace.stamp(trace, PassStage.WIN_CHECK)
         if self.win_status != WinStatus.PENDING_CROSSING:  # if not waiting for crossings to finish
             any_done_flag = False
             if pilot_done_flag and not prev_node_finished_flag:  # if pilot just finished race
@@ -1187,13 +1187,9 @@ class RHRace():
     @catchLogExceptionsWrapper
     def update_leaderboard_after_done(self):
         gevent.sleep(0.001)
-        wait_count = 0  # if 'calc_leaderboard_fn' in progress then let it finish
-        while Results.is_in_calc_leaderboard_fn():
-            gevent.sleep(0.01)
-            wait_count += 1
-            if wait_count > 1000:  # timeout after 10 seconds
-                logger.error("update_leaderboard_after_done: Timeout waiting for invocation of 'calc_leaderboard()' to finish{}")
-                break
+        # if 'calc_leaderboard_fn' in progress then let it finish
+        if not Results.wait_calc_leaderboard_fn(timeout=10):
+            logger.error("update_leaderboard_after_done: Timeout waiting for invocation of 'calc_leaderboard()' to finish")
         self.clear_results()
         self._racecontext.rhui.emit_current_laps() # update all laps on the race page
         self._racecontext.rhui.emit_current_leaderboard() # generate and update leaderboard
@@ -1250,6 +1246,8 @@ class RHRace():
                 lap_following.lap_time = lap_following.lap_time_stamp
                 lap_following.lap_time_formatted = RHUtils.format_time_to_str(lap_following.lap_time, self._racecontext.serverconfig.get_item('UI', 'timeFormat'))
 
+            self.reset_seat_lap_stats(node_index)
+
             try:  # delete any split laps for deleted lap
                 lap_splits = self._racecontext.rhdata.get_lapSplits_by_lap(node_index, lap_number)
                 if lap_splits and len(lap_splits) > 0:
@@ -1306,6 +1304,7 @@ class RHRace():
             lap_objs.append(lap_data)
 
         self.node_laps[node] = lap_objs
+        self.reset_seat_lap_stats(node)
 
         self.clear_lap_results()
         self.clear_results()
@@ -1366,6 +1365,7 @@ class RHRace():
                     lap.lap_time_formatted = RHUtils.format_time_to_str(lap.lap_time,self._racecontext.serverconfig.get_item('UI', 'timeFormat'))
                 last_lap_ts = lap.lap_time_stamp
                 lap_number += 1
+        self.reset_seat_lap_stats(node_index)
 
     @catchLogExceptionsWrapper
     def discard_laps(self, **kwargs):
@@ -1415,6 +1415,8 @@ class RHRace():
     def reset_current_laps(self):
         '''Resets database current laps to default.'''
         self.node_laps = {}
+        self.seat_lap_stats = {}
+        self.seat_active_laps = {}
         for idx in range(self.num_nodes):
             self.node_laps[idx] = []
 
@@ -1684,15 +1686,37 @@ class RHRace():
     def get_active_laps(self, late_lap_flag=False):
         # return active (non-deleted) laps objects
         filtered = {}
-        if not late_lap_flag:
-            for node_index in self.node_laps:
-                filtered[node_index] = list(filter(lambda lap : lap.deleted == False, self.node_laps[node_index]))
-        else:
-            for node_index in self.node_laps:
-                filtered[node_index] = list(filter(lambda lap : \
-                                (lap.deleted == False or lap.late_lap), self.node_laps[node_index]))
+        for node_index in self.node_laps:
+            filtered[node_index] = list(self.get_seat_active_laps(node_index, late_lap_flag))
         return filtered
 
+    def get_seat_active_laps(self, node_index, late_lap_flag=False):
+        # return cached active laps for node (do not modify); updated with any newly added laps
+        active_laps = self.seat_active_laps.get(node_index)
+        if active_laps is None:
+            active_laps = SeatActiveLaps()
+            self.seat_active_laps[node_index] = active_laps
+        return active_laps.update(self.node_laps.get(node_index, [])).get(late_lap_flag)
+
+    def get_seat_lap_stats(self, node_index, consecutives_count, first_lap_flag):
+        # return incremental lap statistics for node, updated with any newly added laps
+        stats = self.seat_lap_stats.get(node_index)
+        if stats is None:
+            stats = SeatLapStats(consecutives_count, first_lap_flag)
+            self.seat_lap_stats[node_index] = stats
+        else:
+            stats.configure(consecutives_count, first_lap_flag)
+        return stats.update(self.node_laps.get(node_index, []))
+
+    def reset_seat_lap_stats(self, node_index):
+        # laps for node were modified other than by appending; rebuild stats and active laps on next access
+        stats = self.seat_lap_stats.get(node_index)
+        if stats:
+            stats.reset()
+        active_laps = self.seat_active_laps.get(node_index)
+        if active_laps:
+            active_laps.reset()
+
     def any_laps_recorded(self):
         for node_index in range(self.num_nodes):
             if len(self.node_laps[node_index]) > 0:
@@ -1943,7 +1967,7 @@ class RHRace():
             else:
                 seatColors = self._racecontext.serverstate.seat_color_defaults
         elif mode == 2:
-            profile_freqs = json.loads(self.profile.frequencies)
+            profile_freqs = self._racecontext.rhdata.get_profile_view(self.profile).frequencies
 
         for node_index in range(self.num_nodes):
             color = '#ffffff'
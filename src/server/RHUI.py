@@ -7,7 +7,7 @@ from typing import List, Any  # @UnusedImport
 from dataclasses import dataclass, asdict  # @UnresolvedImport
 from enum import Enum
 from flask import request
-from flask_socketio import emit
+from flask_socketio import emit, join_room, leave_room
 from eventmanager import Evt
 import json
 import os
@@ -22,6 +22,7 @@ from RHUtils import catchLogExceptionsWrapper
 from Database import ProgramMethod, RoundType
 from RHRace import RacingMode, RaceStatus
 from filtermanager import Flt
+from util.HeartbeatFrames import heartbeat_delta, pack_heartbeat
 import logging
 
 logger = logging.getLogger(__name__)
@@ -44,6 +45,19 @@ class UIFieldType(Enum):
     TEL = "tel"
     URL = "url"
 
+class HeartbeatMode:
+    FULL = 'full'      # 'heartbeat' with all node data (default for clients that do not subscribe)
+    DELTA = 'delta'    # 'heartbeat_delta' with node entries changed since previous heartbeat
+    BINARY = 'binary'  # 'heartbeat_binary' with packed node data
+    NONE = 'none'
+
+HEARTBEAT_ROOMS = {
+    HeartbeatMode.FULL: 'heartbeat',
+    HeartbeatMode.DELTA: 'heartbeat_delta',
+    HeartbeatMode.BINARY: 'heartbeat_binary',
+}
+HEARTBEAT_KEYFRAME_INTERVAL = 50 # delta subscribers receive all node data every this many heartbeats
+
 @dataclass
 class UIFieldSelectOption():
     value: str
@@ -137,9 +151,14 @@ class RHUI():
         self._ui_panels = []
         self._general_settings = []
         self._ui_fn_bindings = []
+
+        self._heartbeat_modes = {} # client sid -> HeartbeatMode
+        self._heartbeat_seq = 0
+        self._heartbeat_last = None # node data of last heartbeat
         self._quickbuttons = []
         self._markdowns = []
         self._UI_server_messages = {}
+        self._result_data_version = None # page cache version last broadcast to clients
 
     # Pilot Attributes
     def register_pilot_attribute(self, field:UIField):
@@ -714,6 +733,52 @@ class RHUI():
                     'frequency': profile_freqs["f"][n]
                 })
 
+    def heartbeat_subscribe(self, sid, mode=HeartbeatMode.FULL):
+        '''Sets heartbeat mode for client; delta and binary subscribers are sent the current node data'''
+        if mode not in HEARTBEAT_ROOMS and mode != HeartbeatMode.NONE:
+            logger.warning("Unknown heartbeat mode '{}'".format(mode))
+            return False
+        for room in HEARTBEAT_ROOMS.values():
+            leave_room(room, sid=sid, namespace='/')
+        if mode in HEARTBEAT_ROOMS:
+            join_room(HEARTBEAT_ROOMS[mode], sid=sid, namespace='/')
+        self._heartbeat_modes[sid] = mode
+
+        if self._heartbeat_last is not None:
+            if mode == HeartbeatMode.DELTA:
+                self._socket.emit('heartbeat_delta', {'seq': self._heartbeat_seq, 'node_data': self._heartbeat_last},
+                                  namespace='/', to=sid)
+            elif mode == HeartbeatMode.BINARY:
+                self._socket.emit('heartbeat_binary', pack_heartbeat(self._heartbeat_last, self._heartbeat_seq),
+                                  namespace='/', to=sid)
+        return True
+
+    def heartbeat_disconnect(self, sid):
+        self._heartbeat_modes.pop(sid, None)
+
+    def emit_heartbeat(self, node_data):
+        '''Emits heartbeat node data to subscribed clients, in each client's format'''
+        self._heartbeat_seq += 1
+        modes = set(self._heartbeat_modes.values())
+
+        self._socket.emit('heartbeat', node_data, namespace='/', to=HEARTBEAT_ROOMS[HeartbeatMode.FULL])
+
+        if HeartbeatMode.DELTA in modes:
+            changes = None
+            if self._heartbeat_seq % HEARTBEAT_KEYFRAME_INTERVAL:
+                changes = heartbeat_delta(self._heartbeat_last, node_data)
+            if changes is None:
+                emit_payload = {'seq': self._heartbeat_seq, 'node_data': node_data}
+            else:
+                emit_payload = {'seq': self._heartbeat_seq, 'base_seq': self._heartbeat_seq - 1, 'changes': changes}
+            self._socket.emit('heartbeat_delta', emit_payload, namespace='/', to=HEARTBEAT_ROOMS[HeartbeatMode.DELTA])
+
+        if HeartbeatMode.BINARY in modes:
+            self._socket.emit('heartbeat_binary', pack_heartbeat(node_data, self._heartbeat_seq),
+                              namespace='/', to=HEARTBEAT_ROOMS[HeartbeatMode.BINARY])
+
+        self._heartbeat_last = {key: list(values) for key, values in node_data.items()}
+
     def emit_node_data(self, **params):
         '''Emits node data.'''
         emit_payload = {
@@ -764,6 +829,14 @@ class RHUI():
             else:
                 self._socket.emit('cluster_status', self._racecontext.cluster.getClusterStatusInfo())
 
+    def emit_pass_trace(self, **params):
+        '''Emits pass-record timing trace percentiles.'''
+        emit_payload = self._racecontext.pass_trace.get_stats()
+        if ('nobroadcast' in params):
+            emit('pass_trace', emit_payload)
+        else:
+            self._socket.emit('pass_trace', emit_payload)
+
     def emit_start_thresh_lower_amount(self, **params):
         '''Emits current start_thresh_lower_amount.'''
         emit_payload = {
@@ -992,7 +1065,13 @@ class RHUI():
             if 'nobroadcast' in params and sid != None:
                 emit('result_data', emit_payload, namespace='/', room=sid)
             else:
-                self._socket.emit('result_data', emit_payload, namespace='/')
+                # send only sections changed since last broadcast; clients that are behind request a resync
+                delta = self._racecontext.pagecache.get_delta(self._result_data_version)
+                if delta is None:
+                    self._socket.emit('result_data', emit_payload, namespace='/')
+                elif delta['version'] != delta['base_version']:
+                    self._socket.emit('result_data_delta', delta, namespace='/')
+                self._result_data_version = emit_payload.get('version')
 
     def emit_current_leaderboard(self, **params):
         '''Emits leaderboard.'''
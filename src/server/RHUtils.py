@@ -30,22 +30,33 @@ RHGPIO_S32ID_PIN = 25  # GPIO input is tied low on S32_BPill PCB
 Is_sys_raspberry_pi_flag = True  # set by 'idAndLogSystemInfo()'
 S32_BPill_board_flag = False  # set by 'idAndLogSystemInfo()'
 
-def format_time_to_str(millis, timeformat='{m}:{s}.{d}'):
+TIME_FORMAT_DEFAULT = '{m}:{s}.{d}'
+TIME_FORMAT_CACHE_SIZE = 4096  # formatted strings kept per time format
+TIME_FORMAT_MAX_FORMATS = 16  # time formats kept in cache
+
+@functools.lru_cache(maxsize=TIME_FORMAT_MAX_FORMATS)
+def get_time_formatter(timeformat=TIME_FORMAT_DEFAULT):
+    '''Returns memoized function converting whole milliseconds to string in the given format'''
+    format_fn = (timeformat or TIME_FORMAT_DEFAULT).format
+
+    @functools.lru_cache(maxsize=TIME_FORMAT_CACHE_SIZE)
+    def formatter(millis):
+        minutes, over = divmod(millis, 60000)
+        seconds, milliseconds = divmod(over, 1000)
+        return format_fn(m=str(minutes), s=str(seconds).zfill(2), d=str(milliseconds).zfill(3))
+
+    return formatter
+
+def clear_time_format_cache(_args=None):
+    '''Discards memoized time formatters (as on CONFIG_SET)'''
+    get_time_formatter.cache_clear()
+
+def format_time_to_str(millis, timeformat=TIME_FORMAT_DEFAULT):
     '''Convert milliseconds to 00:00.000'''
     if not isinstance(millis, (int, float)):
         return ''
 
-    millis = int(round(millis, 0)) # round to nearest ms
-    minutes = millis // 60000
-    over = millis % 60000
-    seconds = over // 1000
-    over = over % 1000
-    milliseconds = over
-
-    if not timeformat:
-        timeformat = '{m}:{s}.{d}'
-
-    return timeformat.format(m=str(minutes), s=str(seconds).zfill(2), d=str(milliseconds).zfill(3))
+    return get_time_formatter(timeformat)(int(round(millis, 0))) # round to nearest ms
 
 def format_split_time_to_str(millis, timeformat='{m}:{s}.{d}'):
     '''Convert milliseconds to 00:00.000 with leading zeros removed'''
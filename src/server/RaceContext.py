@@ -25,6 +25,8 @@ class RaceContext():
         self.rhdata = None
 
         self.pagecache = None
+        self.results_prebuilder = None
+        self.pass_trace = None
         self.language = None
 
         self.events = None
@@ -5,11 +5,12 @@ from typing import List
 from RHUI import UIField
 from eventmanager import Evt
 from filtermanager import Flt
-import copy
 import json
 import gevent
 import RHUtils
 from RHUtils import catchLogExceptionsWrapper, cleanVarName
+from util.BuildCoordinator import BuildCoordinator
+from util.LapStats import best_consecutive_laps
 import logging
 from time import monotonic
 from Database import RoundType
@@ -22,7 +23,7 @@ APP.app_context().push()
 
 NONE_NONE_PAIR = [None, None]
 
-in_calc_leaderboard_fn_flag = False
+leaderboard_builds = BuildCoordinator('calc_leaderboard')
 
 class RaceClassRankManager():
     def __init__(self, RHAPI, Events):
@@ -213,10 +214,13 @@ def build_atomic_results(rhDataObj, params):
         class_id = None
         USE_CLASS = False
 
+    # event summary is rebuilt from any of the below
+    if 'race_id' in params or 'heat_id' in params or USE_CLASS:
+        rhDataObj.clear_results_event()
+
     # rebuild race result
     if 'race_id' in params:
         do_gevent_sleep()
-        rhDataObj.clear_results_event()
         timing['race'] = monotonic()
         rhDataObj.get_results_savedRaceMeta(race)
         logger.debug('Race {} results built in {}s'.format(params['race_id'], monotonic() - timing['race']))
@@ -224,7 +228,6 @@ def build_atomic_results(rhDataObj, params):
     # rebuild heat summary
     if 'heat_id' in params:
         do_gevent_sleep()
-        rhDataObj.clear_results_event()
         timing['heat'] = monotonic()
         rhDataObj.get_results_heat(heat)
         logger.debug('Heat {} results built in {}s'.format(heat_id, monotonic() - timing['heat']))
@@ -232,7 +235,6 @@ def build_atomic_results(rhDataObj, params):
     # rebuild class summary
     if USE_CLASS:
         do_gevent_sleep()
-        rhDataObj.clear_results_event()
         timing['class'] = monotonic()
         rhDataObj.get_results_raceClass(class_id)
         logger.debug('Class {} results built in {}s'.format(class_id, monotonic() - timing['class']))
@@ -252,7 +254,11 @@ def build_atomic_results(rhDataObj, params):
         logger.debug("Exiting 'build_atomic_results()'{}".format(dbg_trace_str))
 
 def is_in_calc_leaderboard_fn():
-    return in_calc_leaderboard_fn_flag
+    return leaderboard_builds.busy
+
+def wait_calc_leaderboard_fn(timeout=None):
+    '''Blocks until any in-progress 'calc_leaderboard()' finishes; returns False on timeout'''
+    return leaderboard_builds.wait_idle(timeout)
 
 def calc_leaderboard(racecontext, **params):
     dbg_trace_str = ""
@@ -260,24 +266,14 @@ def calc_leaderboard(racecontext, **params):
         dbg_trace_str = RHUtils.getFnTracebackMsgStr("calc_leaderboard")
         logger.debug("Entered 'calc_leaderboard()', called from: {}".format(dbg_trace_str))
         dbg_trace_str = " (called from: {})".format(dbg_trace_str)
-    global in_calc_leaderboard_fn_flag
-    if in_calc_leaderboard_fn_flag:
-        logger.info("Waiting for previous invocation of 'calc_leaderboard()' to finish{}".format(dbg_trace_str))
-        wait_count = 0
-        while True:
-            gevent.sleep(0.05)
-            if not in_calc_leaderboard_fn_flag:
-                logger.info("Previous invocation of 'calc_leaderboard()' finished; continuing{}".format(dbg_trace_str))
-                break
-            wait_count += 1
-            if wait_count > 6000:
-                logger.error("Timeout waiting for previous invocation of 'calc_leaderboard()' to finish{}".format(dbg_trace_str))
-                break
-    in_calc_leaderboard_fn_flag = True
-    try:
-        lb_result = _do_calc_leaderboard(racecontext, **params)
-    finally:
-        in_calc_leaderboard_fn_flag = False
+
+    # concurrent requests for the same leaderboard share one build
+    if 'current_race' in params:
+        build_key = ('current_race', id(params['current_race']))
+    else:
+        build_key = (params.get('heat_id'), params.get('round_id'))
+    lb_result = leaderboard_builds.run(build_key, _do_calc_leaderboard, racecontext, **params)
+
     if logger.getEffectiveLevel() <= logging.DEBUG:  # if DEBUG msgs actually being logged
         logger.debug("Exiting 'calc_leaderboard()'{}".format(dbg_trace_str))
     return lb_result
@@ -299,7 +295,7 @@ def _do_calc_leaderboard(racecontext, **params):
         if current_heat and current_heat.class_id:
             current_class = racecontext.rhdata.get_raceClass(current_heat.class_id)
         profile = params['current_profile']
-        profile_freqs = json.loads(profile.frequencies)
+        profile_freqs = racecontext.rhdata.get_profile_view(profile).frequencies
         raceObj = params['current_race']
         race_format = raceObj.format
 
@@ -350,23 +346,10 @@ def _do_calc_leaderboard(racecontext, **params):
     leaderboard = []
 
     # collect data for processing
+    first_lap_flag = bool(race_format and race_format.start_behavior == StartBehavior.FIRST_LAP)
     if USE_CURRENT and raceObj.current_heat == RHUtils.HEAT_ID_NONE:
         for node_index in range(raceObj.num_nodes):
-            crossings = []
-            laps = []
-
-            if node_index < raceObj.num_nodes and len(raceObj.get_active_laps()):
-                crossings = raceObj.get_active_laps()[node_index]
-
-            if crossings:
-                if race_format and race_format.start_behavior == StartBehavior.FIRST_LAP:
-                    total_laps = len(crossings)
-                    laps = crossings
-                else:
-                    total_laps = len(crossings) - 1
-                    laps = crossings[1:]
-            else:
-                total_laps = 0
+            seat_stats = raceObj.get_seat_lap_stats(node_index, consecutivesCount, first_lap_flag)
 
             if (profile_freqs["b"][node_index] and profile_freqs["c"][node_index]):
                 callsign = profile_freqs["b"][node_index] + str(profile_freqs["c"][node_index])
@@ -378,46 +361,36 @@ def _do_calc_leaderboard(racecontext, **params):
                     'pilot_id': None,
                     'callsign': callsign,
                     'team_name': None,
-                    'laps': total_laps,
-                    'starts': 1 if len(crossings) > 0 else 0,
+                    'laps': seat_stats.laps,
+                    'starts': seat_stats.starts,
                     'node': node_index,
-                    'pilot_crossings': crossings,
-                    'pilot_laps': laps,
+                    'seat_stats': seat_stats,
                 })
     elif USE_CURRENT:
-        for pilot in rhDataObj.get_pilots():
-            do_gevent_sleep(0)
-            found_pilot = False
-            node_index = 0
-            crossings = []
-            laps = []
-            for node_index in raceObj.node_pilots:
-                if raceObj.node_pilots[node_index] == pilot.id and node_index < raceObj.num_nodes and len(raceObj.get_active_laps()):
-                    crossings = raceObj.get_active_laps()[node_index]
-                    found_pilot = True
-                    break
-
-            if crossings:
-                if race_format and race_format.start_behavior == StartBehavior.FIRST_LAP:
-                    total_laps = len(crossings)
-                    laps = crossings
-                else:
-                    total_laps = len(crossings) - 1
-                    laps = crossings[1:]
-            else:
-                total_laps = 0
+        # seats ordered by pilot ID; a pilot is listed once, on their first seat
+        seen_pilot_ids = set()
+        if raceObj.node_laps:
+            seat_pilots = [(node_index, pilot_id) for node_index, pilot_id in raceObj.node_pilots.items() if pilot_id]
+            for node_index, pilot_id in sorted(seat_pilots, key=lambda x: (x[1], x[0])):
+                if pilot_id in seen_pilot_ids or node_index >= raceObj.num_nodes:
+                    continue
+                pilot = rhDataObj.get_pilot(pilot_id)
+                if not pilot:
+                    continue
+                seen_pilot_ids.add(pilot_id)
+                do_gevent_sleep(0)
 
-            if found_pilot and profile_freqs["f"][node_index] != RHUtils.FREQUENCY_ID_NONE:
-                leaderboard.append({
-                    'pilot_id': pilot.id,
-                    'callsign': pilot.callsign,
-                    'team_name': pilot.team,
-                    'laps': total_laps,
-                    'starts': 1 if len(crossings) > 0 else 0,
-                    'node': node_index,
-                    'pilot_crossings': crossings,
-                    'pilot_laps': laps,
-                })
+                if profile_freqs["f"][node_index] != RHUtils.FREQUENCY_ID_NONE:
+                    seat_stats = raceObj.get_seat_lap_stats(node_index, consecutivesCount, first_lap_flag)
+                    leaderboard.append({
+                        'pilot_id': pilot.id,
+                        'callsign': pilot.callsign,
+                        'team_name': pilot.team,
+                        'laps': seat_stats.laps,
+                        'starts': seat_stats.starts,
+                        'node': node_index,
+                        'seat_stats': seat_stats,
+                    })
     else:
         for pilot_race in racecontext.rhdata.get_savedPilotRaces_by_savedRaceMeta(raceObj.id):
             if pilot_race.pilot_id:
@@ -449,115 +422,111 @@ def _do_calc_leaderboard(racecontext, **params):
                 })
 
     do_gevent_sleep()
-    # find leader for each lap in race
+
     if USE_CURRENT:
-        leader_laps = {}
-        for chk_pilot in leaderboard:
-            chk_laps = chk_pilot.get('pilot_crossings', [])
-            for chk_lap in chk_laps:
-                lnum = chk_lap.lap_number
-                if lnum is not None and (lnum > 0 or (race_format and race_format.start_behavior == StartBehavior.FIRST_LAP)):
-                    ldr_plt, ldr_lap = leader_laps.get(lnum, NONE_NONE_PAIR)
-                    # if first entry or earliest entry for lap
-                    if ldr_lap is None or chk_lap.lap_time_stamp < ldr_lap.lap_time_stamp:
-                        leader_laps[lnum] = [ chk_pilot, chk_lap ]
+        for result_pilot in leaderboard:
+            seat_stats = result_pilot['seat_stats']
+            result_pilot['total_time'] = round(seat_stats.total_time, 3)
+            result_pilot['total_time_laps'] = round(seat_stats.total_time_laps, 3)
+
+            if result_pilot['laps']:
+                result_pilot['last_lap'] = seat_stats.last_lap
+                result_pilot['average_lap'] = round(result_pilot['total_time_laps'] / result_pilot['laps'], 3)
+                result_pilot['fastest_lap'] = seat_stats.fastest_lap
+                source = {
+                    'round': round_num,
+                    'heat': current_heat_id,
+                    'displayname': heat_displayname,
+                }
 
-    for result_pilot in leaderboard:
-        if logger.getEffectiveLevel() <= logging.DEBUG:  # if DEBUG msgs actually being logged
-            logger.debug("Calculating leaderboard data for pilot_id {}".format(result_pilot.get('pilot_id', -1)))
-        do_gevent_sleep()
+                # Determine number of seconds behind leader
+                result_pilot['time_behind'] = get_time_behind(result_pilot, leaderboard, first_lap_flag)
 
-        # Get the total race time for each pilot
-        l_time_total = 0
-        for lap in result_pilot['pilot_crossings']:
-            l_time_total += lap.lap_time
-        result_pilot['total_time'] = round(l_time_total, 3)
-
-        if len(result_pilot['pilot_crossings']) != len(result_pilot['pilot_laps']):
-            l_time_total -= result_pilot['pilot_crossings'][0].lap_time
-        result_pilot['total_time_laps'] = round(l_time_total, 3)
-
-        if result_pilot['laps']:
-            # Get the last lap for each pilot
-            result_pilot['last_lap'] = result_pilot['pilot_laps'][-1].lap_time
-            # Get the average lap time for each pilot
-            result_pilot['average_lap'] = round(result_pilot['total_time_laps'] / result_pilot['laps'], 3)
-            # Get the fastest lap time for each pilot
-            result_pilot['fastest_lap'] = sorted(result_pilot['pilot_laps'], key=lambda val: val.lap_time)[0].lap_time
-            # Set lap source info
-            source = {
-                'round': round_num,
-                'heat': current_heat_id,
-                'displayname': heat_displayname,
-            }
+                # best consecutive X laps
+                cons_time, cons_base, cons_index = seat_stats.get_consecutives()
+                result_pilot['consecutives'] = round(cons_time, 3)
+                result_pilot['consecutives_base'] = cons_base
+                result_pilot['consecutive_lap_start'] = cons_index
+            else:
+                result_pilot['last_lap'] = None
+                result_pilot['average_lap'] = 0
+                result_pilot['fastest_lap'] = 0
+                source = None
+                result_pilot['time_behind'] = None
+                result_pilot['consecutives'] = None
+                result_pilot['consecutives_base'] = 0
+                result_pilot['consecutive_lap_start'] = None
+
+            result_pilot['fastest_lap_source'] = source
+            result_pilot['consecutives_source'] = source
 
-            do_gevent_sleep(0)
-
-            # Determine number of seconds behind leader
-            result_pilot['time_behind'] = None
-            if USE_CURRENT:
-                current_lap = result_pilot['pilot_laps'][-1]
-                cur_lap_num = current_lap.lap_number
-                # check if pilot has completed at least first lap
-                if cur_lap_num > 0 or \
-                        (race_format and race_format.start_behavior == StartBehavior.FIRST_LAP):
-                    ldr_pilot, ldr_lap = leader_laps.get(cur_lap_num, NONE_NONE_PAIR)
-                    # if another pilot is leader on lap
-                    if ldr_lap is not None and ldr_pilot.get('node') != result_pilot.get('node'):
-                        ldr_lap_ts = ldr_lap.lap_time_stamp
-                        cur_lap_ts = current_lap.lap_time_stamp
-                        if cur_lap_ts > ldr_lap_ts:
-                            result_pilot['time_behind'] = round(cur_lap_ts - ldr_lap_ts, 3)
+    else:
+        for result_pilot in leaderboard:
+            if logger.getEffectiveLevel() <= logging.DEBUG:  # if DEBUG msgs actually being logged
+                logger.debug("Calculating leaderboard data for pilot_id {}".format(result_pilot.get('pilot_id', -1)))
+            do_gevent_sleep()
+
+            # Get the total race time for each pilot
+            l_time_total = 0
+            for lap in result_pilot['pilot_crossings']:
+                l_time_total += lap.lap_time
+            result_pilot['total_time'] = round(l_time_total, 3)
+
+            if len(result_pilot['pilot_crossings']) != len(result_pilot['pilot_laps']):
+                l_time_total -= result_pilot['pilot_crossings'][0].lap_time
+            result_pilot['total_time_laps'] = round(l_time_total, 3)
+
+            if result_pilot['laps']:
+                # Get the last lap for each pilot
+                result_pilot['last_lap'] = result_pilot['pilot_laps'][-1].lap_time
+                # Get the average lap time for each pilot
+                result_pilot['average_lap'] = round(result_pilot['total_time_laps'] / result_pilot['laps'], 3)
+                # Get the fastest lap time for each pilot
+                result_pilot['fastest_lap'] = min(data.lap_time for data in result_pilot['pilot_laps'])
+                # Set lap source info
+                source = {
+                    'round': round_num,
+                    'heat': current_heat_id,
+                    'displayname': heat_displayname,
+                }
 
                 do_gevent_sleep(0)
 
-            # find best consecutive X laps
-            all_consecutives = []
-
-            if result_pilot['laps'] >= consecutivesCount:
-                for i in range(result_pilot['laps'] - (consecutivesCount - 1)):
-                    do_gevent_sleep(0)
-                    all_consecutives.append({
-                        'laps': consecutivesCount,
-                        'time': sum([data.lap_time for data in result_pilot['pilot_laps'][i : i + consecutivesCount]]),
-                        'lap_index': i+1
-                    })
-            else:
-                all_consecutives.append({
-                    'laps': result_pilot['laps'],
-                    'time': result_pilot['total_time_laps'],
-                    'lap_index': None
-                })
+                result_pilot['time_behind'] = None
 
-            do_gevent_sleep(0)
-
-            # Sort consecutives
-            all_consecutives.sort(key = lambda x: (-x['laps'], not bool(x['time']), x['time']))
-
-            result_pilot['consecutives'] = round(all_consecutives[0]['time'], 3)
-            result_pilot['consecutives_base'] = all_consecutives[0]['laps']
-            result_pilot['consecutive_lap_start'] = all_consecutives[0]['lap_index']
+                # find best consecutive X laps
+                if result_pilot['laps'] >= consecutivesCount:
+                    cons_time, cons_index = best_consecutive_laps(
+                        (data.lap_time for data in result_pilot['pilot_laps']), consecutivesCount)
+                    result_pilot['consecutives'] = round(cons_time, 3)
+                    result_pilot['consecutives_base'] = consecutivesCount
+                    result_pilot['consecutive_lap_start'] = cons_index
+                else:
+                    result_pilot['consecutives'] = round(result_pilot['total_time_laps'], 3)
+                    result_pilot['consecutives_base'] = result_pilot['laps']
+                    result_pilot['consecutive_lap_start'] = None
 
-        else:
-            result_pilot['last_lap'] = None
-            result_pilot['average_lap'] = 0
-            result_pilot['fastest_lap'] = 0
-            source = None
-            result_pilot['time_behind'] = None
-            result_pilot['consecutives'] = None
-            result_pilot['consecutives_base'] = 0
-            result_pilot['consecutive_lap_start'] = None
-
-        result_pilot['fastest_lap_source'] = source
-        result_pilot['consecutives_source'] = source
+            else:
+                result_pilot['last_lap'] = None
+                result_pilot['average_lap'] = 0
+                result_pilot['fastest_lap'] = 0
+                source = None
+                result_pilot['time_behind'] = None
+                result_pilot['consecutives'] = None
+                result_pilot['consecutives_base'] = 0
+                result_pilot['consecutive_lap_start'] = None
+
+            result_pilot['fastest_lap_source'] = source
+            result_pilot['consecutives_source'] = source
 
     do_gevent_sleep()
 
     # Combine leaderboard
     for result_pilot in leaderboard:
         # Clean up interim data
-        result_pilot.pop('pilot_crossings')
-        result_pilot.pop('pilot_laps')
+        result_pilot.pop('pilot_crossings', None)
+        result_pilot.pop('pilot_laps', None)
+        result_pilot.pop('seat_stats', None)
 
         # shift output keys
         result_pilot['total_time_raw'] = result_pilot['total_time']
@@ -571,10 +540,15 @@ def _do_calc_leaderboard(racecontext, **params):
         if race_format and race_format.start_behavior == StartBehavior.STAGGERED:
             result_pilot['total_time_raw'] = result_pilot['total_time_laps_raw']
 
+    # rows are formatted once, then given a shallow copy per view (views differ only in order and position)
+    time_format = racecontext.serverconfig.get_item('UI', 'timeFormat')
+    for result_pilot in leaderboard:
+        format_leaderboard_row_times(result_pilot, time_format)
+
     leaderboard_output = {
-        'by_race_time': copy.deepcopy(leaderboard),
-        'by_fastest_lap': copy.deepcopy(leaderboard),
-        'by_consecutives': copy.deepcopy(leaderboard)
+        'by_race_time': leaderboard,
+        'by_fastest_lap': [copy_leaderboard_row(row) for row in leaderboard],
+        'by_consecutives': [copy_leaderboard_row(row) for row in leaderboard]
     }
 
     if race_format and race_format.win_condition == WinCondition.FASTEST_CONSECUTIVE:
@@ -599,31 +573,60 @@ def _do_calc_leaderboard(racecontext, **params):
         leaderboard_output['meta']['primary_points'] = True
 
     leaderboard_output = sort_and_rank_leaderboards(racecontext, leaderboard_output)
-    leaderboard_output = format_leaderboard_times(racecontext, leaderboard_output)
     leaderboard_output = add_fastest_race_lap_meta(racecontext, leaderboard_output)
 
     return leaderboard_output
 
+def get_time_behind(result_pilot, leaderboard, first_lap_flag):
+    # seconds behind the first pilot to complete the same lap (current race)
+    current_lap = result_pilot['seat_stats'].last_crossing
+    cur_lap_num = current_lap.lap_number
+    # check if pilot has completed at least first lap
+    if cur_lap_num is None or not (cur_lap_num > 0 or first_lap_flag):
+        return None
+
+    ldr_lap_ts = None
+    for chk_pilot in leaderboard:
+        chk_lap_ts = chk_pilot['seat_stats'].get_lap_time_stamp(cur_lap_num)
+        if chk_lap_ts is not None and (ldr_lap_ts is None or chk_lap_ts < ldr_lap_ts):
+            ldr_lap_ts = chk_lap_ts
+
+    # if another pilot is leader on lap
+    if ldr_lap_ts is not None and current_lap.lap_time_stamp > ldr_lap_ts:
+        return round(current_lap.lap_time_stamp - ldr_lap_ts, 3)
+    return None
+
+def format_leaderboard_row_times(result_pilot, time_format):
+    result_pilot['total_time'] = RHUtils.format_time_to_str(result_pilot['total_time_raw'], time_format)
+    result_pilot['total_time_laps'] = RHUtils.format_time_to_str(result_pilot['total_time_laps_raw'], time_format)
+    result_pilot['average_lap'] = RHUtils.format_time_to_str(result_pilot['average_lap_raw'], time_format)
+    result_pilot['fastest_lap'] = RHUtils.format_time_to_str(result_pilot['fastest_lap_raw'], time_format)
+    if result_pilot.get('time_behind_raw'):
+        result_pilot['time_behind'] = RHUtils.format_time_to_str(result_pilot['time_behind_raw'], time_format)
+    else:
+        result_pilot.pop('time_behind', None)
+        result_pilot.pop('time_behind_raw', None)
+    result_pilot['consecutives'] = RHUtils.format_time_to_str(result_pilot['consecutives_raw'], time_format)
+    if result_pilot.get('last_lap_raw'):
+        result_pilot['last_lap'] = RHUtils.format_time_to_str(result_pilot['last_lap_raw'], time_format)
+
 def format_leaderboard_times(racecontext, all_leaderboards):
     time_format = racecontext.serverconfig.get_item('UI', 'timeFormat')
     for key, leaderboard in all_leaderboards.items():
         if key != 'meta':
             for result_pilot in leaderboard:
-                result_pilot['total_time'] = RHUtils.format_time_to_str(result_pilot['total_time_raw'], time_format)
-                result_pilot['total_time_laps'] = RHUtils.format_time_to_str(result_pilot['total_time_laps_raw'], time_format)
-                result_pilot['average_lap'] = RHUtils.format_time_to_str(result_pilot['average_lap_raw'], time_format)
-                result_pilot['fastest_lap'] = RHUtils.format_time_to_str(result_pilot['fastest_lap_raw'], time_format)
-                if result_pilot.get('time_behind_raw'):
-                    result_pilot['time_behind'] = RHUtils.format_time_to_str(result_pilot['time_behind_raw'], time_format)
-                else:
-                    result_pilot.pop('time_behind', None)
-                    result_pilot.pop('time_behind_raw', None)
-                result_pilot['consecutives'] = RHUtils.format_time_to_str(result_pilot['consecutives_raw'], time_format)
-                if result_pilot.get('last_lap_raw'):
-                    result_pilot['last_lap'] = RHUtils.format_time_to_str(result_pilot['last_lap_raw'], time_format)
+                format_leaderboard_row_times(result_pilot, time_format)
 
     return all_leaderboards
 
+def copy_leaderboard_row(row):
+    '''Copy of leaderboard row that can be ranked and modified independently of the original'''
+    row = dict(row)
+    for key in ('fastest_lap_source', 'consecutives_source'):
+        if row.get(key):
+            row[key] = dict(row[key])
+    return row
+
 def sort_and_rank_leaderboards(racecontext, all_leaderboards):
     consecutivesCount = all_leaderboards['meta']['consecutives_count']
 
@@ -748,130 +751,69 @@ def add_fastest_race_lap_meta(racecontext, all_leaderboards):
     return all_leaderboards
 
 def build_leaderboard_race(racecontext, heat_id, round_id):
-    result = calc_leaderboard(racecontext, heat_id=heat_id, round_id=round_id)
+    # concurrent requests share one build, so the filter runs once on the shared result
+    return leaderboard_builds.run(('race', heat_id, round_id), _do_build_leaderboard_race, racecontext, heat_id, round_id)
+
+def _do_build_leaderboard_race(racecontext, heat_id, round_id):
+    result = _do_calc_leaderboard(racecontext, heat_id=heat_id, round_id=round_id)
     return racecontext.filters.run_filters(Flt.LEADERBOARD_BUILD_RACE, result, {
         'heat_id': heat_id,
         'round_id': round_id
     })
 
 def build_leaderboard_heat(racecontext, heat):
-    leaderboard = {}
+    aggregate = LeaderboardAggregate(racecontext)
     races = racecontext.rhdata.get_savedRaceMetas_by_heat(heat.id)
     for race in races:
-        race_result = racecontext.rhdata.get_results_savedRaceMeta(race)
-        leaderboard = build_incremental(racecontext, race_result, leaderboard, transient=True)
+        aggregate.add(racecontext.rhdata.get_results_savedRaceMeta(race))
 
-    leaderboard = format_leaderboard_times(racecontext, leaderboard)
-    leaderboard = sort_and_rank_leaderboards(racecontext, leaderboard)
-    leaderboard = add_fastest_race_lap_meta(racecontext, leaderboard)
+    leaderboard = finish_aggregate_leaderboard(racecontext, aggregate)
 
     return racecontext.filters.run_filters(Flt.LEADERBOARD_BUILD_HEAT, leaderboard, {
         'heat_id': heat.id
     })
 
 def build_leaderboard_class(racecontext, race_class):
-    leaderboard = {}
+    aggregate = LeaderboardAggregate(racecontext)
     heats = racecontext.rhdata.get_heats_by_class(race_class.id)
     for heat in heats:
-        heat_result = racecontext.rhdata.get_results_heat(heat)
-        leaderboard = build_incremental(racecontext, heat_result, leaderboard, transient=True)
+        aggregate.add(racecontext.rhdata.get_results_heat(heat))
 
-    leaderboard = format_leaderboard_times(racecontext, leaderboard)
-    leaderboard = sort_and_rank_leaderboards(racecontext, leaderboard)
-    leaderboard = add_fastest_race_lap_meta(racecontext, leaderboard)
+    leaderboard = finish_aggregate_leaderboard(racecontext, aggregate)
 
     return racecontext.filters.run_filters(Flt.LEADERBOARD_BUILD_CLASS, leaderboard, {
         'class_id': race_class.id
     })
 
 def build_leaderboard_event(racecontext):
-    leaderboard = {}
+    aggregate = LeaderboardAggregate(racecontext)
     all_classes = racecontext.rhdata.get_raceClasses()
     for race_class in all_classes:
-        class_result = racecontext.rhdata.get_results_raceClass(race_class)
-        leaderboard = build_incremental(racecontext, class_result, leaderboard, transient=True)
+        aggregate.add(racecontext.rhdata.get_results_raceClass(race_class))
 
     unclassified_heats = racecontext.rhdata.get_heats_by_class(RHUtils.CLASS_ID_NONE)
     for heat in unclassified_heats:
-        heat_result = racecontext.rhdata.get_results_heat(heat)
-        leaderboard = build_incremental(racecontext, heat_result, leaderboard, transient=True)
+        aggregate.add(racecontext.rhdata.get_results_heat(heat))
 
-    leaderboard = format_leaderboard_times(racecontext, leaderboard)
-    leaderboard = sort_and_rank_leaderboards(racecontext, leaderboard)
-    leaderboard = add_fastest_race_lap_meta(racecontext, leaderboard)
+    leaderboard = finish_aggregate_leaderboard(racecontext, aggregate)
 
     return racecontext.filters.run_filters(Flt.LEADERBOARD_BUILD_EVENT, leaderboard)
 
 def build_incremental(racecontext, merge_input, source_input, transient=False):
-    merge_result = copy.deepcopy(merge_input)
-    source_result = copy.deepcopy(source_input)
-
-    if not source_result:
-        return merge_result
-
-    if not merge_result:
-        return source_result
-
-    output_result = {}
-    for key, value in source_result.items():
-        output_result[key] = value
-        if key == 'meta':
-            output_result['meta'].pop('fastest_race_lap_data', None)
-            for meta_key, source_meta_value in output_result['meta'].items():
-                if merge_result['meta'].get(meta_key) and merge_result['meta'][meta_key] != source_meta_value:
-                    if meta_key == 'primary_leaderboard':
-                        output_result['meta']['primary_leaderboard'] = 'by_race_time'
-                    elif meta_key == 'win_condition':
-                        output_result['meta']['win_condition'] = WinCondition.NONE
-                    elif meta_key == 'team_racing_mode':
-                        output_result['meta']['team_racing_mode'] = False
-                    elif meta_key == 'start_behavior':
-                        output_result['meta']['start_behavior'] = None
-                    elif meta_key == 'consecutives_count':
-                        output_result['meta']['consecutives_count'] = racecontext.rhdata.get_optionInt('consecutivesCount', 3)
-                    elif meta_key == 'primary_points':
-                        output_result['meta']['primary_points'] = False
+    if not source_input:
+        return merge_input
 
-        else:
-            for lb_line in merge_result[key]:
-                for idx, item in enumerate(source_result[key]):
-                    if item['pilot_id'] == lb_line['pilot_id']:
-                        # simple incremental adds
-                        race_result_updates = {
-                            'laps': item['laps'] + lb_line['laps'],
-                            'starts': item['starts'] + lb_line['starts'],
-                            'total_time_raw': item['total_time_raw'] + lb_line['total_time_raw'],
-                            'total_time_laps_raw': item['total_time_laps_raw'] + lb_line['total_time_laps_raw'],
-                            'points': (item['points'] if 'points' in item else 0) + (lb_line['points'] if 'points' in lb_line else 0)
-                        }
+    if not merge_input:
+        return source_input
 
-                        # average lap
-                        if race_result_updates['laps']:
-                            race_result_updates['average_lap_raw'] = race_result_updates['total_time_laps_raw'] / race_result_updates['laps']
-
-                        # fastest lap & source
-                        if not item['fastest_lap_raw'] or (lb_line['fastest_lap_raw'] and lb_line['fastest_lap_raw'] < item['fastest_lap_raw']):
-                            race_result_updates['fastest_lap_raw'] = lb_line['fastest_lap_raw']
-                            race_result_updates['fastest_lap_source'] = lb_line['fastest_lap_source']
-
-                        # consecutives & source
-                        if lb_line['consecutives_base'] and \
-                            ( lb_line['consecutives_base'] > item['consecutives_base'] or \
-                              ( lb_line['consecutives_base'] == item['consecutives_base'] and \
-                              lb_line['consecutives_raw'] < item['consecutives_raw']) \
-                            ):
-                            race_result_updates['consecutives_base'] = lb_line['consecutives_base']
-                            race_result_updates['consecutives_raw'] = lb_line['consecutives_raw']
-                            race_result_updates['consecutive_lap_start'] = lb_line['consecutive_lap_start']
-                            race_result_updates['consecutives_source'] = lb_line['consecutives_source']
-
-                        output_result[key][idx].update(race_result_updates)
-                        output_result[key][idx].pop('time_behind', None)
-                        output_result[key][idx].pop('time_behind_raw', None)
-                        break
-                else:
-                    # no match, make new line
-                    output_result[key].append(lb_line)
+    aggregate = LeaderboardAggregate(racecontext)
+    aggregate.add(source_input)
+    aggregate.add(merge_input)
+    return finish_aggregate_leaderboard(racecontext, aggregate, transient)
+
+def finish_aggregate_leaderboard(racecontext, aggregate, transient=False):
+    '''Formats and ranks aggregated leaderboards, then runs the incremental-build filter if results were merged'''
+    output_result = aggregate.get_result()
 
     #re-sort lbs
     if not transient:
@@ -879,8 +821,116 @@ def build_incremental(racecontext, merge_input, source_input, transient=False):
         output_result = sort_and_rank_leaderboards(racecontext, output_result)
         output_result = add_fastest_race_lap_meta(racecontext, output_result)
 
-    return racecontext.filters.run_filters(Flt.LEADERBOARD_BUILD_INCREMENTAL, output_result)
-
+    if aggregate.count > 1:
+        output_result = racecontext.filters.run_filters(Flt.LEADERBOARD_BUILD_INCREMENTAL, output_result)
+    return output_result
+
+class LeaderboardAggregate():
+    '''Folds leaderboards together into per-pilot totals.
+
+    Rows are keyed by pilot_id so each merge is a dict lookup per row. Input
+    results are not modified; rows are copied as they are first added.'''
+    def __init__(self, racecontext):
+        self._racecontext = racecontext
+        self.count = 0      # number of results folded
+        self._meta = None
+        self._keys = []     # result keys, in input order
+        self._boards = {}   # leaderboard key -> list of rows
+        self._index = {}    # leaderboard key -> {pilot_id: row}
+
+    def add(self, result):
+        if not result:
+            return
+
+        if not self.count:
+            self._keys = list(result.keys())
+            for key, value in result.items():
+                if key == 'meta':
+                    self._meta = dict(value)
+                else:
+                    rows = [copy_leaderboard_row(row) for row in value]
+                    index = {}
+                    for row in rows:
+                        index.setdefault(row['pilot_id'], row)
+                    self._boards[key] = rows
+                    self._index[key] = index
+            self.count = 1
+            return
+
+        if self._meta is not None:
+            self._merge_meta(result.get('meta', {}))
+
+        for key, rows in self._boards.items():
+            index = self._index[key]
+            for lb_line in result.get(key, []):
+                item = index.get(lb_line['pilot_id'])
+                if item is not None:
+                    self._merge_row(item, lb_line)
+                else:
+                    # no match, make new line
+                    item = copy_leaderboard_row(lb_line)
+                    rows.append(item)
+                    index[item['pilot_id']] = item
+
+        self.count += 1
+
+    def _merge_meta(self, merge_meta):
+        meta = self._meta
+        meta.pop('fastest_race_lap_data', None)
+        for meta_key, source_meta_value in meta.items():
+            if merge_meta.get(meta_key) and merge_meta[meta_key] != source_meta_value:
+                if meta_key == 'primary_leaderboard':
+                    meta['primary_leaderboard'] = 'by_race_time'
+                elif meta_key == 'win_condition':
+                    meta['win_condition'] = WinCondition.NONE
+                elif meta_key == 'team_racing_mode':
+                    meta['team_racing_mode'] = False
+                elif meta_key == 'start_behavior':
+                    meta['start_behavior'] = None
+                elif meta_key == 'consecutives_count':
+                    meta['consecutives_count'] = self._racecontext.rhdata.get_optionInt('consecutivesCount', 3)
+                elif meta_key == 'primary_points':
+                    meta['primary_points'] = False
+
+    def _merge_row(self, item, lb_line):
+        # simple incremental adds
+        item['laps'] += lb_line['laps']
+        item['starts'] += lb_line['starts']
+        item['total_time_raw'] += lb_line['total_time_raw']
+        item['total_time_laps_raw'] += lb_line['total_time_laps_raw']
+        item['points'] = item.get('points', 0) + lb_line.get('points', 0)
+
+        # average lap
+        if item['laps']:
+            item['average_lap_raw'] = item['total_time_laps_raw'] / item['laps']
+
+        # fastest lap & source
+        if not item['fastest_lap_raw'] or (lb_line['fastest_lap_raw'] and lb_line['fastest_lap_raw'] < item['fastest_lap_raw']):
+            item['fastest_lap_raw'] = lb_line['fastest_lap_raw']
+            item['fastest_lap_source'] = dict(lb_line['fastest_lap_source']) if lb_line['fastest_lap_source'] else lb_line['fastest_lap_source']
+
+        # consecutives & source
+        if lb_line['consecutives_base'] and \
+            ( lb_line['consecutives_base'] > item['consecutives_base'] or \
+              ( lb_line['consecutives_base'] == item['consecutives_base'] and \
+              lb_line['consecutives_raw'] < item['consecutives_raw']) \
+            ):
+            item['consecutives_base'] = lb_line['consecutives_base']
+            item['consecutives_raw'] = lb_line['consecutives_raw']
+            item['consecutive_lap_start'] = lb_line['consecutive_lap_start']
+            item['consecutives_source'] = dict(lb_line['consecutives_source']) if lb_line['consecutives_source'] else lb_line['consecutives_source']
+
+        item.pop('time_behind', None)
+        item.pop('time_behind_raw', None)
+
+    def get_result(self):
+        if not self.count:
+            return {}
+
+        output_result = {}
+        for key in self._keys:
+            output_result[key] = self._meta if key == 'meta' else self._boards[key]
+        return output_result
 
 def calc_team_leaderboard(racecontext):
     '''Calculates and returns team-racing info.'''
@@ -965,10 +1015,10 @@ def calc_team_leaderboard(racecontext):
             })
 
         # sort race_time
-        leaderboard_by_race_time = copy.deepcopy(sorted(leaderboard, key = lambda x: (
+        leaderboard_by_race_time = [dict(row) for row in sorted(leaderboard, key = lambda x: (
             -x['laps'],
             x['average_lap_raw'] if x['average_lap_raw'] > 0 else float('inf'),
-        )))
+        ))]
 
         # determine ranking
         last_rank = None
@@ -984,11 +1034,11 @@ def calc_team_leaderboard(racecontext):
             row['position'] = pos
 
         # sort fastest lap
-        leaderboard_by_fastest_lap = copy.deepcopy(sorted(leaderboard, key = lambda x: (
+        leaderboard_by_fastest_lap = [dict(row) for row in sorted(leaderboard, key = lambda x: (
             -x['contribution_amt'],
             x['average_fastest_lap_raw'] if x['average_fastest_lap_raw'] > 0 else float('inf'),
             -x['laps'],
-        )))
+        ))]
 
         # determine ranking
         last_rank = None
@@ -1004,11 +1054,11 @@ def calc_team_leaderboard(racecontext):
             row['position'] = pos
 
         # sort consecutives
-        leaderboard_by_consecutives = copy.deepcopy(sorted(leaderboard, key = lambda x: (
+        leaderboard_by_consecutives = [dict(row) for row in sorted(leaderboard, key = lambda x: (
             -x['contribution_amt'],
             x['average_consecutives_raw'] if x['average_consecutives_raw'] > 0 else float('inf'),
             -x['laps'],
-        )))
+        ))]
 
         # determine ranking
         last_rank = None
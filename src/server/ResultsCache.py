@@ -0,0 +1,124 @@
+'''
+Results Cache
+
+Tracks validity of the race, heat, class, ranking and event result caches
+as an in-memory dependency graph. Results flow upward:
+
+  laps -> race -> heat -> class -> ranking
+                       \\        \\-> event
+                        \\-> event (heats without a class)
+
+Invalidating a node marks it and every result built from it as dirty, so
+unrelated caches keep their builds and are not recomputed. Dirty nodes are
+rebuilt lazily when next requested.
+
+Status is held as {data_ver, build_ver} tokens. The stored (database) form
+is kept in sync for persistence across restarts, but is only parsed when it
+differs from the last known value.
+
+Built results are stored per top-level key ('meta', 'by_race_time', ...)
+in the results_cache table, so a single leaderboard can be loaded without
+unpacking the rest. Each section is a compressed pickle tagged with
+RESULTS_FORMAT_VERSION; sections with another version are treated as a
+cache miss and rebuilt.
+
+'''
+
+import json
+import logging
+import pickle
+import zlib
+from time import monotonic
+
+logger = logging.getLogger(__name__)
+
+RESULTS_FORMAT_VERSION = 1
+RESULTS_WHOLE_SECTION = '' # section name used when results are not a dict
+
+def pack_results_section(value):
+    return zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+def unpack_results_section(data):
+    return pickle.loads(zlib.decompress(data))
+
+class CacheNode:
+    RACE = 'race'
+    HEAT = 'heat'
+    CLASS = 'class'
+    RANKING = 'ranking'
+    EVENT = 'event'
+
+class ResultsCacheGraph():
+    def __init__(self, dependents_fn):
+        self._dependents_fn = dependents_fn # returns keys of results built from a given key
+        self._status = {} # key -> (stored status string, status dict)
+
+    def status(self, key, stored):
+        '''Returns parsed status for 'stored' value of key, or None if invalid'''
+        entry = self._status.get(key)
+        if entry and entry[0] == stored:
+            return entry[1]
+
+        try:
+            status = json.loads(stored)
+        except (TypeError, ValueError):
+            status = None
+
+        if not isinstance(status, dict) or 'data_ver' not in status or 'build_ver' not in status:
+            self._status.pop(key, None)
+            return None
+
+        self._status[key] = (stored, status)
+        return status
+
+    def is_valid(self, status):
+        return status['data_ver'] == status['build_ver']
+
+    def mark_dirty(self, key, token=None):
+        '''Sets new status for key; returns value to store'''
+        if token is None:
+            token = monotonic()
+
+        status = {
+            'data_ver': token,
+            'build_ver': None
+        }
+        stored = json.dumps(status)
+        self._status[key] = (stored, status)
+        return stored
+
+    def mark_built(self, key, stored, token):
+        '''Marks key as built for token; returns value to store or None on token mismatch'''
+        status = self.status(key, stored)
+        if status is None:
+            logger.error('Ignoring cache write for {} {}: status is invalid'.format(*key))
+            return None
+
+        if status['data_ver'] != token:
+            logger.info('Ignoring cache write; token mismatch {} / {}'.format(status['data_ver'], token))
+            return None
+
+        status = {
+            'data_ver': token,
+            'build_ver': token
+        }
+        stored = json.dumps(status)
+        self._status[key] = (stored, status)
+        return stored
+
+    def invalidation_set(self, key):
+        '''Returns key and all keys whose results depend on it'''
+        keys = [key]
+        idx = 0
+        while idx < len(keys):
+            for dependent in self._dependents_fn(keys[idx]):
+                if dependent not in keys:
+                    keys.append(dependent)
+            idx += 1
+        return keys
+
+    def forget(self, key=None):
+        if key is None:
+            self._status = {}
+        else:
+            self._status.pop(key, None)
@@ -0,0 +1,127 @@
+'''
+Results Prebuilder
+
+Rebuilds invalidated result caches in a background worker instead of inline
+in save/resave handlers. Builds are queued by priority (race, then current
+heat, other heats, classes, class rankings, event, and finally the results
+page cache) and duplicate requests are merged.
+
+The worker does not start new builds while a race is staging or running, so
+timing-critical greenlets are never competing with cache builds. Results
+requested while the worker is paused are still built on demand by RHData.
+
+'''
+
+import logging
+import itertools
+import gevent
+import gevent.event
+import gevent.queue
+from eventmanager import Evt
+from RHRace import RaceStatus
+from RHUtils import catchLogExceptionsWrapper
+import RHUtils
+from FlaskAppObj import APP
+
+logger = logging.getLogger(__name__)
+
+class BuildPriority:
+    RACE = 0
+    CURRENT_HEAT = 1
+    HEAT = 2
+    CLASS = 3
+    RANKING = 4
+    EVENT = 5
+    PAGE = 6
+
+class ResultsPrebuilder:
+    _PAUSE_CHECK_SECS = 1.0
+
+    def __init__(self, RaceContext, Events):
+        self._racecontext = RaceContext
+        self._Events = Events
+        self._queue = gevent.queue.PriorityQueue()
+        self._queued = set() # build keys waiting in queue
+        self._counter = itertools.count() # keeps queue order stable within a priority
+        self._wake = gevent.event.Event()
+        self._worker = None
+
+        for event in [Evt.RACE_ABORT, Evt.RACE_STOP, Evt.LAPS_SAVE, Evt.LAPS_DISCARD, Evt.LAPS_CLEAR]:
+            self._Events.on(event, 'results_prebuilder', self._on_race_idle, {}, 200, True)
+
+    def _on_race_idle(self, _args):
+        self._wake.set()
+
+    def schedule(self, race_id=None, heat_id=None, class_id=None, event=True, page=True):
+        '''Queues cache builds for the given race/heat/class and their dependents'''
+        rhdata = self._racecontext.rhdata
+        if race_id and not heat_id:
+            race = rhdata.get_savedRaceMeta(race_id)
+            heat_id = race.heat_id if race else None
+        if heat_id and not class_id:
+            heat = rhdata.get_heat(heat_id)
+            if heat and heat.class_id != RHUtils.CLASS_ID_NONE:
+                class_id = heat.class_id
+
+        if race_id:
+            self._put(BuildPriority.RACE, ('race', race_id))
+        if heat_id:
+            if heat_id == self._racecontext.race.current_heat:
+                self._put(BuildPriority.CURRENT_HEAT, ('heat', heat_id))
+            else:
+                self._put(BuildPriority.HEAT, ('heat', heat_id))
+        if class_id:
+            self._put(BuildPriority.CLASS, ('class', class_id))
+            self._put(BuildPriority.RANKING, ('ranking', class_id))
+        if event:
+            self._put(BuildPriority.EVENT, ('event', None))
+        if page:
+            # drop stale page data now; it is rebuilt after the result caches
+            self._racecontext.pagecache.set_valid(False)
+            self._put(BuildPriority.PAGE, ('page', None))
+
+        if self._worker is None or self._worker.dead:
+            self._worker = gevent.spawn(self._run)
+
+    def _put(self, priority, key):
+        if key not in self._queued:
+            self._queued.add(key)
+            self._queue.put((priority, next(self._counter), key))
+
+    def is_paused(self):
+        race = self._racecontext.race
+        return race is not None and race.race_status in [RaceStatus.STAGING, RaceStatus.RACING]
+
+    def pending(self):
+        return len(self._queued)
+
+    def _run(self):
+        APP.app_context().push()
+        while True:
+            _priority, _count, key = self._queue.get()
+            while self.is_paused():
+                self._wake.clear()
+                self._wake.wait(self._PAUSE_CHECK_SECS)
+            self._queued.discard(key)
+            self._build(key)
+            gevent.sleep(0.001)
+
+    @catchLogExceptionsWrapper
+    def _build(self, key):
+        node_type, node_id = key
+        rhdata = self._racecontext.rhdata
+        with rhdata.get_db_session_handle():  # make sure DB session/connection is cleaned up
+            if node_type == 'race':
+                rhdata.get_results_savedRaceMeta(node_id)
+            elif node_type == 'heat':
+                rhdata.get_results_heat(node_id)
+            elif node_type == 'class':
+                rhdata.get_results_raceClass(node_id)
+            elif node_type == 'ranking':
+                rhdata.get_ranking_raceClass(node_id)
+            elif node_type == 'event':
+                rhdata.get_results_event()
+            elif node_type == 'page':
+                self._racecontext.pagecache.get_cache()
+                self._racecontext.rhui.emit_result_data()
+        logger.debug('Prebuilt {} {} results'.format(node_type, node_id if node_id is not None else ''))
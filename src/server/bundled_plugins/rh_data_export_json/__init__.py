@@ -179,7 +179,16 @@ def assemble_racemeta_complete(rhapi):
     return payload
 
 def assemble_pilotrace_complete(rhapi):
-    payload = rhapi.db.pilotruns
+    payload = []
+    for pilotrace in rhapi.db.pilotruns:
+        fields = AlchemyEncoder().default(pilotrace)
+        # RSSI history may be stored packed; export it decoded as before
+        fields.pop('history_data', None)
+        if pilotrace.history_data is not None:
+            history_values, history_times = rhapi.db.pilotrun_history(pilotrace)
+            fields['history_values'] = json.dumps(history_values.tolist())
+            fields['history_times'] = json.dumps(history_times.tolist())
+        payload.append(fields)
     return payload
 
 def assemble_racelap_complete(rhapi):
@@ -130,10 +130,6 @@ class Calibration:
         heat = self._racecontext.rhdata.get_heat(self._racecontext.race.current_heat)
         pilot = self._racecontext.rhdata.get_pilot_from_heatNode(self._racecontext.race.current_heat, seat_index)
         current_class = heat.class_id
-        races = self._racecontext.rhdata.get_savedRaceMetas()
-        races.sort(key=lambda x: x.id, reverse=True)
-        pilotRaces = self._racecontext.rhdata.get_savedPilotRaces()
-        pilotRaces.sort(key=lambda x: x.id, reverse=True)
 
         # test for disabled node
         if pilot is RHUtils.PILOT_ID_NONE or node.frequency is RHUtils.FREQUENCY_ID_NONE:
@@ -144,55 +140,45 @@ class Calibration:
             }
 
         # test for same heat, same node
-        for race in races:
-            if race.heat_id == heat.id:
-                for pilotRace in pilotRaces:
-                    if pilotRace.race_id == race.id and \
-                        pilotRace.node_index == seat_index and \
-                        pilotRace.frequency == node.frequency:
-                        logger.debug('Node {0} calibration: found same pilot+node in same heat'.format(node.index+1))
-                        return {
-                            'enter_at_level': pilotRace.enter_at,
-                            'exit_at_level': pilotRace.exit_at
-                        }
-                break
-
-        # test for same class, same pilot, same node
-        for race in races:
-            if race.class_id == current_class:
-                for pilotRace in pilotRaces:
-                    if pilotRace.race_id == race.id and \
-                        pilotRace.node_index == seat_index and \
-                        pilotRace.pilot_id == pilot and \
-                        pilotRace.frequency == node.frequency:
-                        logger.debug('Node {0} calibration: found same pilot+node in other heat with same class'.format(node.index+1))
-                        return {
-                            'enter_at_level': pilotRace.enter_at,
-                            'exit_at_level': pilotRace.exit_at
-                        }
-                break
-
-        # test for same pilot, same node
-        for pilotRace in pilotRaces:
-            if pilotRace.node_index == seat_index and \
-                pilotRace.pilot_id == pilot and \
-                pilotRace.frequency == node.frequency:
-                logger.debug('Node {0} calibration: found same pilot+node in other heat with other class'.format(node.index+1))
+        race = self._racecontext.rhdata.get_last_savedRaceMeta_by_heat(heat.id)
+        if race:
+            pilotRace = self._racecontext.rhdata.get_savedPilotRace_by_savedRaceMeta_node(race.id, seat_index)
+            if pilotRace and pilotRace.frequency == node.frequency:
+                logger.debug('Node {0} calibration: found same pilot+node in same heat'.format(node.index+1))
                 return {
                     'enter_at_level': pilotRace.enter_at,
                     'exit_at_level': pilotRace.exit_at
                 }
 
-        # test for same node
-        for pilotRace in pilotRaces:
-            if pilotRace.node_index == seat_index and \
-                pilotRace.frequency == node.frequency:
-                logger.debug('Node {0} calibration: found same node in other heat'.format(node.index+1))
+        # test for same class, same pilot, same node
+        race = self._racecontext.rhdata.get_last_savedRaceMeta_by_raceClass(current_class)
+        if race:
+            pilotRace = self._racecontext.rhdata.get_savedPilotRace_by_savedRaceMeta_node(race.id, seat_index)
+            if pilotRace and pilotRace.pilot_id == pilot and pilotRace.frequency == node.frequency:
+                logger.debug('Node {0} calibration: found same pilot+node in other heat with same class'.format(node.index+1))
                 return {
                     'enter_at_level': pilotRace.enter_at,
                     'exit_at_level': pilotRace.exit_at
                 }
 
+        # test for same pilot, same node
+        pilotRace = self._racecontext.rhdata.get_last_savedPilotRace_by_node(seat_index, node.frequency, pilot)
+        if pilotRace:
+            logger.debug('Node {0} calibration: found same pilot+node in other heat with other class'.format(node.index+1))
+            return {
+                'enter_at_level': pilotRace.enter_at,
+                'exit_at_level': pilotRace.exit_at
+            }
+
+        # test for same node
+        pilotRace = self._racecontext.rhdata.get_last_savedPilotRace_by_node(seat_index, node.frequency)
+        if pilotRace:
+            logger.debug('Node {0} calibration: found same node in other heat'.format(node.index+1))
+            return {
+                'enter_at_level': pilotRace.enter_at,
+                'exit_at_level': pilotRace.exit_at
+            }
+
         # fallback
         logger.debug('Node {0} calibration: no calibration hints found, no change'.format(node.index+1))
         context = {
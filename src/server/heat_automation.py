@@ -123,9 +123,11 @@ class HeatAutomator:
                         seed_heat = self._racecontext.rhdata.get_heat(slot.seed_id)
 
                         if seed_heat:
-                            output = self._racecontext.rhdata.get_results_heat(seed_heat)
+                            output = self._racecontext.rhdata.get_results_heat(seed_heat, sections=['meta'])
                             if output:
-                                results = output[output['meta']['primary_leaderboard']]
+                                primary_leaderboard = output['meta']['primary_leaderboard']
+                                output = self._racecontext.rhdata.get_results_heat(seed_heat, sections=[primary_leaderboard])
+                                results = output[primary_leaderboard]
                                 if slot.seed_rank - 1 < len(results):
                                     slot_alteration['pilot'] = results[slot.seed_rank - 1]['pilot_id']
                                 else:
@@ -29,6 +29,17 @@ class InterfaceMapper:
         self._interface_map = []
         self._node_map = []
         self._racecontext = racecontext
+        self._update_node_cache()
+
+    def _update_node_cache(self):
+        # read-only views of the node map, rebuilt only when interfaces or node order change
+        self._nodes = tuple(node_map.object for node_map in self._node_map)
+        self._node_maps = tuple(self._node_map)
+        self._node_map_by_node = {id(node_map.object): node_map for node_map in self._node_map}
+        self._interface_node_maps = tuple(
+            (ifmeta, tuple((idx, node_map) for idx, node_map in enumerate(self._node_map) \
+                           if node_map.interface is ifmeta.interface))
+            for ifmeta in self._interface_map)
 
     def add_interface(self, interface, if_type:InterfaceType, args=None):
         self._interface_map.append(InterfaceMeta(interface, if_type))
@@ -50,6 +61,7 @@ class InterfaceMapper:
                     object=node
                 )
             )
+        self._update_node_cache()
 
     def add_callbacks(self):
         for ifmeta in self._interface_map:
@@ -60,6 +72,7 @@ class InterfaceMapper:
     def reindex_nodes(self):
         for idx, node_map in enumerate(self._node_map):
             node_map.object.index = idx
+        self._update_node_cache()
 
     @property
     def mapped_interfaces(self):
@@ -67,17 +80,16 @@ class InterfaceMapper:
 
     @property
     def nodes(self):
-        nodelist = []
-        for node in self._node_map:
-            nodelist.append(node.object)
-        return nodelist
+        return self._nodes
 
     @property
     def node_map(self):
-        nodelist = []
-        for node in self._node_map:
-            nodelist.append(node)
-        return nodelist
+        return self._node_maps
+
+    @property
+    def interface_node_maps(self):
+        '''(InterfaceMeta, ((node index, NodeMap), ...)) for each interface, in mapped order'''
+        return self._interface_node_maps
 
     def get_rh_interface(self):
         for iface in self._interface_map:
@@ -117,18 +129,21 @@ class InterfaceMapper:
     def set_all_frequencies(self, freqs):
         '''do hardware update for frequencies'''
         logger.debug("Sending frequency values to all nodes: " + str(freqs["f"]))
-        for idx, node in enumerate(self.nodes):
-            self.set_frequency(idx, freqs["f"][idx], freqs["b"][idx], freqs["c"][idx])
+        for _ifmeta, node_maps in self._interface_node_maps:
+            for idx, mapped_node in node_maps:
+                self._set_mapped_frequency(mapped_node, idx, freqs["f"][idx], freqs["b"][idx], freqs["c"][idx])
 
-            self._racecontext.events.trigger(Evt.FREQUENCY_SET, {
-                'nodeIndex': idx,
-                'frequency': freqs["f"][idx],
-                'band': freqs["b"][idx],
-                'channel': freqs["c"][idx]
-            })
+                self._racecontext.events.trigger(Evt.FREQUENCY_SET, {
+                    'nodeIndex': idx,
+                    'frequency': freqs["f"][idx],
+                    'band': freqs["b"][idx],
+                    'channel': freqs["c"][idx]
+                })
 
     def set_frequency(self, node_index, frequency, band, channel):
-        mapped_node = self._node_map[node_index]
+        self._set_mapped_frequency(self._node_map[node_index], node_index, frequency, band, channel)
+
+    def _set_mapped_frequency(self, mapped_node, node_index, frequency, band, channel):
         local_index = mapped_node.index
         result = mapped_node.interface.set_frequency(local_index, frequency, band, channel)
         if result is False:
@@ -143,9 +158,9 @@ class InterfaceMapper:
                            header="Warning", subclass="errors-logged")
 
     def transmit_enter_at_level(self, node, level):
-        for mapped_node in self._node_map:
-            if node == mapped_node:
-                return mapped_node.interface.transmit_enter_at_level(node, level)
+        mapped_node = self._node_map_by_node.get(id(node))
+        if mapped_node:
+            return mapped_node.interface.transmit_enter_at_level(node, level)
         return None
 
     def set_enter_at_level(self, node_index, level):
@@ -154,9 +169,9 @@ class InterfaceMapper:
         return mapped_node.interface.set_enter_at_level(local_index, level)
 
     def transmit_exit_at_level(self, node, level):
-        for mapped_node in self._node_map:
-            if node == mapped_node:
-                return mapped_node.interface.transmit_exit_at_level(node, level)
+        mapped_node = self._node_map_by_node.get(id(node))
+        if mapped_node:
+            return mapped_node.interface.transmit_exit_at_level(node, level)
         return None
 
     def set_exit_at_level(self, node_index, level):
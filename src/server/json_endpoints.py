@@ -157,6 +157,13 @@ def createBlueprint(RaceContext, serverInfo):
 
         return json.dumps({"race": payload}, cls=AlchemyEncoder), 201, {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
 
+    @APP.route('/api/race/pass_trace')
+    def api_race_pass_trace():
+        payload = RaceContext.pass_trace.get_stats()
+        payload['passes'] = RaceContext.pass_trace.get_passes()
+
+        return json.dumps({"pass_trace": payload}), 201, {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'}
+
     @APP.route('/api/race/all')
     def api_race_all():
         heats = []
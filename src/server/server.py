@@ -1,6 +1,6 @@
 '''RotorHazard server script'''
 RELEASE_VERSION = "4.4.1-dev.2" # Public release version code
-SERVER_API = 49 # Server API version
+SERVER_API = 50 # Server API version
 NODE_API_SUPPORTED = 18 # Minimum supported node version
 NODE_API_BEST = 36 # Most recent node API
 JSON_API = 3 # JSON API version
@@ -176,8 +176,11 @@ import heat_automation
 import RHAPI
 from ClusterNodeSet import SecondaryNode, ClusterNodeSet
 import PageCache
+import ResultsPrebuilder
+import PassTrace
 from util.ButtonInputHandler import ButtonInputHandler
 import util.stm32loader as stm32loader
+from util.RssiHistoryDecimate import decimate_history, get_history_window
 from interface_mapper import InterfaceMapper, InterfaceType
 
 # Events manager
@@ -209,6 +212,9 @@ from HeatGenerator import HeatGeneratorManager
 RaceContext = RaceContext.RaceContext(CONFIG_FILE_NAME, CFG_BKP_DIR_NAME)
 RHAPI = RHAPI.RHAPI(RaceContext)
 
+Database.set_storage_profile(RaceContext.serverconfig.get_item('GENERAL', 'DB_STORAGE_PROFILE'), \
+                             RaceContext.serverconfig.get_item('GENERAL', 'DB_PRAGMAS'))
+
 RaceContext.serverstate.server_instance_token = random.random()
 RaceContext.serverstate.program_start_epoch_time = _program_start_epoch_time
 RaceContext.serverstate.program_start_mtonic = _program_start_mtonic
@@ -322,6 +328,8 @@ RaceContext.rhui = RHUI.RHUI(APP, SOCKET_IO, RaceContext, Events) # User Interfa
 RaceContext.rhui.__ = RaceContext.language.__ # Pass translation shortcut
 RaceContext.calibration = calibration.Calibration(RaceContext)
 RaceContext.heatautomator = heat_automation.HeatAutomator(RaceContext)
+RaceContext.results_prebuilder = ResultsPrebuilder.ResultsPrebuilder(RaceContext, Events) # Background results cache builds
+RaceContext.pass_trace = PassTrace.PassTrace(RaceContext, Events) # Opt-in pass-record timing trace
 
 # Wrapper to be used as a decorator on callback functions that do database calls,
 #  so their exception details are sent to the log file (instead of 'stderr')
@@ -760,6 +768,7 @@ def start_background_threads_delayed():
 def connect_handler(auth):
     '''Starts the interface and a heartbeat thread for rssi.'''
     logger.debug('Client connected')
+    RaceContext.rhui.heartbeat_subscribe(request.sid)
     if not RaceContext.serverstate.interface_started:
         start_background_threads()
         RaceContext.serverstate.interface_started = True
@@ -776,6 +785,13 @@ def connect_handler(auth):
 def disconnect_handler(*args):
     '''Emit disconnect event.'''
     logger.debug('Client disconnected')
+    RaceContext.rhui.heartbeat_disconnect(request.sid)
+
+@SOCKET_IO.on('heartbeat_subscribe')
+@catchLogExcWithDBWrapper
+def on_heartbeat_subscribe(data):
+    '''Selects heartbeat format for this client ('full', 'delta', 'binary' or 'none').'''
+    RaceContext.rhui.heartbeat_subscribe(request.sid, data.get('mode', RHUI.HeartbeatMode.FULL))
 
 # Cluster events
 
@@ -2395,10 +2411,7 @@ def on_resave_laps(data):
         }
 
     # Clear caches
-    heat = RaceContext.rhdata.get_heat(heat_id)
-    RaceContext.rhdata.clear_results_heat(heat)
-    RaceContext.rhdata.clear_results_raceClass(heat.class_id)
-    RaceContext.rhdata.clear_results_savedRaceMeta(race_id)
+    RaceContext.rhdata.clear_results_savedRaceMeta(race_id, cascade=True)
 
     RaceContext.rhdata.alter_savedPilotRace(pilotrace_data)
 
@@ -2458,13 +2471,8 @@ def on_resave_laps(data):
         RaceContext.rhui.emit_current_laps()
 
 
-    # spawn thread for updating results caches
-    params = {
-        'race_id': race_id,
-        'heat_id': heat_id,
-        'round_id': round_id,
-    }
-    gevent.spawn(build_atomic_result_caches, params)
+    # queue rebuild of results caches
+    RaceContext.results_prebuilder.schedule(race_id=race_id, heat_id=heat_id)
 
     Events.trigger(Evt.LAPS_RESAVE, {
         'race_id': race_id,
@@ -2483,12 +2491,6 @@ def replace_current_laps(data):
     })
     RaceContext.race.replace_laps(data)
 
-@catchLogExcWithDBWrapper
-def build_atomic_result_caches(params):
-    RaceContext.pagecache.set_valid(False)
-    Results.build_atomic_results(RaceContext.rhdata, params)
-    RaceContext.rhui.emit_result_data()
-
 @SOCKET_IO.on('discard_laps')
 @catchLogExceptionsWrapper
 def on_discard_laps(**kwargs):
@@ -2656,6 +2658,14 @@ def get_race_scheduled(*args):
         'scheduled_at': RaceContext.race.scheduled_time
     })
 
+@SOCKET_IO.on('get_pass_trace')
+@catchLogExceptionsWrapper
+def on_get_pass_trace(data=None):
+    # pass-record timing trace percentiles; never broadcasts to all
+    if data and data.get('clear'):
+        RaceContext.pass_trace.clear()
+    RaceContext.rhui.emit_pass_trace(nobroadcast=True)
+
 @SOCKET_IO.on('save_callouts')
 @catchLogExcWithDBWrapper
 def save_callouts(data):
@@ -2731,19 +2741,55 @@ def get_pilotrace(data):
             else:
                 nodepilot = None
 
+            history_values, history_times = RaceContext.rhdata.get_savedPilotRace_history(pilotrace)
+            if data.get('max_points'):
+                history_values, history_times, decimated = decimate_history(history_values, history_times,
+                                                                            int(data['max_points']))
+            else:
+                history_values = history_values.tolist()
+                history_times = history_times.tolist()
+                decimated = False
+
             emit('race_details', {
                 'pilotrace_id': data['pilotrace_id'],
                 'callsign': nodepilot,
                 'pilot_id': pilotrace.pilot_id,
                 'node_index': pilotrace.node_index,
-                'history_values': json.loads(pilotrace.history_values),
-                'history_times': json.loads(pilotrace.history_times),
+                'history_values': history_values,
+                'history_times': history_times,
+                'history_decimated': decimated,
                 'laps': laps,
                 'enter_at': pilotrace.enter_at,
                 'exit_at': pilotrace.exit_at,
                 'marshal_type': pilotrace.marshal_type
             })
 
+@SOCKET_IO.on('get_pilotrace_history')
+@catchLogExcWithDBWrapper
+def get_pilotrace_history(data):
+    '''Sends saved RSSI history for a time window, decimated if 'max_points' is given'''
+    history = RaceContext.rhdata.get_savedPilotRace_history(data['pilotrace_id'])
+    if history:
+        start_time = data.get('start_time')
+        end_time = data.get('end_time')
+        if data.get('max_points'):
+            history_values, history_times, decimated = decimate_history(*history, int(data['max_points']),
+                                                                        start_time, end_time)
+        else:
+            first, last = get_history_window(*history, start_time, end_time)
+            history_values = history[0][first:last].tolist()
+            history_times = history[1][first:last].tolist()
+            decimated = False
+
+        emit('pilotrace_history', {
+            'pilotrace_id': data['pilotrace_id'],
+            'start_time': start_time,
+            'end_time': end_time,
+            'history_values': history_values,
+            'history_times': history_times,
+            'history_decimated': decimated
+        })
+
 @SOCKET_IO.on('check_bpillfw_file')
 @catchLogExceptionsWrapper
 def check_bpillfw_file(data):
@@ -2941,7 +2987,7 @@ def heartbeat_thread_function():
         try:
             node_data = RaceContext.interface.get_heartbeat_json()
 
-            SOCKET_IO.emit('heartbeat', node_data)
+            RaceContext.rhui.emit_heartbeat(node_data)
             heartbeat_thread_function.iter_tracker += 1
 
             if RaceContext.serverstate.enable_heartbeat_event:
@@ -3079,6 +3125,7 @@ def ms_from_program_start():
     return milli_sec
 
 def pass_record_callback(node, lap_timestamp_absolute, source, **kwargs):
+    kwargs['trace'] = RaceContext.pass_trace.begin(node.index, kwargs.pop('update_times', None))
     RaceContext.race.pass_invoke_func_queue_obj.put(RaceContext.race.add_lap, node, lap_timestamp_absolute, source, **kwargs)
 
 @catchLogExcWithDBWrapper
@@ -3705,6 +3752,7 @@ def rh_program_initialize(reg_endpoints_flag=True):
 
         # RotorHazard events dispatch
         Events.on(Evt.UI_DISPATCH, 'ui_dispatch_event', RaceContext.rhui.dispatch_quickbuttons, {}, 50)
+        Events.on(Evt.CONFIG_SET, 'time_format_cache', RHUtils.clear_time_format_cache, {}, 50)
 
         # Plugin handling
         plugin_modules = []
@@ -1113,6 +1113,9 @@ var rotorhazard = {
 	admin: false, // whether to show admin options in nav
 	show_messages: true, // whether to display messages
 	graphing: false, // currently graphing RSSI
+	heartbeat_mode: null, // heartbeat format for this page (default: 'full' if page listens for 'heartbeat', otherwise 'none')
+	heartbeat_data: null, // node data from 'heartbeat_delta'
+	heartbeat_seq: null, // sequence number of heartbeat_data
 	primaryPilot: -1, // restrict voice calls to single pilot (default: all)
 	nodes: [], // node array
 	heats: {}, // heats object
@@ -1662,6 +1665,15 @@ jQuery(document).ready(function($){
 	// startup socket connection
 	socket = io.connect(location.protocol + '//' + document.domain + ':' + location.port);
 
+	// heartbeat is only sent to pages that subscribe or listen for it
+	socket.on('connect', function() {
+		var mode = rotorhazard.heartbeat_mode;
+		if (!mode) {
+			mode = socket.hasListeners('heartbeat') ? 'full' : 'none';
+		}
+		socket.emit('heartbeat_subscribe', {'mode': mode});
+	});
+
 	// reconnect when visibility is regained
 	$(document).on('visibilitychange', function(){
 		if (!document['hidden']) {
@@ -1766,6 +1778,102 @@ jQuery(document).ready(function($){
 });
 }
 
+/* Result data */
+// apply 'result_data_delta' to stored result data; requests full data and returns false if behind
+function apply_result_data_delta(result_data, msg) {
+	if (typeof(result_data) == 'undefined' || result_data.version == undefined || result_data.version < msg.base_version) {
+		socket.emit('load_data', {'load_types': ['result_data']});
+		return false;
+	}
+
+	for (var key in msg) {
+		if (key == 'heats' || key == 'classes') {
+			for (var item_id in msg[key]) {
+				result_data[key][item_id] = msg[key][item_id];
+			}
+		} else if (key != 'base_version' && key != 'removed') {
+			result_data[key] = msg[key];
+		}
+	}
+
+	for (var idx in msg.removed) {
+		var section = msg.removed[idx];
+		if (section[1] === null) {
+			delete result_data[section[0]];
+		} else {
+			delete result_data[section[0]][section[1]];
+		}
+	}
+	return true;
+}
+
+/* Heartbeat */
+// select heartbeat format ('full', 'delta', 'binary' or 'none'); handler receives node data in 'heartbeat' format
+function subscribe_heartbeat(mode, handler) {
+	rotorhazard.heartbeat_mode = mode;
+	if (handler) {
+		if (mode == 'delta') {
+			socket.on('heartbeat_delta', function (msg) {
+				var node_data = apply_heartbeat_delta(msg);
+				if (node_data) {
+					handler(node_data);
+				}
+			});
+		} else if (mode == 'binary') {
+			socket.on('heartbeat_binary', function (msg) {
+				handler(unpack_heartbeat(msg));
+			});
+		} else if (mode == 'full') {
+			socket.on('heartbeat', handler);
+		}
+	}
+	if (socket.connected) {
+		socket.emit('heartbeat_subscribe', {'mode': mode});
+	}
+}
+
+// apply 'heartbeat_delta' to stored node data; requests all node data and returns false if out of sequence
+function apply_heartbeat_delta(msg) {
+	if ('node_data' in msg) {
+		rotorhazard.heartbeat_data = msg.node_data;
+	} else if (rotorhazard.heartbeat_data && rotorhazard.heartbeat_seq == msg.base_seq) {
+		for (var key in msg.changes) {
+			var values = rotorhazard.heartbeat_data[key];
+			for (var idx in msg.changes[key]) {
+				values[msg.changes[key][idx][0]] = msg.changes[key][idx][1];
+			}
+		}
+	} else {
+		if (rotorhazard.heartbeat_seq !== null) {
+			rotorhazard.heartbeat_seq = null;
+			socket.emit('heartbeat_subscribe', {'mode': 'delta'});
+		}
+		return false;
+	}
+	rotorhazard.heartbeat_seq = msg.seq;
+	return rotorhazard.heartbeat_data;
+}
+
+// decode 'heartbeat_binary' frame (see util/HeartbeatFrames.py)
+function unpack_heartbeat(buffer) {
+	var view = new DataView(buffer);
+	var count = view.getUint16(2, true);
+	var offset = 8;
+	var node_data = {
+		'current_rssi': [],
+		'frequency': [],
+		'loop_time': [],
+		'crossing_flag': []
+	};
+	for (var i = 0; i < count; i++) {
+		node_data.current_rssi.push(view.getUint16(offset + 2 * i, true));
+		node_data.frequency.push(view.getUint16(offset + 2 * (count + i), true));
+		node_data.loop_time.push(view.getUint32(offset + 4 * (count + i), true));
+		node_data.crossing_flag.push((view.getUint8(offset + 8 * count + (i >> 3)) & (1 << (i & 7))) != 0);
+	}
+	return node_data;
+}
+
 /* Leaderboards */
 function build_leaderboard(leaderboard, display_type, meta, display_starts=false) {
 	if (typeof(display_type) === 'undefined')
@@ -0,0 +1,61 @@
+# BuildCoordinator:  Serializes builds and coalesces concurrent requests for the same build
+
+# Builds run one at a time under a gevent lock, so waiting callers are woken as soon as the
+# running build completes (no polling).  If a request for a build key is already waiting for
+# the lock, later requests for the same key share its result instead of queuing another
+# computation.  A request never shares a build that was already running when it arrived, so
+# results always reflect data available at the time of the request.
+
+import logging
+import gevent.event
+import gevent.lock
+
+logger = logging.getLogger(__name__)
+
+class BuildCoordinator:
+    """ Runs builds one at a time, sharing the result among concurrent requests for the same key """
+
+    def __init__(self, name, timeout=300):
+        self.name = name
+        self.timeout = timeout  # seconds to wait for a running build before proceeding anyway
+        self._lock = gevent.lock.RLock()
+        self._queued = {}  # build key -> AsyncResult of request waiting for the lock
+
+    @property
+    def busy(self):
+        return self._lock.locked()
+
+    def run(self, key, build_fn, *args, **kwargs):
+        queued = self._queued.get(key)
+        if queued is not None:
+            logger.debug("Joining queued '{}' build {}".format(self.name, key))
+            return queued.get()
+
+        result = gevent.event.AsyncResult()
+        self._queued[key] = result
+        if self.busy:
+            logger.debug("Waiting for previous '{}' build to finish".format(self.name))
+
+        acquired = self._lock.acquire(timeout=self.timeout)
+        if self._queued.get(key) is result:
+            del self._queued[key]
+        if not acquired:
+            logger.error("Timeout waiting for previous '{}' build to finish".format(self.name))
+
+        try:
+            value = build_fn(*args, **kwargs)
+            result.set(value)
+            return value
+        except BaseException as ex:
+            result.set_exception(ex)
+            raise
+        finally:
+            if acquired:
+                self._lock.release()
+
+    def wait_idle(self, timeout=None):
+        '''Blocks until no build is running; returns False on timeout'''
+        if self._lock.acquire(timeout=self.timeout if timeout is None else timeout):
+            self._lock.release()
+            return True
+        return False
@@ -0,0 +1,77 @@
+# HeartbeatFrames:  Delta and packed binary encodings of heartbeat node data
+
+# Delta frames list only the per-node entries that changed since the previous
+# heartbeat, as [node index, value] pairs for each field.  Fields and node count
+# must match the previous heartbeat.
+#
+# Packed layout (little-endian):  header of version (uint8), flags (uint8), node
+# count (uint16) and sequence number (uint32), followed by current_rssi (uint16),
+# frequency (uint16) and loop_time (uint32) arrays, then crossing_flag as a
+# bitmask (bit n of byte n//8 for node n).  Missing values are sent as zero.
+
+import struct
+import sys
+from array import array
+
+HEARTBEAT_PACK_VERSION = 1
+
+_HEADER = struct.Struct('<BBHI')
+_PACKED_ARRAYS = (('current_rssi', 'H', 0xFFFF), ('frequency', 'H', 0xFFFF), ('loop_time', 'I', 0xFFFFFFFF))
+
+def heartbeat_delta(previous, current):
+    '''Returns {field: [[index, value], ...]} for node entries changed from previous,
+       or None if the fields or node count differ (all node data must be sent)'''
+    if not previous or previous.keys() != current.keys():
+        return None
+    changes = {}
+    for key, values in current.items():
+        old_values = previous[key]
+        if len(old_values) != len(values):
+            return None
+        changed = [[idx, value] for idx, (old_value, value) in enumerate(zip(old_values, values)) \
+                   if value != old_value]
+        if changed:
+            changes[key] = changed
+    return changes
+
+def _clamp(value, max_value):
+    try:
+        return min(max(int(value), 0), max_value)
+    except (TypeError, ValueError):
+        return 0
+
+def pack_heartbeat(node_data, seq):
+    '''Returns packed bytes for heartbeat node data'''
+    count = len(node_data.get('current_rssi', ()))
+    payload = [_HEADER.pack(HEARTBEAT_PACK_VERSION, 0, count, seq & 0xFFFFFFFF)]
+    for key, typecode, max_value in _PACKED_ARRAYS:
+        values = list(node_data.get(key, ()))[:count]
+        values += [0] * (count - len(values))
+        arr = array(typecode, (_clamp(value, max_value) for value in values))
+        if sys.byteorder != 'little':
+            arr.byteswap()
+        payload.append(arr.tobytes())
+    flags = bytearray((count + 7) // 8)
+    for idx, flag in enumerate(list(node_data.get('crossing_flag', ()))[:count]):
+        if flag:
+            flags[idx // 8] |= 1 << (idx % 8)
+    payload.append(bytes(flags))
+    return b''.join(payload)
+
+def unpack_heartbeat(data):
+    '''Returns (seq, node_data) for packed heartbeat bytes'''
+    version, _flags, count, seq = _HEADER.unpack_from(data)
+    if version != HEARTBEAT_PACK_VERSION:
+        raise ValueError('Unsupported heartbeat format version: {}'.format(version))
+    node_data = {}
+    offset = _HEADER.size
+    for key, typecode, _max_value in _PACKED_ARRAYS:
+        arr = array(typecode)
+        arr.frombytes(data[offset:offset + count * arr.itemsize])
+        if sys.byteorder != 'little':
+            arr.byteswap()
+        node_data[key] = arr.tolist()
+        offset += count * arr.itemsize
+    flags = data[offset:offset + (count + 7) // 8]
+    node_data['crossing_flag'] = [bool(flags[idx // 8] & (1 << (idx % 8))) for idx in range(count)]
+    return seq, node_data
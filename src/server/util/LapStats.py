@@ -0,0 +1,168 @@
+# LapStats:  Incremental per-seat lap statistics for the current race
+
+from collections import deque
+
+class BestConsecutiveLaps:
+    """Fastest total of 'count' consecutive lap times, updated one lap at a time.
+
+    Windows are screened with a rolling sum; a window that may beat the best is
+    re-summed in lap order, so the result is identical to summing every window.
+    A lap is O(1) unless its window may beat the best, which costs O(count); laps
+    that keep getting faster (as in practice sessions) are O(count) each.
+    Zero-time windows rank last, and the earliest window wins a tie."""
+    RESYNC_INTERVAL = 1000  # laps between exact recalculations of the rolling sum
+
+    def __init__(self, count):
+        self.count = count
+        self.laps = 0
+        self.best = None        # total time of best window
+        self.best_index = None  # 1-based lap number starting best window
+        self._window = deque()
+        self._window_sum = 0
+
+    def add(self, lap_time):
+        self._window.append(lap_time)
+        self._window_sum += lap_time
+        if len(self._window) > self.count:
+            self._window_sum -= self._window.popleft()
+        self.laps += 1
+        if self.laps % self.RESYNC_INTERVAL == 0:
+            self._window_sum = sum(self._window)
+
+        if len(self._window) == self.count:
+            if self.best is None or not self.best or \
+                    self._window_sum <= self.best + 1e-9 * (abs(self.best) + abs(self._window_sum)):
+                window_time = sum(self._window)
+                self._window_sum = window_time
+                if self.best is None or (not window_time, window_time) < (not self.best, self.best):
+                    self.best = window_time
+                    self.best_index = self.laps - self.count + 1
+        return self
+
+def best_consecutive_laps(lap_times, count):
+    '''Returns (time, starting lap number) of the fastest 'count' consecutive laps, or (None, None) if too few laps'''
+    window = BestConsecutiveLaps(count)
+    for lap_time in lap_times:
+        window.add(lap_time)
+    return window.best, window.best_index
+
+class LapListTracker:
+    """Base for values derived from one seat's lap list.
+
+    Crossings appended to the list are consumed incrementally; any other change
+    to the list (delete, restore, replace, recalc) must be followed by a call to
+    'reset()' so that the derived values are rebuilt.  A different or shortened
+    list is detected and triggers a rebuild automatically."""
+    def reset(self):
+        self._source = None      # lap list being tracked
+        self._source_len = 0     # number of entries consumed from lap list
+        self._last_item = None   # last entry consumed from lap list
+
+    def update(self, lap_list):
+        '''Consume any crossings appended to 'lap_list' since the last update'''
+        if lap_list is not self._source or len(lap_list) < self._source_len or \
+                (self._source_len and lap_list[self._source_len - 1] is not self._last_item):
+            self.reset()
+            self._source = lap_list
+
+        for lap in lap_list[self._source_len:]:
+            self._consume(lap)
+
+        self._source_len = len(lap_list)
+        self._last_item = lap_list[-1] if self._source_len else None
+        return self
+
+    def _consume(self, lap):
+        '''Hook called with each new crossing in list order; subclasses update their derived values here'''
+
+class SeatActiveLaps(LapListTracker):
+    """Active (non-deleted) crossings for one seat, with and without late laps.
+
+    The lists are views owned by the tracker; callers must not modify them."""
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.active = []            # non-deleted crossings
+        self.active_with_late = []  # non-deleted crossings plus late laps
+
+    def _consume(self, lap):
+        if not lap.deleted:
+            self.active.append(lap)
+            self.active_with_late.append(lap)
+        elif lap.late_lap:
+            self.active_with_late.append(lap)
+
+    def get(self, late_lap_flag=False):
+        return self.active_with_late if late_lap_flag else self.active
+
+class SeatLapStats(LapListTracker):
+    """Accumulates lap totals, fastest lap and best consecutive laps for one seat."""
+    def __init__(self, consecutives_count=3, first_lap_flag=False):
+        self.consecutives_count = consecutives_count
+        self.first_lap_flag = first_lap_flag  # True if first crossing counts as a lap (StartBehavior.FIRST_LAP)
+        self.reset()
+
+    def reset(self):
+        super().reset()
+        self.crossings = []      # active crossings
+        self.lap_times = []      # lap times of counted laps
+        self.lap_stamps = {}     # lap_time_stamp by lap_number
+        self.total_time = 0
+        self.fastest_lap = 0
+        self._consecutives = BestConsecutiveLaps(self.consecutives_count)
+
+    def configure(self, consecutives_count, first_lap_flag):
+        if consecutives_count != self.consecutives_count or first_lap_flag != self.first_lap_flag:
+            self.consecutives_count = consecutives_count
+            self.first_lap_flag = first_lap_flag
+            self.reset()
+
+    def _consume(self, lap):
+        if lap.deleted:
+            return
+        self.crossings.append(lap)
+        self.total_time += lap.lap_time
+        if lap.lap_number is not None and lap.lap_number not in self.lap_stamps:
+            self.lap_stamps[lap.lap_number] = lap.lap_time_stamp
+
+        if not self.first_lap_flag and len(self.crossings) == 1:
+            return  # holeshot is not a counted lap
+
+        self.lap_times.append(lap.lap_time)
+        if len(self.lap_times) == 1 or lap.lap_time < self.fastest_lap:
+            self.fastest_lap = lap.lap_time
+
+        self._consecutives.add(lap.lap_time)
+
+    @property
+    def laps(self):
+        return len(self.lap_times)
+
+    @property
+    def starts(self):
+        return 1 if len(self.crossings) > 0 else 0
+
+    @property
+    def total_time_laps(self):
+        if self.first_lap_flag or not self.crossings:
+            return self.total_time
+        return self.total_time - self.crossings[0].lap_time
+
+    @property
+    def last_lap(self):
+        return self.lap_times[-1] if self.lap_times else None
+
+    @property
+    def last_crossing(self):
+        return self.crossings[-1] if self.crossings else None
+
+    def get_consecutives(self):
+        '''Returns (time, base lap count, starting lap index) of best consecutive laps'''
+        if self.laps >= self.consecutives_count:
+            return self._consecutives.best, self.consecutives_count, self._consecutives.best_index
+        return self.total_time_laps, self.laps, None
+
+    def get_lap_time_stamp(self, lap_number):
+        return self.lap_stamps.get(lap_number)
@@ -0,0 +1,52 @@
+# RssiHistoryDecimate:  Peak-preserving downsampling of RSSI history for display
+
+# The requested time window is split into equal-time buckets, and each bucket keeps
+# its minimum and the first and last entries at its maximum value.  Marshaling
+# derives pass times from the first and last entries at peak RSSI and detects
+# crossings from the enter/exit thresholds, so passes wider than a bucket are
+# recalculated from decimated history the same as from the full history.
+
+from bisect import bisect_left, bisect_right
+
+def get_history_window(values, times, start_time=None, end_time=None):
+    '''Returns (first, last+1) indices of entries with start_time <= time <= end_time'''
+    first = bisect_left(times, start_time) if start_time is not None else 0
+    last = bisect_right(times, end_time, first) if end_time is not None else len(times)
+    return first, last
+
+def decimate_history(values, times, max_points, start_time=None, end_time=None):
+    '''Returns (values, times, decimated) for the window, reduced to about max_points entries'''
+    first, last = get_history_window(values, times, start_time, end_time)
+    if last - first <= max_points:
+        return list(values[first:last]), list(times[first:last]), False
+
+    bucket_count = max((max_points - 2) // 3, 1)
+    base_time = times[first]
+    bucket_width = (times[last - 1] - base_time) / bucket_count or 1.0
+
+    keep = {first, last - 1}  # window end points are always kept
+    bucket = None
+    min_idx = max_first_idx = max_last_idx = first
+    min_value = max_value = None
+    for idx in range(first, last):
+        value = values[idx]
+        entry_bucket = min(int((times[idx] - base_time) / bucket_width), bucket_count - 1)
+        if entry_bucket != bucket:
+            if bucket is not None:
+                keep.update((min_idx, max_first_idx, max_last_idx))
+            bucket = entry_bucket
+            min_idx = max_first_idx = max_last_idx = idx
+            min_value = max_value = value
+        else:
+            if value < min_value:
+                min_value = value
+                min_idx = idx
+            if value > max_value:
+                max_value = value
+                max_first_idx = max_last_idx = idx
+            elif value == max_value:
+                max_last_idx = idx
+    keep.update((min_idx, max_first_idx, max_last_idx))
+
+    indices = sorted(keep)
+    return [values[idx] for idx in indices], [times[idx] for idx in indices], True
@@ -0,0 +1,83 @@
+# RssiHistoryPack:  Compact binary encoding of saved RSSI history
+
+# Packed layout (little-endian):  header of version (uint8), flags (uint8), entry
+# count (uint32) and time of first entry (float64, seconds), followed by the RSSI
+# values as int16 deltas from the previous value (the first from zero) and the
+# entry times as uint32 millisecond offsets from the first entry.  The value and
+# offset arrays are zlib-compressed when FLAG_ZLIB is set.
+
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+
+HISTORY_PACK_VERSION = 1
+FLAG_ZLIB = 0x01
+
+_HEADER = struct.Struct('<BBId')
+_INT16_MIN = -0x8000
+_INT16_MAX = 0x7FFF
+_UINT32_MAX = 0xFFFFFFFF
+
+def _to_little_endian(arr):
+    if sys.byteorder != 'little':
+        arr.byteswap()
+    return arr
+
+def pack_history(values, times, compress=True):
+    '''Returns packed bytes for RSSI history, or None if it cannot be represented
+       (non-integer or out-of-range values, times not in increasing order)'''
+    count = len(values)
+    if count != len(times):
+        return None
+
+    base_time = float(times[0]) if count else 0.0
+    deltas = array('h')
+    offsets = array('I')
+    last_value = 0
+    last_offset = 0
+    try:
+        for value, entry_time in zip(values, times):
+            if value != int(value):
+                return None
+            delta = int(value) - last_value
+            offset = int(round((entry_time - base_time) * 1000))
+            if delta < _INT16_MIN or delta > _INT16_MAX or offset < last_offset or offset > _UINT32_MAX:
+                return None
+            deltas.append(delta)
+            offsets.append(offset)
+            last_value = int(value)
+            last_offset = offset
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+    payload = _to_little_endian(deltas).tobytes() + _to_little_endian(offsets).tobytes()
+    flags = 0
+    if compress:
+        payload = zlib.compress(payload, 6)
+        flags |= FLAG_ZLIB
+    return _HEADER.pack(HISTORY_PACK_VERSION, flags, count, base_time) + payload
+
+def unpack_history(data):
+    '''Returns (values, times) arrays for packed RSSI history'''
+    version, flags, count, base_time = _HEADER.unpack_from(data)
+    if version != HISTORY_PACK_VERSION:
+        raise ValueError('Unsupported RSSI history format version: {}'.format(version))
+
+    payload = data[_HEADER.size:]
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+
+    deltas = array('h')
+    deltas.frombytes(payload[:count * deltas.itemsize])
+    offsets = array('I')
+    offsets.frombytes(payload[count * deltas.itemsize:count * (deltas.itemsize + offsets.itemsize)])
+    if len(deltas) != count or len(offsets) != count:
+        raise ValueError('Truncated RSSI history data')
+    _to_little_endian(deltas)
+    _to_little_endian(offsets)
+
+    values = array('i', accumulate(deltas))
+    times = array('d', (base_time + offset / 1000.0 for offset in offsets))
+    return values, times
@@ -0,0 +1,145 @@
+'''
+Benchmark of hot RHData lookups with and without the secondary indexes
+declared in Database.py. Builds a synthetic event database, then times each
+lookup and reports its SQLite query plan and statement count.
+
+Usage: python db_index_benchmark.py [num_races]
+'''
+
+import os
+import sys
+import time
+import random
+import tempfile
+from datetime import datetime
+from sqlalchemy import event, text
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+import Database  #pylint: disable=import-error,wrong-import-position
+
+NUM_PILOTS = 64
+NUM_HEATS = 40
+NODES_PER_RACE = 8
+LAPS_PER_PILOT = (5, 20)
+REPEATS = 200
+
+statement_count = 0
+
+def count_statement(*_args):
+    global statement_count
+    statement_count += 1
+
+def create_event_data(session, num_races):
+    for idx in range(NUM_PILOTS):
+        session.add(Database.Pilot(callsign='Pilot {}'.format(idx), phonetic='', name='', team='A'))
+    for _idx in range(NUM_HEATS):
+        session.add(Database.Heat(class_id=None, _cache_status='', status=0, auto_frequency=False, group_id=0))
+    session.flush()
+    for heat_id in range(1, NUM_HEATS + 1):
+        for node_index in range(NODES_PER_RACE):
+            session.add(Database.HeatNode(heat_id=heat_id, node_index=node_index,
+                                          pilot_id=random.randint(1, NUM_PILOTS), method=0))
+
+    for race_idx in range(num_races):
+        race = Database.SavedRaceMeta(round_id=race_idx // NUM_HEATS + 1, heat_id=race_idx % NUM_HEATS + 1,
+                                      class_id=None, format_id=None, start_time=0,
+                                      start_time_formatted=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                      _cache_status='')
+        session.add(race)
+        session.flush()
+        for node_index in range(NODES_PER_RACE):
+            pilot_id = random.randint(1, NUM_PILOTS)
+            pilotrace = Database.SavedPilotRace(race_id=race.id, node_index=node_index, pilot_id=pilot_id,
+                                                penalty_time=0, enter_at=100, exit_at=90, frequency=5658)
+            session.add(pilotrace)
+            session.flush()
+            lap_time_stamp = 0
+            for _lap in range(random.randint(*LAPS_PER_PILOT)):
+                lap_time = random.uniform(10000, 20000)
+                lap_time_stamp += lap_time
+                session.add(Database.SavedRaceLap(race_id=race.id, pilotrace_id=pilotrace.id,
+                                                  node_index=node_index, pilot_id=pilot_id,
+                                                  lap_time_stamp=lap_time_stamp, lap_time=lap_time,
+                                                  lap_time_formatted='', source=0, deleted=False))
+        if race_idx % 100 == 99:
+            session.commit()
+    session.commit()
+
+def get_lookups(num_races):
+    ''' (name, query function) for lookups made per lap or per result build '''
+    return [
+        ('get_pilot_from_heatNode', lambda: Database.HeatNode.query.filter_by(
+            heat_id=random.randint(1, NUM_HEATS), node_index=random.randrange(NODES_PER_RACE)).one_or_none()),
+        ('get_savedRaceMetas_by_heat', lambda: Database.SavedRaceMeta.query.filter_by(
+            heat_id=random.randint(1, NUM_HEATS)).order_by(Database.SavedRaceMeta.round_id).all()),
+        ('get_savedPilotRaces_by_savedRaceMeta', lambda: Database.SavedPilotRace.query.filter_by(
+            race_id=random.randint(1, num_races)).all()),
+        ('get_savedRaceLaps_by_savedPilotRace', lambda: Database.SavedRaceLap.query.filter_by(
+            pilotrace_id=random.randint(1, num_races * NODES_PER_RACE)).order_by(Database.SavedRaceLap.lap_time_stamp).all()),
+        ('laps by saved race', lambda: Database.SavedRaceLap.query.filter_by(
+            race_id=random.randint(1, num_races)).all()),
+    ]
+
+def query_plan(session, query):
+    statement = query.statement.compile(compile_kwargs={'literal_binds': True})
+    rows = session.execute(text('EXPLAIN QUERY PLAN {}'.format(statement))).all()
+    return '; '.join(row[-1] for row in rows)
+
+def heat_rebuild():
+    ''' loads all pilot races and laps of one heat, as a heat results build does '''
+    for race in Database.SavedRaceMeta.query.filter_by(heat_id=random.randint(1, NUM_HEATS)).all():
+        for pilotrace in Database.SavedPilotRace.query.filter_by(race_id=race.id).all():
+            Database.SavedRaceLap.query.filter_by(pilotrace_id=pilotrace.id).order_by(Database.SavedRaceLap.lap_time_stamp).all()
+
+def run_lookups(session, num_races, label):
+    global statement_count
+    print("\n{}:".format(label))
+    results = {}
+    for name, lookup in get_lookups(num_races) + [('heat results rebuild', heat_rebuild)]:
+        statement_count = 0
+        start = time.perf_counter()
+        for _idx in range(REPEATS):
+            lookup()
+        elapsed_ms = (time.perf_counter() - start) * 1000 / REPEATS
+        results[name] = elapsed_ms
+        print("  {:<40} {:8.3f} ms/call  {:5.1f} statements/call".format(name, elapsed_ms, statement_count / REPEATS))
+
+    for name, query in [
+            ('saved_race_meta by heat_id', Database.SavedRaceMeta.query.filter_by(heat_id=1)),
+            ('saved_pilot_race by race_id', Database.SavedPilotRace.query.filter_by(race_id=1)),
+            ('saved_race_lap by pilotrace_id', Database.SavedRaceLap.query.filter_by(pilotrace_id=1)),
+            ('saved_race_lap by race_id', Database.SavedRaceLap.query.filter_by(race_id=1)),
+        ]:
+        print("  plan {:<35} {}".format(name, query_plan(session, query)))
+    return results
+
+def run_benchmark(num_races):
+    random.seed(1)
+    db_path = os.path.join(tempfile.mkdtemp(), 'rh_index_benchmark.sqlite')
+    print("Building test database at {} ({} races)...".format(db_path, num_races))
+    Database.initialize('sqlite:///' + db_path)
+    Database.create_db_all()
+    event.listen(Database.DB_engine, 'before_cursor_execute', count_statement)
+    session = Database.DB_session
+    try:
+        create_event_data(session, num_races)
+        print("Laps: {}".format(Database.SavedRaceLap.query.count()))
+
+        indexed = run_lookups(session, num_races, 'With secondary indexes')
+
+        for table in Database.Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.drop(bind=Database.DB_engine)
+        session.execute(text('ANALYZE'))
+        unindexed = run_lookups(session, num_races, 'Without secondary indexes')
+
+        print("\nSpeedup:")
+        for name, elapsed_ms in indexed.items():
+            print("  {:<40} {:8.1f}x".format(name, unindexed[name] / elapsed_ms if elapsed_ms else 0))
+    finally:
+        session.remove()
+        Database.close_database()
+        os.remove(db_path)
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
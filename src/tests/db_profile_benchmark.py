@@ -0,0 +1,101 @@
+'''
+Benchmark of the SQLite storage profiles declared in Database.py. For each
+profile, saves races one transaction at a time (as RHRace.do_save_actions
+does), checkpoints after each save, then times heat results rebuilds.
+
+Usage: python db_profile_benchmark.py [num_races] [db_dir]
+  db_dir: directory for the test database (use a path on the target
+          storage, e.g. the SD card, for representative results)
+'''
+
+import os
+import sys
+import time
+import random
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+import Database  #pylint: disable=import-error,wrong-import-position
+from db_index_benchmark import NUM_PILOTS, NUM_HEATS, NODES_PER_RACE, LAPS_PER_PILOT, heat_rebuild  #pylint: disable=wrong-import-position
+
+REBUILD_REPEATS = 50
+
+def create_base_data(session):
+    for idx in range(NUM_PILOTS):
+        session.add(Database.Pilot(callsign='Pilot {}'.format(idx), phonetic='', name='', team='A'))
+    for _idx in range(NUM_HEATS):
+        session.add(Database.Heat(class_id=None, _cache_status='', status=0, auto_frequency=False, group_id=0))
+    session.commit()
+
+def save_race(session, race_idx):
+    ''' writes one race with its pilot races and laps in a single transaction '''
+    race = Database.SavedRaceMeta(round_id=race_idx // NUM_HEATS + 1, heat_id=race_idx % NUM_HEATS + 1,
+                                  class_id=None, format_id=None, start_time=0,
+                                  start_time_formatted=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                                  _cache_status='')
+    session.add(race)
+    session.flush()
+    for node_index in range(NODES_PER_RACE):
+        pilot_id = random.randint(1, NUM_PILOTS)
+        pilotrace = Database.SavedPilotRace(race_id=race.id, node_index=node_index, pilot_id=pilot_id,
+                                            penalty_time=0, enter_at=100, exit_at=90, frequency=5658)
+        session.add(pilotrace)
+        session.flush()
+        lap_time_stamp = 0
+        for _lap in range(random.randint(*LAPS_PER_PILOT)):
+            lap_time = random.uniform(10000, 20000)
+            lap_time_stamp += lap_time
+            session.add(Database.SavedRaceLap(race_id=race.id, pilotrace_id=pilotrace.id,
+                                              node_index=node_index, pilot_id=pilot_id,
+                                              lap_time_stamp=lap_time_stamp, lap_time=lap_time,
+                                              lap_time_formatted='', source=0, deleted=False))
+    session.commit()
+
+def run_profile(profile, num_races, db_dir):
+    random.seed(1)
+    db_path = os.path.join(db_dir, 'rh_profile_benchmark.sqlite')
+    Database.set_storage_profile(profile)
+    Database.initialize('sqlite:///' + db_path)
+    Database.create_db_all()
+    session = Database.DB_session
+    try:
+        create_base_data(session)
+
+        save_ms = checkpoint_ms = 0.0
+        for race_idx in range(num_races):
+            start = time.perf_counter()
+            save_race(session, race_idx)
+            save_ms += (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            Database.checkpoint_database()
+            checkpoint_ms += (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _idx in range(REBUILD_REPEATS):
+            heat_rebuild()
+        rebuild_ms = (time.perf_counter() - start) * 1000 / REBUILD_REPEATS
+
+        start = time.perf_counter()
+        problems = Database.check_database_integrity()
+        integrity_ms = (time.perf_counter() - start) * 1000
+
+        print("  {:<10} {:9.2f} {:11.2f} {:11.2f} {:11.1f}  {}".format(profile,
+            save_ms / num_races, checkpoint_ms / num_races, rebuild_ms, integrity_ms,
+            'ok' if not problems else problems[0]))
+    finally:
+        session.remove()
+        Database.close_database()
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+def run_benchmark(num_races, db_dir):
+    print("Saving {} races per profile in {}".format(num_races, db_dir))
+    print("  {:<10} {:>9} {:>11} {:>11} {:>11}".format('profile', 'save ms', 'ckpt ms', 'rebuild ms', 'check ms'))
+    for profile in Database.DB_STORAGE_PROFILES:
+        run_profile(profile, num_races, db_dir)
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+                  sys.argv[2] if len(sys.argv) > 2 else tempfile.mkdtemp())
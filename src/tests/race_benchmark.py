@@ -0,0 +1,266 @@
+'''
+End-to-end race benchmark on MockInterface. Boots the server headless (with a
+temporary data directory), then runs scripted races where each seated pilot
+completes laps at the given lap rate, through the full pass-record pipeline:
+interface update, pass-record callback and queue, lap handling, results,
+emits and callouts. Race saves are included.
+
+Reports, over all races:
+  pass-to-emit latency (node-data read to leaderboard emit, from the pass trace)
+  CPU time per lap (process time while racing and saving, per lap recorded)
+  DB writes per lap (INSERT/UPDATE/DELETE statements while racing and saving)
+  memory growth (peak RSS and tracked object count, after the first race)
+
+With --baseline, compares the results to a file written by --save and exits
+with status 1 if any metric regressed by more than the tolerance, so it can be
+used as a performance gate between releases.
+
+Usage: python race_benchmark.py [--nodes N] [--lap-secs SECS] [--race-secs SECS]
+                                [--races N] [--seed N] [--save FILE]
+                                [--baseline FILE] [--tolerance PCT]
+'''
+
+import os
+import sys
+import gc
+import json
+import time
+import random
+import argparse
+import tempfile
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+UPDATE_INTERVAL_SECS = 0.1
+LAP_JITTER = 0.1  # lap times vary by up to this fraction of the lap rate
+
+# metrics where larger values are worse, compared with --baseline, and the
+#  smallest increase counted as a regression (to ignore run-to-run noise)
+GATED_METRICS = {
+    'latency_p50_ms': 2.0,
+    'latency_p90_ms': 2.0,
+    'latency_p99_ms': 5.0,
+    'cpu_ms_per_lap': 1.0,
+    'save_ms': 5.0,
+    'db_writes_per_lap': 0.5,
+    'rss_growth_kb': 1024,
+    'object_growth': 1000,
+}
+BENCHMARK_PARAMS = ('nodes', 'lap_secs', 'race_secs', 'races')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='End-to-end race benchmark on MockInterface')
+    parser.add_argument('--nodes', type=int, default=8, help='number of mock nodes (all seated)')
+    parser.add_argument('--lap-secs', type=float, default=5.0, help='average lap time per pilot')
+    parser.add_argument('--race-secs', type=float, default=30.0, help='duration of each race')
+    parser.add_argument('--races', type=int, default=4, help='number of races run and saved')
+    parser.add_argument('--seed', type=int, default=1, help='random seed for lap schedule and mock signal')
+    parser.add_argument('--save', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='compare results to JSON file written by --save')
+    parser.add_argument('--tolerance', type=float, default=20.0, help='allowed regression over baseline, percent')
+    args = parser.parse_args()
+    # server changes working directory to its data directory
+    args.save = os.path.abspath(args.save) if args.save else None
+    args.baseline = os.path.abspath(args.baseline) if args.baseline else None
+    return args
+
+def boot_server(num_nodes):
+    '''Imports and initializes the server with mock nodes and a temporary data directory'''
+    home_dir = tempfile.mkdtemp(prefix='rh_benchmark_')
+    data_dir = os.path.join(home_dir, 'rh-data')
+    os.makedirs(data_dir)
+    with open(os.path.join(data_dir, 'config.json'), 'w') as f:
+        json.dump({
+            'GENERAL': {
+                'MOCK_NODE_SIGNAL': 2,  # generated node data
+                'SYNC_LEADTIME_SECS': 0,
+                'PASS_TRACE_SIZE': 100000,
+            },
+            'LOGGING': {
+                'CONSOLE_LEVEL': 'WARNING',
+                'FILELOG_LEVEL': 'WARNING',
+            },
+        }, f)
+    os.environ['HOME'] = home_dir  # server uses '~/rh-data' as data directory
+    os.environ['USERPROFILE'] = home_dir
+    os.environ['RH_NODES'] = str(num_nodes)
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    for path in ('../interface', '../server/plugins', '../server/util', '../server'):
+        sys.path.insert(0, os.path.join(base_dir, path))
+
+    import server  #pylint: disable=import-error,import-outside-toplevel
+    server.rh_program_initialize(reg_endpoints_flag=False)
+    sys.stdout = sys.__stdout__  # server redirects stdout to its log
+    return server
+
+def setup_race(server, num_nodes):
+    '''Adds pilots, a heat with all nodes seated, and an unlimited-time race format'''
+    from RHRace import WinCondition  #pylint: disable=import-error,import-outside-toplevel
+    rhapi = server.RHAPI
+    rhapi.db.option_set('MinLapSec', 0)
+    rhapi.db.option_set('MinFirstCrossingSec', 0)
+
+    freqs = {
+        'b': [None] * num_nodes,
+        'c': [None] * num_nodes,
+        'f': [5645 + 20 * idx for idx in range(num_nodes)],
+    }
+    frequencyset = rhapi.db.frequencyset_add(name='Benchmark', frequencies=freqs)
+    rhapi.race.frequencyset = frequencyset.id
+
+    raceformat = rhapi.db.raceformat_add(name='Benchmark', unlimited_time=1, race_time_sec=0,
+                                         staging_fixed_tones=0, start_delay_min_ms=0, start_delay_max_ms=0,
+                                         win_condition=WinCondition.MOST_LAPS)
+    rhapi.race.raceformat = raceformat.id
+
+    heat = rhapi.db.heat_add(name='Benchmark')
+    for idx, slot in enumerate(sorted(rhapi.db.slots_by_heat(heat.id), key=lambda slot: slot.node_index)):
+        pilot = rhapi.db.pilot_add(name='Pilot {}'.format(idx + 1), callsign='Bench {}'.format(idx + 1))
+        rhapi.db.slot_alter(slot.id, pilot=pilot.id)
+    rhapi.race.heat = heat.id
+
+class DBWriteCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event  #pylint: disable=import-outside-toplevel
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, _conn, _cursor, statement, *_args):
+        if statement.lstrip()[:6].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+            self.count += 1
+
+def peak_rss_kb():
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss  # bytes on macOS, KB elsewhere
+
+def run_race(server, args, rng):
+    '''Stages, runs, stops and saves one race; returns (laps, cpu secs, save secs)'''
+    import gevent  #pylint: disable=import-outside-toplevel
+    from RHRace import RaceStatus  #pylint: disable=import-error,import-outside-toplevel
+    from interface_mapper import InterfaceType  #pylint: disable=import-error,import-outside-toplevel
+    racecontext = server.RaceContext
+    race = racecontext.race
+    interface = next(ifmeta.interface for ifmeta in racecontext.interface.mapped_interfaces \
+                     if ifmeta.type == InterfaceType.MOCK)
+    interface.lap_probability = 0  # laps come only from the schedule below
+
+    cpu_start = time.process_time()
+    race.stage({'start_time_s': time.monotonic() + 0.1})
+    while race.race_status != RaceStatus.RACING:
+        gevent.sleep(0.01)
+
+    start = time.monotonic()
+    next_laps = [start + rng.uniform(0.2, 1.0) * args.lap_secs for _idx in range(args.nodes)]
+    while time.monotonic() - start < args.race_secs:
+        now = time.monotonic()
+        for idx, lap_due in enumerate(next_laps):
+            if now >= lap_due:
+                interface.trigger_lap(idx)
+                next_laps[idx] = lap_due + args.lap_secs * rng.uniform(1 - LAP_JITTER, 1 + LAP_JITTER)
+        interface.update()
+        gevent.sleep(max(UPDATE_INTERVAL_SECS - (time.monotonic() - now), 0))
+
+    race.pass_invoke_func_queue_obj.waitForQueueEmpty()
+    race.stop()
+    laps = sum(len(seat_laps) for seat_laps in race.get_active_laps().values())
+    save_start = time.monotonic()
+    race.do_save_actions()
+    save_secs = time.monotonic() - save_start
+    gevent.sleep(0.5)  # let background results builds finish
+    return laps, time.process_time() - cpu_start, save_secs
+
+def run_benchmark(args):
+    rng = random.Random(args.seed)
+    random.seed(args.seed)  # mock signal generation
+    server = boot_server(args.nodes)
+    import Database  #pylint: disable=import-error,import-outside-toplevel
+    from PassTrace import PassStage, percentile  #pylint: disable=import-error,import-outside-toplevel
+
+    with server.RaceContext.rhdata.get_db_session_handle():
+        setup_race(server, args.nodes)
+    db_writes = DBWriteCounter(Database.DB_engine)
+    pass_trace = server.RaceContext.pass_trace
+
+    total_laps = 0
+    total_cpu = total_save = 0.0
+    base_rss = base_objects = 0
+    for race_idx in range(args.races):
+        with server.RaceContext.rhdata.get_db_session_handle():
+            laps, cpu_secs, save_secs = run_race(server, args, rng)
+        total_laps += laps
+        total_cpu += cpu_secs
+        total_save += save_secs
+        print("  race {}: {} laps, {:.1f} ms CPU/lap, save {:.1f} ms".format(
+            race_idx + 1, laps, cpu_secs * 1000 / max(laps, 1), save_secs * 1000))
+        if race_idx == 0:
+            gc.collect()
+            base_rss = peak_rss_kb()
+            base_objects = len(gc.get_objects())
+
+    gc.collect()
+    latencies = sorted(sum(duration for stage, duration in traced['stages'].items() \
+                           if stage not in (PassStage.CALLOUT, PassStage.WIN_CHECK)) \
+                       for traced in pass_trace.get_passes() if PassStage.LEADERBOARD in traced['stages'])
+    return {
+        'nodes': args.nodes,
+        'lap_secs': args.lap_secs,
+        'race_secs': args.race_secs,
+        'races': args.races,
+        'laps': total_laps,
+        'latency_p50_ms': percentile(latencies, 50),
+        'latency_p90_ms': percentile(latencies, 90),
+        'latency_p99_ms': percentile(latencies, 99),
+        'latency_max_ms': latencies[-1] if latencies else None,
+        'cpu_ms_per_lap': total_cpu * 1000 / max(total_laps, 1),
+        'save_ms': total_save * 1000 / max(args.races, 1),
+        'db_writes_per_lap': db_writes.count / max(total_laps, 1),
+        'rss_growth_kb': peak_rss_kb() - base_rss if args.races > 1 else None,
+        'object_growth': len(gc.get_objects()) - base_objects if args.races > 1 else None,
+    }
+
+def compare_to_baseline(results, baseline, tolerance):
+    '''Prints metric changes from baseline; returns list of regressed metrics'''
+    regressions = []
+    print("  {:<20} {:>12} {:>12} {:>8}".format('metric', 'baseline', 'current', 'change'))
+    for key, min_change in GATED_METRICS.items():
+        base_val = baseline.get(key)
+        cur_val = results.get(key)
+        if base_val is None or cur_val is None:
+            continue
+        change = (cur_val - base_val) * 100 / base_val if base_val else 0.0
+        regressed = cur_val > base_val * (1 + tolerance / 100) and cur_val - base_val >= min_change
+        print("  {:<20} {:>12.2f} {:>12.2f} {:>7.1f}%{}".format(key, base_val, cur_val, change,
+                                                                '  REGRESSED' if regressed else ''))
+        if regressed:
+            regressions.append(key)
+    return regressions
+
+if __name__ == "__main__":
+    bench_args = parse_args()
+    print("Running {} races of {}s with {} nodes, {}s laps".format(bench_args.races, bench_args.race_secs,
+                                                                    bench_args.nodes, bench_args.lap_secs))
+    bench_results = run_benchmark(bench_args)
+    for result_key, result_val in bench_results.items():
+        print("  {:<20} {}".format(result_key, round(result_val, 3) if isinstance(result_val, float) else result_val))
+
+    exit_code = 0
+    if bench_args.save:
+        with open(bench_args.save, 'w') as results_file:
+            json.dump(bench_results, results_file, indent=2)
+    if bench_args.baseline:
+        with open(bench_args.baseline) as baseline_file:
+            bench_baseline = json.load(baseline_file)
+        mismatched = [param for param in BENCHMARK_PARAMS if bench_baseline.get(param) != bench_results[param]]
+        if mismatched:
+            print("Baseline was run with different parameters: {}".format(", ".join(mismatched)))
+            exit_code = 2
+        elif compare_to_baseline(bench_results, bench_baseline, bench_args.tolerance):
+            exit_code = 1
+    sys.stdout.flush()
+    os._exit(exit_code)  # skip server shutdown handling
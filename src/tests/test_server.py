@@ -1,5 +1,6 @@
 '''python -m unittest discover'''
 import os
+import json
 import sys
 import unittest
 import gevent
@@ -32,6 +33,25 @@ class ServerTest(unittest.TestCase):
                 return resp['args'][0]
         self.fail('No response of type {0}'.format(event))
 
+    def delete_test_data(self, races=(), heats=(), pilots=(), classes=()):
+        '''Removes saved races, heats, pilots and classes added by a test, so later tests see the usual data'''
+        import Database
+        rhdata = server.RaceContext.rhdata
+        race_ids = [race.id for race in races]
+        if race_ids:
+            rhdata.invalidate_results(*[('race', race_id) for race_id in race_ids])
+            for model in (Database.SavedRaceLap, Database.SavedPilotRace):
+                model.query.filter(model.race_id.in_(race_ids)).delete()
+            Database.SavedRaceMetaAttribute.query.filter(Database.SavedRaceMetaAttribute.id.in_(race_ids)).delete()
+            Database.SavedRaceMeta.query.filter(Database.SavedRaceMeta.id.in_(race_ids)).delete()
+            rhdata.commit()
+        for heat in heats:
+            rhdata.delete_heat(heat)
+        for race_class in classes:
+            rhdata.delete_raceClass(race_class)
+        for pilot in pilots:
+            rhdata.delete_pilot(pilot)
+
     def test_sensors(self):
         self.assertTrue(any(s.name == 'TestSensor' for s in server.RaceContext.sensors))
 
@@ -93,6 +113,21 @@ class ServerTest(unittest.TestCase):
         self.assertEqual(resp['profile_name'], data['profile_name'])
         self.assertEqual(resp['profile_description'], data['profile_description'])
 
+    def test_profile_view(self):
+        rhdata = server.RaceContext.rhdata
+        profile = rhdata.duplicate_profile(server.RaceContext.race.profile)
+        view = rhdata.get_profile_view(profile)
+        self.assertIs(rhdata.get_profile_view(profile.id), view)
+        self.assertEqual(list(view.frequencies['f']), json.loads(profile.frequencies)['f'])
+        freqs = json.loads(profile.frequencies)
+        freqs['f'][0] = 5885
+        rhdata.alter_profile({'profile_id': profile.id, 'frequencies': freqs})
+        view = rhdata.get_profile_view(profile)
+        self.assertEqual(view.frequencies['f'][0], 5885)
+        with self.assertRaises(Exception):
+            view.frequencies['f'] = ()
+        rhdata.delete_profile(profile)
+
     def test_delete_profile(self):
         self.client.emit('load_data', {'load_types': ['node_tuning']})
         resp = self.get_response('node_tuning')
@@ -595,6 +630,587 @@ class ServerTest(unittest.TestCase):
         readings = sensor.getReadings()
         self.assertEqual(readings['counter']['value'], count+1)
 
+    def test_seat_lap_stats(self):
+        from RHRace import Crossing
+        race = server.RaceContext.race
+        race.reset_current_laps()
+        lap_stamp = 0
+        for lap_number, lap_time in enumerate([5000, 30000, 25000, 40000, 20000, 21000]):
+            lap_stamp += lap_time
+            race.node_laps[0].append(Crossing(lap_number=lap_number, lap_time_stamp=lap_stamp, lap_time=lap_time))
+        stats = race.get_seat_lap_stats(0, 3, False)
+        self.assertEqual(stats.laps, 5)
+        self.assertEqual(stats.total_time_laps, 136000)
+        self.assertEqual(stats.fastest_lap, 20000)
+        self.assertEqual(stats.get_consecutives(), (81000, 3, 3))
+        race.delete_lap(0, 4, update_race_state=False)
+        stats = race.get_seat_lap_stats(0, 3, False)
+        self.assertEqual(stats.laps, 4)
+        self.assertEqual(stats.fastest_lap, 25000)
+        self.assertEqual(stats.get_consecutives(), (95000, 3, 1))
+        self.assertEqual(len(race.get_seat_active_laps(0)), 5)
+        self.assertEqual(race.get_active_laps()[0], race.get_seat_active_laps(0))
+        race.restore_deleted_lap(0, 4, update_race_state=False)
+        self.assertEqual(len(race.get_seat_active_laps(0)), 6)
+        race.reset_current_laps()
+        self.assertEqual(race.get_seat_active_laps(0), [])
+
+    def test_best_consecutive_laps(self):
+        from util.LapStats import best_consecutive_laps
+        self.assertEqual(best_consecutive_laps([30000, 25000, 40000, 20000, 21000], 3), (81000, 3))
+        self.assertEqual(best_consecutive_laps([2000, 1000.1, 999.9, 1000.1, 999.9], 2), (2000.0, 2))
+        self.assertEqual(best_consecutive_laps([0, 0, 500], 2), (500, 2))
+        self.assertEqual(best_consecutive_laps([0, 0, 0], 2), (0, 1))
+        self.assertEqual(best_consecutive_laps([1000], 2), (None, None))
+        lap_times = [3000 + (idx * 7919 % 9973) / 7 for idx in range(5000)]
+        windows = [sum(lap_times[idx:idx + 5]) for idx in range(len(lap_times) - 4)]
+        self.assertEqual(best_consecutive_laps(lap_times, 5), (min(windows), windows.index(min(windows)) + 1))
+
+    def make_leaderboard_result(self, heat_id, rows, win_condition):
+        def make_row(pilot_id, laps, total_time, fastest_lap, consecutives_base, consecutives):
+            source = {'round': 1, 'heat': heat_id, 'displayname': 'Heat {}'.format(heat_id)}
+            return {'pilot_id': pilot_id, 'callsign': 'P{}'.format(pilot_id), 'laps': laps, 'starts': 1,
+                    'total_time_raw': total_time, 'total_time_laps_raw': total_time,
+                    'average_lap_raw': total_time / laps, 'fastest_lap_raw': fastest_lap,
+                    'fastest_lap_source': dict(source), 'consecutives_base': consecutives_base,
+                    'consecutives_raw': consecutives, 'consecutive_lap_start': 1,
+                    'consecutives_source': dict(source), 'last_lap_raw': None, 'time_behind_raw': None}
+        return {
+            'by_race_time': [make_row(*row) for row in rows],
+            'by_fastest_lap': [make_row(*row) for row in rows],
+            'by_consecutives': [make_row(*row) for row in rows],
+            'meta': {'primary_leaderboard': 'by_race_time', 'win_condition': win_condition,
+                     'team_racing_mode': False, 'start_behavior': 0, 'consecutives_count': 3},
+        }
+
+    def test_leaderboard_aggregate(self):
+        import Results
+        from filtermanager import Flt
+        from RHRace import WinCondition
+        race_a = self.make_leaderboard_result(10, [(1, 3, 30000, 9000, 3, 30000),
+                                                   (2, 3, 33000, 10000, 3, 33000)], WinCondition.MOST_LAPS)
+        race_b = self.make_leaderboard_result(11, [(1, 2, 25000, 12000, 2, 25000),
+                                                   (2, 3, 27000, 8500, 3, 27000),
+                                                   (3, 4, 40000, 9500, 3, 28000)], WinCondition.FASTEST_LAP)
+        race_c = self.make_leaderboard_result(12, [(3, 1, 11000, 11000, 1, 11000)], WinCondition.MOST_LAPS)
+        filter_calls = []
+        def count_filter(result):
+            # rows as ranked when the filter runs
+            filter_calls.append([(row['pilot_id'], row.get('position')) for row in result['by_race_time']])
+            return result
+        server.RaceContext.filters.add_filter(Flt.LEADERBOARD_BUILD_INCREMENTAL, 'test_aggregate', count_filter)
+        try:
+            aggregate = Results.LeaderboardAggregate(server.RaceContext)
+            aggregate.add(race_a)
+            self.assertEqual(Results.finish_aggregate_leaderboard(server.RaceContext, aggregate)['by_race_time'][0]['laps'], 3)
+            self.assertEqual(len(filter_calls), 0)  # nothing merged
+
+            aggregate = Results.LeaderboardAggregate(server.RaceContext)
+            for race in (race_a, race_b, race_c):
+                aggregate.add(race)
+            result = Results.finish_aggregate_leaderboard(server.RaceContext, aggregate)
+        finally:
+            server.RaceContext.filters.remove_filter(Flt.LEADERBOARD_BUILD_INCREMENTAL, 'test_aggregate')
+        self.assertEqual(filter_calls, [[(2, 1), (3, 2), (1, 3)]])
+
+        by_race_time = {row['pilot_id']: row for row in result['by_race_time']}
+        self.assertEqual({pilot_id: (row['laps'], row['starts'], row['total_time_raw']) for pilot_id, row in by_race_time.items()},
+                         {1: (5, 2, 55000), 2: (6, 2, 60000), 3: (5, 2, 51000)})
+        self.assertEqual(by_race_time[2]['average_lap_raw'], 10000)
+        self.assertEqual([(row['pilot_id'], row['position'], row['behind']) for row in result['by_race_time']],
+                         [(2, 1, 0), (3, 2, 1), (1, 3, 1)])
+        self.assertEqual([(row['pilot_id'], row['position']) for row in result['by_fastest_lap']],
+                         [(2, 1), (1, 2), (3, 3)])
+        self.assertEqual([(row['pilot_id'], row['position']) for row in result['by_consecutives']],
+                         [(2, 1), (3, 2), (1, 3)])
+
+        # fastest lap and consecutives keep the race they came from; fewer-lap windows never replace longer ones
+        self.assertEqual((by_race_time[1]['fastest_lap_raw'], by_race_time[1]['fastest_lap_source']['heat']), (9000, 10))
+        self.assertEqual((by_race_time[2]['fastest_lap_raw'], by_race_time[2]['fastest_lap_source']['heat']), (8500, 11))
+        self.assertEqual((by_race_time[3]['fastest_lap_raw'], by_race_time[3]['fastest_lap_source']['heat']), (9500, 11))
+        self.assertEqual((by_race_time[1]['consecutives_raw'], by_race_time[1]['consecutives_source']['heat']), (30000, 10))
+        self.assertEqual((by_race_time[2]['consecutives_raw'], by_race_time[2]['consecutives_source']['heat']), (27000, 11))
+        self.assertEqual((by_race_time[3]['consecutives_base'], by_race_time[3]['consecutives_raw']), (3, 28000))
+
+        # differing race meta falls back to neutral values
+        self.assertEqual(result['meta']['win_condition'], WinCondition.NONE)
+        self.assertEqual(result['meta']['primary_leaderboard'], 'by_race_time')
+        self.assertEqual(result['meta']['fastest_race_lap_data']['text'][0], 'P2')
+
+        # inputs are not modified
+        self.assertEqual((race_a['by_race_time'][0]['laps'], race_a['by_race_time'][0]['fastest_lap_source']['heat']), (3, 10))
+        self.assertEqual(race_b['meta']['win_condition'], WinCondition.FASTEST_LAP)
+
+    def save_race_with_laps(self, seat_lap_times):
+        from types import SimpleNamespace
+        rhdata = server.RaceContext.rhdata
+        heat = rhdata.add_heat()
+        race = rhdata.add_savedRaceMeta({'round_id': 1, 'heat_id': heat.id, 'class_id': 0,
+                                         'format_id': rhdata.get_first_raceFormat().id,
+                                         'start_time': 0, 'start_time_formatted': ''})
+        race_data = {}
+        pilots = []
+        for node_index, lap_times in enumerate(seat_lap_times):
+            laps = []
+            lap_time_stamp = 0
+            for lap_time in lap_times:
+                lap_time_stamp += lap_time
+                laps.append(SimpleNamespace(lap_time_stamp=lap_time_stamp, lap_time=lap_time, lap_time_formatted='',
+                                            source=0, deleted=False, peak_rssi=None))
+            pilots.append(rhdata.add_pilot())
+            race_data[node_index] = {'race_id': race.id, 'pilot_id': pilots[-1].id, 'enter_at': 0, 'exit_at': 0,
+                                     'frequency': 5658, 'laps': laps}
+        self.addCleanup(self.delete_test_data, [race], [heat], pilots)
+        rhdata.add_race_data(race_data)
+        return race
+
+    def test_leaderboard_views_independent(self):
+        import Results
+        race = self.save_race_with_laps([[1000, 30000, 31000], [1500, 28000, 35000], [2000, 40000]])
+        leaderboard = Results.calc_leaderboard(server.RaceContext, heat_id=race.heat_id, round_id=race.round_id)
+        views = ('by_race_time', 'by_fastest_lap', 'by_consecutives')
+        rows = {view: {row['pilot_id']: row for row in leaderboard[view]} for view in views}
+        pilot_ids = [row['pilot_id'] for row in leaderboard['by_race_time']]
+        self.assertEqual([row['pilot_id'] for row in leaderboard['by_fastest_lap']], [pilot_ids[1], pilot_ids[0], pilot_ids[2]])
+
+        # each view ranks its own rows
+        self.assertEqual([rows[view][pilot_ids[1]]['position'] for view in views], [2, 1, 2])
+        self.assertEqual([row['behind'] for row in leaderboard['by_race_time']], [0, 0, 1])
+        self.assertFalse(any('behind' in row for row in leaderboard['by_fastest_lap'] + leaderboard['by_consecutives']))
+        for pilot_id in pilot_ids:
+            self.assertIsNot(rows['by_race_time'][pilot_id], rows['by_fastest_lap'][pilot_id])
+            self.assertIsNot(rows['by_race_time'][pilot_id], rows['by_consecutives'][pilot_id])
+            self.assertIsNot(rows['by_fastest_lap'][pilot_id], rows['by_consecutives'][pilot_id])
+
+        # changing one view leaves the others as ranked
+        for row in leaderboard['by_fastest_lap']:
+            row['position'] = None
+            row['behind'] = 99
+            row['fastest_lap_source']['displayname'] = 'changed'
+        Results.sort_and_rank_leaderboards(server.RaceContext, {'meta': leaderboard['meta'],
+            'by_race_time': [], 'by_fastest_lap': [], 'by_consecutives': leaderboard['by_consecutives']})
+        self.assertEqual([(row['position'], row['behind']) for row in leaderboard['by_race_time']], [(1, 0), (2, 0), (3, 1)])
+        self.assertEqual([row['position'] for row in leaderboard['by_consecutives']], [1, 2, 3])
+        self.assertNotEqual(leaderboard['by_race_time'][0]['fastest_lap_source']['displayname'], 'changed')
+        self.assertNotEqual(leaderboard['by_consecutives'][0]['fastest_lap_source']['displayname'], 'changed')
+
+    def test_leaderboard_race_build_shared(self):
+        import Results
+        from filtermanager import Flt
+        from gevent.event import Event
+        race = self.save_race_with_laps([[1000, 30000], [1500, 28000]])
+        release = Event()
+        filter_calls = []
+        def count_filter(result):
+            filter_calls.append(result)
+            return result
+        server.RaceContext.filters.add_filter(Flt.LEADERBOARD_BUILD_RACE, 'test_shared_build', count_filter)
+        try:
+            # requests queued behind a running build share a single build and filter pass
+            blocker = gevent.spawn(Results.leaderboard_builds.run, 'test_blocker', release.wait)
+            gevent.sleep(0)
+            builds = [gevent.spawn(Results.build_leaderboard_race, server.RaceContext, race.heat_id, race.round_id)
+                      for _ in range(3)]
+            gevent.sleep(0.01)
+            release.set()
+            gevent.joinall([blocker] + builds, timeout=10)
+        finally:
+            server.RaceContext.filters.remove_filter(Flt.LEADERBOARD_BUILD_RACE, 'test_shared_build')
+        self.assertEqual(len(filter_calls), 1)
+        self.assertTrue(all(build.value is filter_calls[0] for build in builds))
+
+    def test_calibration_lookup(self):
+        from types import SimpleNamespace
+        rhdata = server.RaceContext.rhdata
+        race = server.RaceContext.race
+        seat = 3
+        # frequency without saved history, so earlier races cannot match
+        frequency = max([run.frequency or 0 for run in rhdata.get_savedPilotRaces()] + [5645]) + 1
+        other_frequency = frequency + 1
+        pilot, other_pilot = rhdata.add_pilot().id, rhdata.add_pilot().id
+        race_class = rhdata.add_raceClass()
+        heat = rhdata.add_heat(init={'class_id': race_class.id}, initPilots={seat: pilot})
+        class_heat = rhdata.add_heat(init={'class_id': race_class.id})
+        other_heat = rhdata.add_heat()
+        format_id = rhdata.get_first_raceFormat().id
+        saved_races = []
+        self.addCleanup(self.delete_test_data, saved_races, [heat, class_heat, other_heat], [pilot, other_pilot], [race_class])
+        node = SimpleNamespace(index=seat, frequency=frequency, enter_at_level=90, exit_at_level=80)
+
+        def save_race(race_heat, seat_pilot, calibration, seat_frequency=frequency):
+            round_id = len(rhdata.get_savedRaceMetas_by_heat(race_heat.id)) + 1
+            saved_race = rhdata.add_savedRaceMeta({'round_id': round_id, 'heat_id': race_heat.id, 'class_id': race_heat.class_id,
+                                                   'format_id': format_id, 'start_time': 0, 'start_time_formatted': ''})
+            saved_races.append(saved_race)
+            rhdata.add_race_data({seat: {'race_id': saved_race.id, 'pilot_id': seat_pilot, 'frequency': seat_frequency,
+                                         'enter_at': calibration[0], 'exit_at': calibration[1], 'laps': []}})
+
+        def find_calibration():
+            values = server.RaceContext.calibration.find_best_calibration_values(node, seat)
+            return values['enter_at_level'], values['exit_at_level']
+
+        current_heat = race.current_heat
+        race.current_heat = heat.id
+        try:
+            # no history: node levels are kept
+            self.assertEqual(find_calibration(), (90, 80))
+            # same seat and frequency, any pilot
+            save_race(other_heat, other_pilot, (110, 100))
+            self.assertEqual(find_calibration(), (110, 100))
+            # same pilot is preferred over a later race by another pilot
+            save_race(other_heat, pilot, (120, 110))
+            save_race(other_heat, other_pilot, (111, 101))
+            self.assertEqual(find_calibration(), (120, 110))
+            # latest race of the class with the same pilot is preferred over a later unclassified race
+            save_race(class_heat, pilot, (130, 120))
+            save_race(other_heat, pilot, (140, 130))
+            self.assertEqual(find_calibration(), (130, 120))
+            # latest race of the heat is used for any pilot on the same frequency
+            save_race(heat, other_pilot, (150, 140))
+            self.assertEqual(find_calibration(), (150, 140))
+            # only the latest race of the heat (and class) is checked; older races of the heat are not used
+            save_race(heat, pilot, (160, 150), other_frequency)
+            self.assertEqual(find_calibration(), (140, 130))
+        finally:
+            race.current_heat = current_heat
+
+    def test_time_format_cache(self):
+        import RHUtils
+        self.assertEqual(RHUtils.format_time_to_str(83456.5), '1:23.456')
+        self.assertEqual(RHUtils.format_time_to_str(83456.5, '{s}s {d}'), '23s 456')
+        self.assertEqual(RHUtils.format_time_to_str(5007, ''), '0:05.007')
+        self.assertEqual(RHUtils.format_time_to_str(None), '')
+        self.assertEqual(RHUtils.format_split_time_to_str(5007), '5.007')
+        self.assertIs(RHUtils.get_time_formatter('{s}s {d}'), RHUtils.get_time_formatter('{s}s {d}'))
+        self.assertGreater(RHUtils.get_time_formatter.cache_info().currsize, 0)
+        server.Events.trigger(server.Evt.CONFIG_SET, {'section': 'UI', 'key': 'timeFormat', 'value': '{s}.{d}'})
+        self.assertEqual(RHUtils.get_time_formatter.cache_info().currsize, 0)
+
+    def test_results_cache_invalidation(self):
+        rhdata = server.RaceContext.rhdata
+        race_class = rhdata.add_raceClass()
+        heat_a = rhdata.add_heat(init={'class_id': race_class.id})
+        heat_b = rhdata.add_heat(init={'class_id': race_class.id})
+        token = 1
+        results = {'meta': {'primary_leaderboard': 'by_race_time'}, 'by_race_time': [{'pilot_id': 1}]}
+        for heat in (heat_a, heat_b):
+            rhdata.clear_results_heat(heat, token)
+            rhdata.set_results_heat(heat, token, results)
+        rhdata.clear_results_raceClass(race_class, token)
+        rhdata.set_results_raceClass(race_class, token, {})
+        rhdata.set_ranking_raceClass(race_class, token, {})
+        self.assertEqual(rhdata._load_results(('ranking', race_class.id)), {})
+
+        dirty = rhdata.invalidate_results(('heat', heat_a.id))
+        self.assertIn(('class', race_class.id), dirty)
+        self.assertIn(('ranking', race_class.id), dirty)
+        self.assertIn(('event', None), dirty)
+        self.assertNotIn(('heat', heat_b.id), dirty)
+        self.assertEqual(json.loads(heat_b._cache_status)['build_ver'], token)
+        self.assertIsNone(json.loads(heat_a._cache_status)['build_ver'])
+        self.assertIsNone(json.loads(race_class._cache_status)['build_ver'])
+        self.assertEqual(rhdata._load_results(('heat', heat_b.id)), results)
+        self.assertEqual(rhdata._load_results(('heat', heat_b.id), ['meta']), {'meta': results['meta']})
+        self.assertIs(rhdata._load_results(('heat', heat_a.id)), rhdata._RESULTS_MISSING)
+
+    def test_pagecache_delta(self):
+        from PageCache import PageCache
+        pagecache = PageCache(server.RaceContext, server.Events)
+        payload = {'heats': {1: {'a': 1}, 2: {'a': 2}}, 'classes': {}, 'event_leaderboard': None}
+        pagecache._update_versions(payload)
+        pagecache.set_cache(payload)
+        self.assertEqual(pagecache.get_version(), 1)
+        self.assertIsNone(pagecache.get_delta(None))
+
+        payload = {'heats': {1: {'a': 1}, 3: {'a': 3}}, 'classes': {}, 'event_leaderboard': {'b': 1}}
+        pagecache._update_versions(payload)
+        pagecache.set_cache(payload)
+        delta = pagecache.get_delta(1)
+        self.assertEqual(delta['version'], 2)
+        self.assertEqual(delta['heats'], {3: {'a': 3}})
+        self.assertEqual(delta['event_leaderboard'], {'b': 1})
+        self.assertEqual(delta['removed'], [['heats', 2]])
+        self.assertNotIn('classes', delta)
+
+    def test_build_coordinator(self):
+        from util.BuildCoordinator import BuildCoordinator
+        coordinator = BuildCoordinator('test')
+        builds = []
+        def build(value):
+            builds.append(value)
+            gevent.sleep(0.01)
+            return len(builds)
+
+        greenlets = [gevent.spawn(coordinator.run, 'key', build, idx) for idx in range(4)]
+        gevent.joinall(greenlets)
+        # first request builds; the others wait and share one rebuild
+        self.assertEqual(builds, [0, 1])
+        self.assertEqual([g.value for g in greenlets], [1, 2, 2, 2])
+        self.assertTrue(coordinator.wait_idle(1))
+
+    def test_rssi_history(self):
+        from RssiHistory import RssiHistory
+        history = RssiHistory()
+        for idx, value in enumerate([40, 80, 80, 80, 80, 40, 40]):
+            history.add(value, float(idx))
+        # runs of equal values keep only their first and last times
+        self.assertEqual(history.values, [40, 80, 80, 40, 40])
+        self.assertEqual(history.times, [0.0, 1.0, 4.0, 5.0, 6.0])
+        self.assertEqual(history.get_window(1.0, 4.5), ([80, 80], [1.0, 4.0]))
+        history.prune_before(4.5)
+        self.assertEqual(history.values, [40, 40])
+        history.add(40, 7.0)
+        self.assertEqual(history.times, [5.0, 7.0])
+
+    def test_rssi_history_pack(self):
+        from util.RssiHistoryPack import pack_history, unpack_history
+        values = [40, 80, 80, 35, 120]
+        times = [1000.5, 1000.625, 1001.0, 1002.375, 1900.0]
+        for compress in [True, False]:
+            packed = pack_history(values, times, compress)
+            unpacked_values, unpacked_times = unpack_history(packed)
+            self.assertEqual(unpacked_values.tolist(), values)
+            self.assertEqual(unpacked_times.tolist(), times)
+        self.assertEqual([a.tolist() for a in unpack_history(pack_history([], []))], [[], []])
+        # history that cannot be packed falls back to JSON storage
+        self.assertIsNone(pack_history([40.5], [1.0]))
+        self.assertIsNone(pack_history([40, 40], [2.0, 1.0]))
+        rhdata = server.RaceContext.rhdata
+        self.assertEqual(rhdata.encode_savedPilotRace_history([40.5], [1.0])['history_values'], '[40.5]')
+        legacy = rhdata.migrate_savedPilotRace_history({'id': 1, 'history_values': '[40, 80]', 'history_times': '[1.0, 2.5]'})
+        self.assertIsNone(legacy['history_values'])
+        self.assertEqual(unpack_history(legacy['history_data'])[0].tolist(), [40, 80])
+
+    def test_json_export_history(self):
+        rhdata = server.RaceContext.rhdata
+        heat = rhdata.add_heat()
+        pilot = rhdata.add_pilot()
+        race = rhdata.add_savedRaceMeta({'round_id': 1, 'heat_id': heat.id, 'class_id': 0,
+                                         'format_id': rhdata.get_first_raceFormat().id,
+                                         'start_time': 0, 'start_time_formatted': ''})
+        pilotrace = {'race_id': race.id, 'pilot_id': pilot.id, 'enter_at': 0, 'exit_at': 0, 'frequency': 5658, 'laps': []}
+        self.addCleanup(self.delete_test_data, [race], [heat], [pilot])
+        pilotrace.update(rhdata.encode_savedPilotRace_history([40, 80, 35], [1.0, 1.5, 2.25]))
+        self.assertIsNotNone(pilotrace['history_data'])
+        rhdata.add_race_data({0: pilotrace})
+        export = server.RaceContext.export_manager.exporters['JSON__Complete____All'].export(server.RHAPI)
+        exported = [run for run in json.loads(export['data'])['SavedPilotRace'] if run['race_id'] == race.id]
+        self.assertEqual(len(exported), 1)
+        self.assertEqual(json.loads(exported[0]['history_values']), [40, 80, 35])
+        self.assertEqual(json.loads(exported[0]['history_times']), [1.0, 1.5, 2.25])
+
+    def test_rssi_history_decimate(self):
+        from util.RssiHistoryDecimate import decimate_history
+        times = [idx * 0.01 for idx in range(3000)]
+        values = [50 + (idx % 7) for idx in range(3000)]
+        values[1500:1510] = [150, 170, 180, 180, 175, 180, 160, 120, 80, 60]
+        dec_values, dec_times, decimated = decimate_history(values, times, 200)
+        self.assertTrue(decimated)
+        self.assertLessEqual(len(dec_values), 202)
+        self.assertEqual((dec_times[0], dec_times[-1]), (times[0], times[-1]))
+        # first and last entries at peak are kept, along with the minimum
+        peak_times = [t for v, t in zip(dec_values, dec_times) if v == 180]
+        self.assertEqual((peak_times[0], peak_times[-1]), (times[1502], times[1505]))
+        self.assertEqual(min(dec_values), 50)
+        # window with fewer entries than requested is returned in full
+        self.assertEqual(decimate_history(values, times, 200, 15.0, 15.095), (values[1500:1510], times[1500:1510], False))
+
+    def test_create_missing_indexes(self):
+        import Database
+        from sqlalchemy import inspect
+        Database.DB_session.remove()
+        index = [idx for idx in Database.SavedRaceLap.__table__.indexes if idx.name == 'ix_saved_race_lap_race_id'][0]
+        index.drop(bind=Database.DB_engine)
+        self.assertEqual(Database.create_db_indexes(), ['ix_saved_race_lap_race_id'])
+        self.assertIn('ix_saved_race_lap_race_id',
+                      [idx['name'] for idx in inspect(Database.DB_engine).get_indexes('saved_race_lap')])
+        self.assertEqual(Database.create_db_indexes(), [])
+
+    def test_db_storage_profile(self):
+        import Database
+        pragmas = dict(Database.get_storage_pragmas('durable', {'mmap_size': 0, 'cache_size': '-1; DROP', 'page_size': 1024}))
+        self.assertEqual(pragmas['synchronous'], 'FULL')
+        self.assertEqual(pragmas['mmap_size'], 0)
+        self.assertEqual(pragmas['cache_size'], Database.DB_STORAGE_PROFILES['durable']['cache_size'])
+        self.assertNotIn('page_size', pragmas)
+        self.assertEqual(dict(Database.get_storage_pragmas('unknown', {})),
+                         Database.DB_STORAGE_PROFILES[Database.DB_DEFAULT_STORAGE_PROFILE])
+        with Database.DB_engine.connect() as conn:
+            self.assertEqual(conn.exec_driver_sql("PRAGMA journal_mode").scalar().lower(), 'wal')
+        self.assertEqual(len(Database.checkpoint_database()), 3)
+        self.assertEqual(Database.check_database_integrity(), [])
+
+    def test_interface_node_cache(self):
+        mapper = server.RaceContext.interface
+        self.assertIs(mapper.nodes, mapper.nodes)
+        self.assertEqual([node_map.object for node_map in mapper.node_map], list(mapper.nodes))
+        grouped = [idx for _ifmeta, node_maps in mapper.interface_node_maps for idx, _node_map in node_maps]
+        self.assertEqual(grouped, list(range(len(mapper.nodes))))
+        node = mapper.nodes[0]
+        self.assertEqual(mapper.transmit_enter_at_level(node, node.enter_at_level), node.enter_at_level)
+
+    def test_heartbeat_subscribe(self):
+        from util.HeartbeatFrames import pack_heartbeat, unpack_heartbeat
+        rhui = server.RaceContext.rhui
+        node_data = {'current_rssi': [50, 60, None], 'frequency': [5658, 5695, 0],
+                     'loop_time': [1000, 1020, 0], 'crossing_flag': [False, True, False]}
+        self.assertEqual(unpack_heartbeat(pack_heartbeat(node_data, 7)),
+                         (7, {**node_data, 'current_rssi': [50, 60, 0]}))
+
+        self.client.emit('heartbeat_subscribe', {'mode': 'delta'})
+        self.client.get_received()
+        rhui.emit_heartbeat(node_data)
+        rhui.emit_heartbeat({**node_data, 'current_rssi': [50, 75, None]})
+        received = self.client.get_received()
+        self.assertNotIn('heartbeat', [resp['name'] for resp in received])
+        state = None
+        for msg in [resp['args'][0] for resp in received if resp['name'] == 'heartbeat_delta']:
+            if 'node_data' in msg:
+                state = msg['node_data']
+            else:
+                for key, changes in msg['changes'].items():
+                    for idx, value in changes:
+                        state[key][idx] = value
+        self.assertEqual(state['current_rssi'], [50, 75, None])
+
+        self.client.emit('heartbeat_subscribe', {'mode': 'none'})
+        self.client.get_received()
+        rhui.emit_heartbeat(node_data)
+        self.assertEqual(self.client.get_received(), [])
+
+        default_client = server.SOCKET_IO.test_client(server.APP)
+        default_client.get_received()
+        rhui.emit_heartbeat(node_data)
+        self.assertIn('heartbeat', [resp['name'] for resp in default_client.get_received()])
+        default_client.disconnect()
+
+    def test_heat_seat_cache(self):
+        rhdata = server.RaceContext.rhdata
+        heat = rhdata.add_heat()
+        slot = rhdata.get_heatNodes_by_heat(heat.id)[0]
+        pilot = rhdata.add_pilot()
+        self.assertIsNone(rhdata.get_pilot_from_heatNode(heat.id, slot.node_index))
+        rhdata.alter_heat({'heat': heat.id, 'slot_id': slot.id, 'pilot': pilot.id})
+        self.assertEqual(rhdata.get_pilot_from_heatNode(heat.id, slot.node_index), pilot.id)
+        self.assertEqual(rhdata.get_heat_seats(heat.id)[slot.node_index], pilot.id)
+        rhdata.alter_pilot({'pilot_id': pilot.id, 'callsign': 'Seat Cache'})
+        self.assertEqual(rhdata.get_pilot_view(pilot.id).callsign, 'Seat Cache')
+        rhdata.delete_heat(heat.id)
+        self.assertEqual(rhdata.get_heat_seats(heat.id), {})
+
+    def test_option_write_behind(self):
+        import Database
+        from sqlalchemy import event
+        rhdata = server.RaceContext.rhdata
+        statements = []
+        def count_statement(*_args):
+            statements.append(1)
+        rhdata.flush_options()
+        event.listen(Database.DB_engine, 'before_cursor_execute', count_statement)
+        try:
+            for idx in range(5):
+                rhdata.set_option('writeBehindTest', idx)
+                rhdata.set_option('writeBehindTest2', idx)
+            # values are served from the cache before being written
+            self.assertEqual(rhdata.get_optionInt('writeBehindTest'), 4)
+            self.assertEqual(len(statements), 0)
+            gevent.sleep(server.RHData.OPTIONS_WRITE_DELAY + 0.2)
+        finally:
+            event.remove(Database.DB_engine, 'before_cursor_execute', count_statement)
+        self.assertGreater(len(statements), 0)
+        self.assertLessEqual(len(statements), 3)  # select, then one insert per new option
+        values = {option.option_name: option.option_value for option in rhdata.get_options()}
+        self.assertEqual(values['writeBehindTest2'], '4')
+
+        # values are kept for retry if the write fails, without replacing values set in the meantime
+        def fail_write(_conn, _cursor, statement, *_args):
+            if not statement.startswith('SELECT'):
+                rhdata.set_option('writeBehindTest2', 'newer')
+                raise RuntimeError('write failed')
+        rhdata.set_option('writeBehindTest', 'unwritten')
+        rhdata.set_option('writeBehindTest3', 'unwritten')
+        event.listen(Database.DB_engine, 'before_cursor_execute', fail_write)
+        try:
+            self.assertFalse(rhdata.flush_options())
+        finally:
+            event.remove(Database.DB_engine, 'before_cursor_execute', fail_write)
+        self.assertTrue(rhdata.flush_options())
+        values = {option.option_name: option.option_value for option in rhdata.get_options()}
+        self.assertEqual(values['writeBehindTest'], 'unwritten')
+        self.assertEqual(values['writeBehindTest2'], 'newer')
+        self.assertEqual(values['writeBehindTest3'], 'unwritten')
+
+    def test_mock_interface_batch_read(self):
+        from MockInterface import MockInterface
+        interface = MockInterface(num_nodes=4, config=server.RaceContext.serverconfig)
+        interface.set_frequency(0, 5658)
+        interface.set_frequency(2, 5732)
+        node_stats = interface.read_all_node_stats()
+        self.assertEqual(sorted(node_stats.keys()), [0, 2])
+        # one batch shares a single read time
+        self.assertEqual(node_stats[0][1], node_stats[2][1])
+        interface.update()
+
+    def test_serial_node_io_groups(self):
+        from serial_node import SerialNode
+        port_a, port_b = object(), object()
+        nodes = [SerialNode(0, port_a), SerialNode(1, port_a), SerialNode(2, port_b)]
+        # nodes on one port share a group and lock; separate ports can be read concurrently
+        self.assertEqual(nodes[0].get_io_group(), nodes[1].get_io_group())
+        self.assertIs(nodes[0].get_batch_io_lock(), nodes[1].get_batch_io_lock())
+        self.assertNotEqual(nodes[0].get_io_group(), nodes[2].get_io_group())
+        self.assertIsNot(nodes[0].get_batch_io_lock(), nodes[2].get_batch_io_lock())
+
+    def test_pass_trace(self):
+        from PassTrace import PassStage, percentile
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(percentile([1, 2, 3, 4], 99), 4)
+        pass_trace = server.RaceContext.pass_trace
+        self.assertIsNone(pass_trace.begin(0))
+        general_config = server.RaceContext.serverconfig.config['GENERAL']
+        trace_size = general_config.get('PASS_TRACE_SIZE')
+        general_config['PASS_TRACE_SIZE'] = 2  # in memory only; config file is not saved
+        server.Events.trigger(server.Evt.CONFIG_SET, {'section': 'GENERAL', 'key': 'PASS_TRACE_SIZE', 'value': 2})
+        try:
+            for lap_number in range(3):
+                trace = pass_trace.begin(1, (0.0, 0.002))
+                trace['stamps'][PassStage.CALLBACK] = 0.005
+                pass_trace.record(trace, lap_number)
+            stats = pass_trace.get_stats()
+            self.assertEqual(stats['count'], 2)
+            self.assertEqual(stats['stages'][PassStage.PROCESS]['p50'], 2.0)
+            self.assertEqual(stats['stages'][PassStage.CALLBACK]['max'], 3.0)
+            self.assertEqual(stats['total']['p90'], 5.0)
+            self.assertEqual([traced['lap_number'] for traced in pass_trace.get_passes()], [1, 2])
+            self.client.emit('get_pass_trace', {'clear': True})
+            self.assertEqual(self.get_response('pass_trace')['count'], 0)
+        finally:
+            general_config['PASS_TRACE_SIZE'] = trace_size
+            pass_trace.configure(0)
+
+    def test_results_prebuilder(self):
+        from RHRace import RaceStatus
+        prebuilder = server.RaceContext.results_prebuilder
+        race = server.RaceContext.race
+        heat = server.RaceContext.rhdata.add_heat()
+        race.race_status = RaceStatus.STAGING
+        try:
+            pending = prebuilder.pending()
+            prebuilder.schedule(heat_id=heat.id, event=False, page=False)
+            prebuilder.schedule(heat_id=heat.id, event=False, page=False)
+            gevent.sleep(0.1)
+            # no builds while staging; duplicate requests are merged
+            self.assertTrue(prebuilder.is_paused())
+            self.assertEqual(prebuilder.pending(), pending + 1)
+        finally:
+            race.race_status = RaceStatus.READY
+        prebuilder._wake.set()
+        for _ in range(50):
+            if not prebuilder.pending():
+                break
+            gevent.sleep(0.1)
+        self.assertEqual(prebuilder.pending(), 0)
+
         
 if __name__ == '__main__':
     unittest.main()